@@ -4,23 +4,34 @@ import os
 import boto3
 from botocore.exceptions import ClientError
 
+from lambda_python_powertools.helper.cold_start import cold_start
+from lambda_python_powertools.helper.validation import EventField, EventSchema, EventValidationError
 from lambda_python_powertools.logging import (
+    LazyMessage,
     logger_inject_process_booking_sfn,
     logger_setup,
-    MetricUnit,
-    log_metric,
 )
-from lambda_python_powertools.tracing import Tracer
+from lambda_python_powertools.metrics import MetricRegistry, Metrics, MetricUnit
+from lambda_python_powertools.tracing import Profiler, Tracer
 
 logger = logger_setup()
-tracer = Tracer()
+metrics = Metrics(capture_cold_start=True)
+tracer = Tracer(patch_modules=["boto3"], profiler=Profiler(metrics=metrics))
+registry = MetricRegistry(metrics=metrics)
+invalid_booking_request_metric = registry.define(
+    "InvalidBookingRequest", MetricUnit.Count, dimensions=("operation",)
+)
+successful_cancellation_metric = registry.define("SuccessfulCancellation", MetricUnit.Count)
+failed_cancellation_metric = registry.define("FailedCancellation", MetricUnit.Count)
+cancel_booking_event = EventSchema("CancelBookingEvent", booking_id=EventField("bookingId"))
 
-session = boto3.Session()
-dynamodb = session.resource("dynamodb")
-table_name = os.getenv("BOOKING_TABLE_NAME", "undefined")
-table = dynamodb.Table(table_name)
+with cold_start.timed("boto3_session"):
+    session = boto3.Session()
+    dynamodb = session.resource("dynamodb")
 
-_cold_start = True
+table_name = os.getenv("BOOKING_TABLE_NAME", "undefined")
+with cold_start.timed("dynamodb_table"):
+    table = dynamodb.Table(table_name)
 
 
 class BookingCancellationException(Exception):
@@ -36,7 +47,11 @@ class BookingCancellationException(Exception):
 @tracer.capture_method
 def cancel_booking(booking_id):
     try:
-        logger.debug({"operation": "cancel_booking", "details": {"booking_id": booking_id}})
+        logger.debug(
+            LazyMessage(
+                lambda: {"operation": "cancel_booking", "details": {"booking_id": booking_id}}
+            )
+        )
         ret = table.update_item(
             Key={"id": booking_id},
             ConditionExpression="id = :idVal",
@@ -56,6 +71,7 @@ def cancel_booking(booking_id):
         raise BookingCancellationException(details=err)
 
 
+@metrics.log_metrics
 @tracer.capture_lambda_handler(process_booking_sfn=True)
 @logger_inject_process_booking_sfn
 def lambda_handler(event, context):
@@ -82,33 +98,24 @@ def lambda_handler(event, context):
     BookingCancellationException
         Booking Cancellation Exception including error message upon failure
     """
-    global _cold_start
-    if _cold_start:
-        log_metric(
-            name="ColdStart", unit=MetricUnit.Count, value=1, function_name=context.function_name
-        )
-        _cold_start = False
-
-    booking_id = event.get("bookingId")
-
-    if not booking_id:
-        log_metric(
-            name="InvalidBookingRequest", unit=MetricUnit.Count, value=1, operation="cancel_booking"
-        )
-        logger.error({"operation": "invalid_event", "details": event})
-        raise ValueError("Invalid booking ID")
+    try:
+        booking_id = cancel_booking_event.validate(event).booking_id
+    except EventValidationError as err:
+        invalid_booking_request_metric.emit(1, operation="cancel_booking")
+        logger.error({"operation": "invalid_event", "details": event, "errors": err.errors})
+        raise
 
     try:
-        logger.debug(f"Cancelling booking - {booking_id}")
+        logger.debug("Cancelling booking - %s", booking_id)
         ret = cancel_booking(booking_id)
 
-        log_metric(name="SuccessfulCancellation", unit=MetricUnit.Count, value=1)
+        successful_cancellation_metric.emit(1)
         logger.debug("Adding Booking Status annotation")
         tracer.put_annotation("BookingStatus", "CANCELLED")
 
         return ret
     except BookingCancellationException as err:
-        log_metric(name="FailedCancellation", unit=MetricUnit.Count, value=1)
+        failed_cancellation_metric.emit(1)
         logger.debug("Adding Booking Status annotation before raising error")
         tracer.put_annotation("BookingStatus", "ERROR")
         logger.error({"operation": "cancel_booking", "details": err})
@@ -4,23 +4,34 @@ import secrets
 import boto3
 from botocore.exceptions import ClientError
 
+from lambda_python_powertools.helper.cold_start import cold_start
+from lambda_python_powertools.helper.validation import EventField, EventSchema, EventValidationError
 from lambda_python_powertools.logging import (
-    MetricUnit,
-    log_metric,
+    LazyMessage,
     logger_inject_process_booking_sfn,
     logger_setup,
 )
-from lambda_python_powertools.tracing import Tracer
+from lambda_python_powertools.metrics import MetricRegistry, Metrics, MetricUnit
+from lambda_python_powertools.tracing import Profiler, Tracer
 
 logger = logger_setup()
-tracer = Tracer()
+metrics = Metrics(capture_cold_start=True)
+tracer = Tracer(patch_modules=["boto3"], profiler=Profiler(metrics=metrics))
+registry = MetricRegistry(metrics=metrics)
+invalid_booking_request_metric = registry.define(
+    "InvalidBookingRequest", MetricUnit.Count, dimensions=("operation",)
+)
+successful_booking_metric = registry.define("SuccessfulBooking", MetricUnit.Count)
+failed_booking_metric = registry.define("FailedBooking", MetricUnit.Count)
+confirm_booking_event = EventSchema("ConfirmBookingEvent", booking_id=EventField("bookingId"))
 
-session = boto3.Session()
-dynamodb = session.resource("dynamodb")
-table_name = os.getenv("BOOKING_TABLE_NAME", "undefined")
-table = dynamodb.Table(table_name)
+with cold_start.timed("boto3_session"):
+    session = boto3.Session()
+    dynamodb = session.resource("dynamodb")
 
-_cold_start = True
+table_name = os.getenv("BOOKING_TABLE_NAME", "undefined")
+with cold_start.timed("dynamodb_table"):
+    table = dynamodb.Table(table_name)
 
 
 class BookingConfirmationException(Exception):
@@ -53,7 +64,11 @@ def confirm_booking(booking_id):
         Booking Confirmation Exception including error message upon failure
     """
     try:
-        logger.debug({"operation": "confirm_booking", "details": {"booking_id": booking_id}})
+        logger.debug(
+            LazyMessage(
+                lambda: {"operation": "confirm_booking", "details": {"booking_id": booking_id}}
+            )
+        )
         reference = secrets.token_urlsafe(4)
         ret = table.update_item(
             Key={"id": booking_id},
@@ -78,6 +93,7 @@ def confirm_booking(booking_id):
         raise BookingConfirmationException(details=err)
 
 
+@metrics.log_metrics
 @tracer.capture_lambda_handler(process_booking_sfn=True)
 @logger_inject_process_booking_sfn
 def lambda_handler(event, context):
@@ -106,37 +122,27 @@ def lambda_handler(event, context):
         Booking Confirmation Exception including error message upon failure
     """
 
-    global _cold_start
-    if _cold_start:
-        log_metric(
-            name="ColdStart", unit=MetricUnit.Count, value=1, function_name=context.function_name
-        )
-        _cold_start = False
-
-    booking_id = event.get("bookingId")
-    if not booking_id:
-        log_metric(
-            name="InvalidBookingRequest",
-            unit=MetricUnit.Count,
-            value=1,
-            operation="confirm_booking",
-        )
-        logger.error({"operation": "invalid_event", "details": event})
-        raise ValueError("Invalid booking ID")
+    try:
+        booking_id = confirm_booking_event.validate(event).booking_id
+    except EventValidationError as err:
+        invalid_booking_request_metric.emit(1, operation="confirm_booking")
+        logger.error({"operation": "invalid_event", "details": event, "errors": err.errors})
+        raise
 
     try:
-        logger.debug(f"Confirming booking - {booking_id}")
+        logger.debug("Confirming booking - %s", booking_id)
         ret = confirm_booking(booking_id)
 
-        log_metric(name="SuccessfulBooking", unit=MetricUnit.Count, value=1)
+        successful_booking_metric.emit(1)
         logger.debug("Adding Booking Status annotation")
-        tracer.put_annotation("BookingReference", ret["bookingReference"])
-        tracer.put_annotation("BookingStatus", "CONFIRMED")
+        tracer.put_annotations(
+            {"BookingReference": ret["bookingReference"], "BookingStatus": "CONFIRMED"}
+        )
 
         # Step Functions use the return to append `bookingReference` key into the overall output
         return ret["bookingReference"]
     except BookingConfirmationException as err:
-        log_metric(name="FailedBooking", unit=MetricUnit.Count, value=1)
+        failed_booking_metric.emit(1)
         logger.debug("Adding Booking Status annotation before raising error")
         tracer.put_annotation("BookingStatus", "ERROR")
         logger.error({"operation": "confirm_booking", "details": err})
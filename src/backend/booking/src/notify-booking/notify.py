@@ -4,22 +4,37 @@ import os
 import boto3
 from botocore.exceptions import ClientError
 
+from lambda_python_powertools.helper.cold_start import cold_start
+from lambda_python_powertools.helper.validation import EventField, EventSchema, EventValidationError
 from lambda_python_powertools.logging import (
-    MetricUnit,
-    log_metric,
+    LazyMessage,
     logger_inject_process_booking_sfn,
     logger_setup,
 )
-from lambda_python_powertools.tracing import Tracer
+from lambda_python_powertools.metrics import MetricRegistry, Metrics, MetricUnit
+from lambda_python_powertools.tracing import Profiler, Tracer
 
 logger = logger_setup()
-tracer = Tracer()
+metrics = Metrics(capture_cold_start=True)
+tracer = Tracer(patch_modules=["boto3"], profiler=Profiler(metrics=metrics))
+registry = MetricRegistry(metrics=metrics)
+invalid_booking_request_metric = registry.define(
+    "InvalidBookingRequest", MetricUnit.Count, dimensions=("operation",)
+)
+successful_notification_metric = registry.define("SuccessfulNotification", MetricUnit.Count)
+failed_notification_metric = registry.define("FailedNotification", MetricUnit.Count)
+notify_booking_event = EventSchema(
+    "NotifyBookingEvent",
+    customer_id=EventField("customerId", required=False, default=False),
+    price=EventField("payment.price", types=(int, float, str), required=False, default=False),
+    booking_reference=EventField("bookingReference", required=False, default=False),
+)
 
-session = boto3.Session()
-sns = session.client("sns")
-booking_sns_topic = os.getenv("BOOKING_TOPIC", "undefined")
+with cold_start.timed("boto3_session"):
+    session = boto3.Session()
+    sns = session.client("sns")
 
-_cold_start = True
+booking_sns_topic = os.getenv("BOOKING_TOPIC", "undefined")
 
 
 class BookingNotificationException(Exception):
@@ -71,14 +86,16 @@ def notify_booking(payload, booking_reference):
 
     try:
         logger.debug(
-            {
-                "operation": "notify_booking",
-                "details": {
-                    "customer_id": payload["customerId"],
-                    "booking_price": payload["price"],
-                    "booking_status": booking_status,
-                },
-            }
+            LazyMessage(
+                lambda: {
+                    "operation": "notify_booking",
+                    "details": {
+                        "customer_id": payload["customerId"],
+                        "booking_price": payload["price"],
+                        "booking_status": booking_status,
+                    },
+                }
+            )
         )
         ret = sns.publish(
             TopicArn=booking_sns_topic,
@@ -99,6 +116,7 @@ def notify_booking(payload, booking_reference):
         raise BookingNotificationException(details=err)
 
 
+@metrics.log_metrics
 @tracer.capture_lambda_handler(process_booking_sfn=True)
 @logger_inject_process_booking_sfn
 def lambda_handler(event, context):
@@ -134,22 +152,15 @@ def lambda_handler(event, context):
         Booking Notification Exception including error message upon failure
     """
 
-    global _cold_start
-    if _cold_start:
-        log_metric(
-            name="ColdStart", unit=MetricUnit.Count, value=1, function_name=context.function_name
-        )
-        _cold_start = False
-
-    customer_id = event.get("customerId", False)
-    payment = event.get("payment", {})
-    price = payment.get("price", False)
-    booking_reference = event.get("bookingReference", False)
+    try:
+        customer_id, price, booking_reference = notify_booking_event.validate(event)
+    except EventValidationError as err:
+        invalid_booking_request_metric.emit(1, operation="notify_booking")
+        logger.error({"operation": "invalid_event", "details": event, "errors": err.errors})
+        raise
 
     if not customer_id and not price:
-        log_metric(
-            name="InvalidBookingRequest", unit=MetricUnit.Count, value=1, operation="notify_booking"
-        )
+        invalid_booking_request_metric.emit(1, operation="notify_booking")
         logger.error({"operation": "invalid_event", "details": event})
         raise ValueError("Invalid customer and price")
 
@@ -157,15 +168,19 @@ def lambda_handler(event, context):
         payload = {"customerId": customer_id, "price": price}
         ret = notify_booking(payload, booking_reference)
 
-        log_metric(name="SuccessfulNotification", unit=MetricUnit.Count, value=1)
+        successful_notification_metric.emit(1)
         logger.debug("Adding Booking Notification annotation")
-        tracer.put_annotation("BookingNotification", ret["notificationId"])
-        tracer.put_annotation("BookingNotificationStatus", "SUCCESS")
+        tracer.put_annotations(
+            {
+                "BookingNotification": ret["notificationId"],
+                "BookingNotificationStatus": "SUCCESS",
+            }
+        )
 
         # Step Functions use the return to append `notificationId` key into the overall output
         return ret["notificationId"]
     except BookingNotificationException as err:
-        log_metric(name="FailedNotification", unit=MetricUnit.Count, value=1)
+        failed_notification_metric.emit(1)
         logger.debug("Adding Booking Notification annotation before raising error")
         tracer.put_annotation("BookingNotificationStatus", "FAILED")
         logger.error({"operation": "notify_booking", "details": err})
@@ -6,24 +6,43 @@ import boto3
 from botocore.exceptions import ClientError
 
 
+from lambda_python_powertools.helper.cold_start import cold_start
+from lambda_python_powertools.helper.validation import EventField, EventSchema, EventValidationError
 from lambda_python_powertools.logging import (
+    LazyMessage,
     logger_inject_process_booking_sfn,
     logger_setup,
-    MetricUnit,
-    log_metric,
 )
+from lambda_python_powertools.metrics import MetricRegistry, Metrics, MetricUnit
 
-from lambda_python_powertools.tracing import Tracer
+from lambda_python_powertools.tracing import Profiler, Tracer
 
-logger = logger_setup()
-tracer = Tracer()
+logger = logger_setup(
+    max_record_bytes=4096, keep_fields=("operation", "details.ResponseMetadata.HTTPStatusCode")
+)
+metrics = Metrics(capture_cold_start=True)
+tracer = Tracer(patch_modules=["boto3"], profiler=Profiler(metrics=metrics))
+registry = MetricRegistry(metrics=metrics)
+invalid_booking_request_metric = registry.define(
+    "InvalidBookingRequest", MetricUnit.Count, dimensions=("operation",)
+)
+successful_reservation_metric = registry.define("SuccessfulReservation", MetricUnit.Count)
+failed_reservation_metric = registry.define("FailedReservation", MetricUnit.Count)
+reserve_booking_event = EventSchema(
+    "ReserveBookingEvent",
+    outbound_flight_id=EventField("outboundFlightId"),
+    customer_id=EventField("customerId"),
+    charge_id=EventField("chargeId"),
+    state_machine_execution_id=EventField("name"),
+)
 
-session = boto3.Session()
-dynamodb = session.resource("dynamodb")
-table_name = os.getenv("BOOKING_TABLE_NAME", "undefined")
-table = dynamodb.Table(table_name)
+with cold_start.timed("boto3_session"):
+    session = boto3.Session()
+    dynamodb = session.resource("dynamodb")
 
-_cold_start = True
+table_name = os.getenv("BOOKING_TABLE_NAME", "undefined")
+with cold_start.timed("dynamodb_table"):
+    table = dynamodb.Table(table_name)
 
 
 class BookingReservationException(Exception):
@@ -36,30 +55,23 @@ class BookingReservationException(Exception):
         self.details = details or {}
 
 
-def is_booking_request_valid(booking):
-    return all(x in booking for x in ["outboundFlightId", "customerId", "chargeId"])
-
-
 @tracer.capture_method
 def reserve_booking(booking):
     """Creates a new booking as UNCONFIRMED
 
     Parameters
     ----------
-    booking: dict
-        chargeId: string
-            pre-authorization charge ID
-
-        stateExecutionId: string
+    booking: ReserveBookingEvent
+        state_machine_execution_id: string
             Step Functions Process Booking Execution ID
 
-        chargeId: string
+        charge_id: string
             Pre-authorization payment token
 
-        customer: string
+        customer_id: string
             Customer unique identifier
 
-        bookingOutboundFlightId: string
+        outbound_flight_id: string
             Outbound flight unique identifier
 
     Returns
@@ -69,10 +81,10 @@ def reserve_booking(booking):
     """
     try:
         booking_id = str(uuid.uuid4())
-        state_machine_execution_id = booking["name"]
-        outbound_flight_id = booking["outboundFlightId"]
-        customer_id = booking["customerId"]
-        payment_token = booking["chargeId"]
+        state_machine_execution_id = booking.state_machine_execution_id
+        outbound_flight_id = booking.outbound_flight_id
+        customer_id = booking.customer_id
+        payment_token = booking.charge_id
 
         booking_item = {
             "id": booking_id,
@@ -87,7 +99,12 @@ def reserve_booking(booking):
         }
 
         logger.debug(
-            {"operation": "reserve_booking", "details": {"outbound_flight_id": outbound_flight_id}}
+            LazyMessage(
+                lambda: {
+                    "operation": "reserve_booking",
+                    "details": {"outbound_flight_id": outbound_flight_id},
+                }
+            )
         )
         ret = table.put_item(Item=booking_item)
 
@@ -101,6 +118,7 @@ def reserve_booking(booking):
         raise BookingReservationException(details=err)
 
 
+@metrics.log_metrics
 @tracer.capture_lambda_handler(process_booking_sfn=True)
 @logger_inject_process_booking_sfn
 def lambda_handler(event, context):
@@ -140,36 +158,25 @@ def lambda_handler(event, context):
     BookingReservationException
         Booking Reservation Exception including error message upon failure
     """
-    global _cold_start
-    if _cold_start:
-        log_metric(
-            name="ColdStart", unit=MetricUnit.Count, value=1, function_name=context.function_name
-        )
-        _cold_start = False
-
-    if not is_booking_request_valid(event):
-        log_metric(
-            name="InvalidBookingRequest",
-            unit=MetricUnit.Count,
-            value=1,
-            operation="reserve_booking",
-        )
-        logger.error({"operation": "invalid_event", "details": event})
-        raise ValueError("Invalid booking request")
+    try:
+        booking = reserve_booking_event.validate(event)
+    except EventValidationError as err:
+        invalid_booking_request_metric.emit(1, operation="reserve_booking")
+        logger.error({"operation": "invalid_event", "details": event, "errors": err.errors})
+        raise
 
     try:
-        logger.debug(f"Reserving booking for customer {event['customerId']}")
-        ret = reserve_booking(event)
+        logger.debug("Reserving booking for customer %s", booking.customer_id)
+        ret = reserve_booking(booking)
 
-        log_metric(name="SuccessfulReservation", unit=MetricUnit.Count, value=1)
+        successful_reservation_metric.emit(1)
         logger.debug("Adding Booking Reservation annotation")
-        tracer.put_annotation("Booking", ret["bookingId"])
-        tracer.put_annotation("BookingStatus", "RESERVED")
+        tracer.put_annotations({"Booking": ret["bookingId"], "BookingStatus": "RESERVED"})
 
         # Step Functions use the return to append `bookingId` key into the overall output
         return ret["bookingId"]
     except BookingReservationException as err:
-        log_metric(name="FailedReservation", unit=MetricUnit.Count, value=1)
+        failed_reservation_metric.emit(1)
         logger.debug("Adding Booking Reservation annotation before raising error")
         tracer.put_annotation("BookingStatus", "ERROR")
         logger.error({"operation": "reserve_booking", "details": err})
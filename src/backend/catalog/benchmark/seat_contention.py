@@ -0,0 +1,144 @@
+"""Contention benchmark of seat reservations, on a single flight item or sharded inventory
+
+Many processes, each standing for a Lambda container, reserve one seat at a time on the same
+flight until it's fully booked, first against the flight item, then against its sharded
+inventory. It runs against DynamoDB Local, or any DynamoDB endpoint, with tables created
+and deleted by the benchmark.
+
+    docker run -p 8000:8000 amazon/dynamodb-local
+    python benchmark/seat_contention.py --endpoint-url http://localhost:8000 --workers 32
+"""
+
+import argparse
+import multiprocessing
+import os
+import statistics
+import sys
+import time
+import uuid
+
+import boto3
+
+RESERVE_FLIGHT_SRC = os.path.join(os.path.dirname(__file__), '..', 'src', 'reserve-flight')
+
+
+def create_tables(dynamodb, prefix):
+    flight_table = dynamodb.create_table(
+        TableName=f'{prefix}-Flight',
+        KeySchema=[{'AttributeName': 'id', 'KeyType': 'HASH'}],
+        AttributeDefinitions=[{'AttributeName': 'id', 'AttributeType': 'S'}],
+        BillingMode='PAY_PER_REQUEST',
+    )
+    inventory_table = dynamodb.create_table(
+        TableName=f'{prefix}-SeatInventory',
+        KeySchema=[
+            {'AttributeName': 'flightId', 'KeyType': 'HASH'},
+            {'AttributeName': 'shard', 'KeyType': 'RANGE'},
+        ],
+        AttributeDefinitions=[
+            {'AttributeName': 'flightId', 'AttributeType': 'S'},
+            {'AttributeName': 'shard', 'AttributeType': 'N'},
+        ],
+        BillingMode='PAY_PER_REQUEST',
+    )
+    flight_table.wait_until_exists()
+    inventory_table.wait_until_exists()
+
+    return flight_table, inventory_table
+
+
+def reserve_until_fully_booked(flight_id):
+    """Reserves seats one at a time until flight is fully booked, like a Lambda container would
+
+    Returns
+    -------
+    tuple
+        Latency of each seat reserved, in seconds, and number of attempts cancelled
+        for any reason other than the flight being fully booked
+    """
+    import reserve
+
+    latencies = []
+    cancelled = 0
+    while True:
+        start = time.perf_counter()
+        try:
+            reserve.reserve_seat_on_flight(flight_id)
+            latencies.append(time.perf_counter() - start)
+        except reserve.FlightFullyBookedException:
+            return latencies, cancelled
+        except reserve.FlightReservationException:
+            cancelled += 1
+
+
+def run(mode, flight_id, workers, environment):
+    os.environ.update(environment)
+    context = multiprocessing.get_context('spawn')
+    start = time.perf_counter()
+    with context.Pool(workers) as pool:
+        results = pool.map(reserve_until_fully_booked, [flight_id] * workers)
+    elapsed = time.perf_counter() - start
+
+    latencies = sorted(latency for worker_latencies, _ in results for latency in worker_latencies)
+    cancelled = sum(worker_cancelled for _, worker_cancelled in results)
+    reserved = len(latencies)
+
+    print(
+        f'{mode:<16} {reserved:>6} seats in {elapsed:6.2f}s ({reserved / elapsed:7.1f}/s), '
+        f'latency p50 {statistics.median(latencies) * 1000:6.1f}ms '
+        f'p99 {latencies[int(reserved * 0.99) - 1] * 1000:6.1f}ms, '
+        f'{cancelled} attempts cancelled'
+    )
+
+    return reserved
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--endpoint-url', default='http://localhost:8000')
+    parser.add_argument('--seats', type=int, default=500)
+    parser.add_argument('--workers', type=int, default=16)
+    parser.add_argument('--shards', type=int, default=10)
+    args = parser.parse_args()
+
+    # DynamoDB Local accepts any credentials and region
+    os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+    os.environ.setdefault('AWS_ACCESS_KEY_ID', 'local')
+    os.environ.setdefault('AWS_SECRET_ACCESS_KEY', 'local')
+    # Workers are spawned with the same import path
+    sys.path.insert(0, os.path.abspath(RESERVE_FLIGHT_SRC))
+
+    dynamodb = boto3.Session().resource('dynamodb', endpoint_url=args.endpoint_url)
+    flight_table, inventory_table = create_tables(dynamodb, f'SeatContention-{uuid.uuid4().hex}')
+    environment = {
+        'DYNAMODB_ENDPOINT_URL': args.endpoint_url,
+        'FLIGHT_TABLE_NAME': flight_table.name,
+        'SEAT_INVENTORY_SHARDS': str(args.shards),
+    }
+
+    print(f'{args.workers} workers reserving {args.seats} seats, {args.shards} shards')
+    try:
+        flight_table.put_item(
+            Item={'id': 'single', 'seatCapacity': args.seats, 'maximumSeating': args.seats}
+        )
+        reserved = run('single item', 'single', args.workers, environment)
+        assert reserved == args.seats, f'{reserved} seats reserved out of {args.seats}'
+
+        environment['SEAT_INVENTORY_TABLE_NAME'] = inventory_table.name
+        os.environ.update(environment)
+        import reserve
+
+        flight_table.put_item(
+            Item={'id': 'sharded', 'seatCapacity': args.seats, 'maximumSeating': args.seats}
+        )
+        reserve.shard_flight_inventory('sharded')
+        reserved = run('sharded', 'sharded', args.workers, environment)
+        assert reserved == args.seats, f'{reserved} seats reserved out of {args.seats}'
+        assert reserve.get_flight_availability('sharded')['seatCapacity'] == 0
+    finally:
+        flight_table.delete()
+        inventory_table.delete()
+
+
+if __name__ == '__main__':
+    main()
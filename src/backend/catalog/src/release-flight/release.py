@@ -1,13 +1,49 @@
 import json
 import os
+import random
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 
 import boto3
+from boto3.dynamodb.types import TypeDeserializer
 from botocore.exceptions import ClientError
 
 session = boto3.Session()
-dynamodb = session.resource('dynamodb')
+dynamodb = session.resource('dynamodb', endpoint_url=os.getenv('DYNAMODB_ENDPOINT_URL'))
 table = dynamodb.Table(os.environ['FLIGHT_TABLE_NAME'])
 
+# Sharded inventory splits seats of a flight across shard items keyed by flightId and shard,
+# as reserved by the reserve flight function
+inventory_table_name = os.getenv('SEAT_INVENTORY_TABLE_NAME')
+inventory_table = dynamodb.Table(inventory_table_name) if inventory_table_name else None
+
+# Shards of flights this container found sharded, as marked on their item when sharded,
+# which never goes stale as flights are sharded once and for all
+flight_shards = {}
+
+# Flights released at once by a bulk release, each on its own thread
+MAX_RELEASE_WORKERS = int(os.getenv('MAX_RELEASE_WORKERS', '8'))
+
+# Attempts at releasing seats on a flight whose seats keep changing while being released
+MAX_RELEASE_ATTEMPTS = 5
+
+# Transaction cancellation reasons worth trying again, as Reserve Flight does
+RETRYABLE_REASONS = {'TransactionConflict', 'ThrottlingError', 'ProvisionedThroughputExceeded'}
+
+# Seat holds created by Reserve Flight, swept once expired to reclaim their seats
+seat_hold_table_name = os.getenv('SEAT_HOLD_TABLE_NAME')
+seat_hold_table = dynamodb.Table(seat_hold_table_name) if seat_hold_table_name else None
+SEAT_HOLD_BUCKETS = int(os.getenv('SEAT_HOLD_BUCKETS', '4'))
+
+# Sparse index of holds still held, by bucket and expiry, as heldBucket is removed once they aren't
+SEAT_HOLD_EXPIRY_INDEX = 'ByHoldExpiry'
+
+# DynamoDB transactions can't update more items than this at once
+MAX_TRANSACTION_ITEMS = 25
+
+deserializer = TypeDeserializer()
+
 
 class FlightReservationException(Exception):
     pass
@@ -22,24 +58,100 @@ class FlightDoesNotExistException(FlightReservationException):
 
 
 def reserve_seat_on_flight(flight_id):
+    if inventory_table is not None:
+        return release_seat_on_shards(flight_id)
+
+    return release_seat_on_flight_item(flight_id)
+
+
+def release_seat_on_shards(flight_id):
+    """Releases a seat on a shard of a flight, picked at random among those not at their maximum
+
+    A flight not known to be sharded is released on its own item, which frees no seat once
+    marked sharded, but tells how many shards the flight has. Shards are tried in random order,
+    spilling over to the next one when a shard has all its seats already.
+
+    Parameters
+    ----------
+    flight_id: string
+        Flight ID
+
+    Returns
+    -------
+    dict
+        status: string
+            SUCCESS once a seat has been released
+
+    Raises
+    ------
+    FlightReservationException
+        When every shard has all its seats already, or the update fails for any other reason
+    """
+    shards = flight_shards.get(flight_id)
+    if shards is None:
+        try:
+            return release_seat_on_flight_item(flight_id)
+        except FlightReservationException:
+            shards = flight_shards.get(flight_id)
+            if shards is None:
+                raise
+
+    for shard in random.sample(range(shards), shards):
+        try:
+            inventory_table.update_item(
+                Key={'flightId': flight_id, 'shard': shard},
+                ConditionExpression='seatCapacity < maximumSeating',
+                UpdateExpression='SET seatCapacity = seatCapacity + :inc',
+                ExpressionAttributeValues={':inc': 1},
+                ReturnValuesOnConditionCheckFailure='ALL_OLD',
+            )
+
+            return {
+                'status': 'SUCCESS'
+            }
+        except dynamodb.meta.client.exceptions.ConditionalCheckFailedException as e:
+            # Failed condition returns the shard as it was, unless it doesn't exist
+            if 'Item' not in e.response:
+                raise FlightReservationException(
+                    f'Shard {shard} of flight with ID: {flight_id} does not exist.'
+                )
+        except ClientError as e:
+            raise FlightReservationException(e.response['Error']['Message'])
+
+    raise FlightReservationException(f'Flight with ID: {flight_id} has no seat to release.')
+
+
+def release_seat_on_flight_item(flight_id):
     try:
         # TODO: This needs to find the max. In theory, we should never have a situation
         #       where we're trying to increment the seat when one hasn't been
         #       decremented, but just to be sure.
         table.update_item(
             Key={"id": flight_id},
-            ConditionExpression="id = :idVal AND seatCapacity < maximumSeating",
+            # Seats of a sharded flight are on its shards, its item no longer has any to free
+            ConditionExpression=(
+                "id = :idVal AND attribute_not_exists(#shards) AND seatCapacity < maximumSeating"
+            ),
             UpdateExpression="SET seatCapacity = seatCapacity + :dec",
+            ExpressionAttributeNames={"#shards": "shards"},
             ExpressionAttributeValues={
                 ":idVal": flight_id,
                 ":dec": 1
             },
+            ReturnValuesOnConditionCheckFailure="ALL_OLD",
         )
 
         return {
             'status': 'SUCCESS'
         }
     except dynamodb.meta.client.exceptions.ConditionalCheckFailedException as e:
+        if 'shards' in e.response.get('Item', {}):
+            if inventory_table is not None:
+                # Error responses aren't deserialized, so item is as DynamoDB returns it
+                flight_shards[flight_id] = int(e.response['Item']['shards']['N'])
+
+            raise FlightReservationException(f"Flight with ID: {flight_id} is sharded.")
+
         # Due to no specificity from the DDB error, this could also mean the flight
         # doesn't exist, but we should've caught that earlier in the flow.
         # TODO: Fix that. Could either use TransactGetItems, or Get then Update.
@@ -48,7 +160,452 @@ def reserve_seat_on_flight(flight_id):
         raise FlightReservationException(e.response['Error']['Message'])
 
 
+def coalesce_flights(flights):
+    """Adds up seats to release per flight, so each flight is updated once
+
+    Parameters
+    ----------
+    flights: list
+        (flight_id, seats) pairs, e.g. one per cancelled booking
+
+    Returns
+    -------
+    OrderedDict
+        Seats to release by flight ID, in the order flights were first requested
+    """
+    seats_by_flight = OrderedDict()
+    for flight_id, seats in flights:
+        if not flight_id or not isinstance(seats, int) or seats < 1:
+            raise ValueError(f'Invalid arguments - flight {flight_id} with {seats} seats')
+
+        seats_by_flight[flight_id] = seats_by_flight.get(flight_id, 0) + seats
+
+    if not seats_by_flight:
+        raise ValueError('Invalid arguments - no flight to release')
+
+    return seats_by_flight
+
+
+def release_seats_on_flights(flights):
+    """Releases seats on many flights at once, e.g. for bookings cancelled on a disrupted flight
+
+    Seats are added up per flight, and each flight gets a single update capped at its
+    maximumSeating instead of one conditional write per seat. Flights are released in parallel,
+    up to MAX_RELEASE_WORKERS at a time, and independently: one failing doesn't stop the others.
+
+    Parameters
+    ----------
+    flights: list
+        (flight_id, seats) pairs
+
+    Returns
+    -------
+    list
+        Result of each flight, in the order flights were first requested
+
+        flightId: string
+        seats: int
+            Seats requested to be released
+        released: int
+            Seats released, fewer than requested when flight reached its maximumSeating
+        status: string
+            SUCCESS, CAPPED when fewer seats were released than requested,
+            DOES_NOT_EXIST or FAILED, with error describing why
+    """
+    seats_by_flight = coalesce_flights(flights)
+    workers = min(MAX_RELEASE_WORKERS, len(seats_by_flight))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(
+            executor.map(release_seats_on_flight, seats_by_flight.keys(), seats_by_flight.values())
+        )
+
+
+def release_seats_on_flight(flight_id, seats):
+    """Releases seats on a flight, or its shards, never going above its maximumSeating"""
+    result = {'flightId': flight_id, 'seats': seats, 'released': 0}
+    try:
+        released = add_seats_to_shards(flight_id, seats) if inventory_table is not None else None
+        if released is None:
+            released = add_seats_to_flight_item(flight_id, seats)
+    except FlightDoesNotExistException:
+        return {**result, 'status': 'DOES_NOT_EXIST'}
+    except FlightReservationException as e:
+        return {**result, 'status': 'FAILED', 'error': str(e)}
+
+    return {**result, 'released': released, 'status': 'SUCCESS' if released == seats else 'CAPPED'}
+
+
+def add_seats_to_flight_item(flight_id, seats):
+    """Adds seats to a flight in a single update, capped at its maximumSeating
+
+    Seats are read first, then set to their capped sum provided they didn't change meanwhile.
+    When they did, the failed condition returns them as they are now, to try again from.
+    A flight item marked sharded is left alone, as its seats are on its shards.
+
+    Returns
+    -------
+    int
+        Seats released
+    """
+    # Clients are thread safe, unlike resources, and this runs on many threads
+    client = dynamodb.meta.client
+    try:
+        flight = client.get_item(
+            TableName=table.name,
+            Key={'id': flight_id},
+            ProjectionExpression='seatCapacity, maximumSeating, #shards',
+            ExpressionAttributeNames={'#shards': 'shards'},
+            ConsistentRead=True,
+        ).get('Item')
+
+        for _ in range(MAX_RELEASE_ATTEMPTS):
+            if not flight:
+                raise FlightDoesNotExistException(f'Flight with ID: {flight_id} does not exist.')
+
+            if 'shards' in flight:
+                raise FlightReservationException(f'Flight with ID: {flight_id} is sharded.')
+
+            current, maximum = int(flight['seatCapacity']), int(flight['maximumSeating'])
+            capped = max(min(current + seats, maximum), current)
+            if capped == current:
+                return 0
+
+            try:
+                client.update_item(
+                    TableName=table.name,
+                    Key={'id': flight_id},
+                    ConditionExpression=(
+                        'attribute_not_exists(#shards) '
+                        'AND seatCapacity = :current AND maximumSeating = :maximum'
+                    ),
+                    UpdateExpression='SET seatCapacity = :seats',
+                    ExpressionAttributeNames={'#shards': 'shards'},
+                    ExpressionAttributeValues={
+                        ':current': current,
+                        ':maximum': maximum,
+                        ':seats': capped,
+                    },
+                    ReturnValuesOnConditionCheckFailure='ALL_OLD',
+                )
+                return capped - current
+            except client.exceptions.ConditionalCheckFailedException as e:
+                # Error responses aren't deserialized like results, so do it here
+                flight = {
+                    name: deserializer.deserialize(value)
+                    for name, value in e.response.get('Item', {}).items()
+                }
+    except ClientError as e:
+        raise FlightReservationException(e.response['Error']['Message'])
+
+    raise FlightReservationException(f'Flight with ID: {flight_id} kept changing while releasing.')
+
+
+def plan_shard_releases(client, flight_id, seats):
+    """Reads shards of a flight and builds updates adding seats to them, capped at their maximum
+
+    Seats go to shards picked at random, each up to its maximumSeating, and each update
+    requires its shard not to have changed since read.
+
+    Returns
+    -------
+    tuple
+        Shard updates and seats they release, or None when inventory of the flight isn't sharded
+    """
+    shards = client.query(
+        TableName=inventory_table.name,
+        KeyConditionExpression='flightId = :flightId',
+        # shard is a DynamoDB reserved word
+        ProjectionExpression='#shard, seatCapacity, maximumSeating',
+        ExpressionAttributeNames={'#shard': 'shard'},
+        ExpressionAttributeValues={':flightId': flight_id},
+        ConsistentRead=True,
+    )['Items']
+    if not shards:
+        return None
+
+    updates = []
+    released = 0
+    for shard in random.sample(shards, len(shards)):
+        current = int(shard['seatCapacity'])
+        added = min(seats - released, int(shard['maximumSeating']) - current)
+        if added <= 0:
+            continue
+
+        updates.append(
+            {
+                'Update': {
+                    'TableName': inventory_table.name,
+                    'Key': {'flightId': flight_id, 'shard': shard['shard']},
+                    'ConditionExpression': 'seatCapacity = :current',
+                    'UpdateExpression': 'SET seatCapacity = :seats',
+                    'ExpressionAttributeValues': {
+                        ':current': current,
+                        ':seats': current + added,
+                    },
+                }
+            }
+        )
+        released += added
+
+    return updates, released
+
+
+def add_seats_to_shards(flight_id, seats):
+    """Adds seats to shards of a flight in a single transaction, capped at their maximumSeating
+
+    Shards are set to their new seats provided they didn't change since read, otherwise
+    they're read and tried again, see `plan_shard_releases`.
+
+    Returns
+    -------
+    int
+        Seats released, or None when inventory of the flight isn't sharded
+    """
+    client = dynamodb.meta.client
+    try:
+        for _ in range(MAX_RELEASE_ATTEMPTS):
+            releases = plan_shard_releases(client, flight_id, seats)
+            if releases is None:
+                return None
+
+            transaction, released = releases
+            if not transaction:
+                return 0
+
+            try:
+                client.transact_write_items(TransactItems=transaction)
+                return released
+            except client.exceptions.TransactionCanceledException:
+                # Shards changed since read
+                continue
+    except ClientError as e:
+        raise FlightReservationException(e.response['Error']['Message'])
+
+    raise FlightReservationException(f'Flight with ID: {flight_id} kept changing while releasing.')
+
+
+def sweep_expired_seat_holds(now=None):
+    """Reclaims seats of holds that expired before being confirmed
+
+    Expired holds are queried from the sparse index of holds still held, so a sweep costs
+    as much as there are holds to reclaim rather than scanning every hold ever created.
+    Holds are marked expired and their seats given back to the very flight or shard items they
+    were taken from in transactions, all or nothing, adding up seats per item across holds.
+
+    Parameters
+    ----------
+    now: int, optional
+        Holds expiring up to then are reclaimed, in seconds since epoch, by default now
+
+    Returns
+    -------
+    dict
+        holds: int
+            Holds reclaimed
+        seats: int
+            Seats given back
+        failed: int
+            Holds that couldn't be reclaimed, left for the next sweep
+    """
+    if seat_hold_table is None:
+        raise FlightReservationException('Seat holds are not enabled.')
+
+    now = now or int(time.time())
+    client = dynamodb.meta.client
+    holds = []
+    try:
+        for bucket in range(SEAT_HOLD_BUCKETS):
+            pages = client.get_paginator('query').paginate(
+                TableName=seat_hold_table.name,
+                IndexName=SEAT_HOLD_EXPIRY_INDEX,
+                KeyConditionExpression='heldBucket = :bucket AND expiresAt <= :now',
+                ExpressionAttributeValues={':bucket': bucket, ':now': now},
+            )
+            for page in pages:
+                holds.extend(page['Items'])
+    except ClientError as e:
+        raise FlightReservationException(e.response['Error']['Message'])
+
+    result = {'holds': 0, 'seats': 0, 'failed': 0}
+    for batch in batch_seat_holds(holds):
+        try:
+            reclaimed, seats = reclaim_seat_holds(batch, now)
+            result['holds'] += reclaimed
+            result['seats'] += seats
+        except FlightReservationException:
+            result['failed'] += len(batch)
+
+    return result
+
+
+def count_hold_items(holds):
+    """Counts items a transaction reclaiming holds writes, each hold and each seat item once"""
+    seat_items = {
+        (allocation['flightId'], allocation.get('shard'))
+        for hold in holds
+        for allocation in hold['allocations']
+    }
+    return len(holds) + len(seat_items)
+
+
+def batch_seat_holds(holds):
+    """Groups holds into batches reclaimed in a single transaction each"""
+    batch = []
+    for hold in holds:
+        if batch and count_hold_items(batch + [hold]) > MAX_TRANSACTION_ITEMS:
+            yield batch
+            batch = []
+
+        batch.append(hold)
+
+    if batch:
+        yield batch
+
+
+def reclaim_seat_holds(holds, now):
+    """Marks holds expired and gives their seats back in a single transaction
+
+    The index is eventually consistent, so holds may have been confirmed or reclaimed since
+    queried. Those fail their condition, and the transaction is tried again without them.
+    Seats taken from a flight item that has been sharded since are given back to its shards,
+    capped at their maximum, as the flight item no longer takes any.
+
+    Returns
+    -------
+    tuple
+        Holds reclaimed, and seats given back
+
+    Raises
+    ------
+    FlightReservationException
+        When seats can't be given back to an item, e.g. as it doesn't exist anymore,
+        holds being left for the next sweep
+    """
+    client = dynamodb.meta.client
+    sharded_flights = set()
+    for _ in range(MAX_RELEASE_ATTEMPTS):
+        if not holds:
+            return 0, 0
+
+        seats_by_item = OrderedDict()
+        for hold in holds:
+            for allocation in hold['allocations']:
+                flight_id = allocation['flightId']
+                # Seats of a flight sharded since held are spread across its shards anew
+                shard = None if flight_id in sharded_flights else allocation.get('shard')
+                item = (flight_id, shard)
+                seats_by_item[item] = seats_by_item.get(item, 0) + int(allocation['seats'])
+
+        transaction = [
+            {
+                'Update': {
+                    'TableName': seat_hold_table.name,
+                    'Key': {'id': hold['id']},
+                    'ConditionExpression': '#status = :held AND expiresAt <= :now',
+                    'UpdateExpression': 'SET #status = :expired REMOVE heldBucket',
+                    'ExpressionAttributeNames': {'#status': 'status'},
+                    'ExpressionAttributeValues': {
+                        ':held': 'HELD',
+                        ':expired': 'EXPIRED',
+                        ':now': now,
+                    },
+                }
+            }
+            for hold in holds
+        ]
+        # Seat items updated after holds, in transaction order
+        seat_items = []
+        seats_given = 0
+        try:
+            for (flight_id, shard), seats in seats_by_item.items():
+                if flight_id in sharded_flights:
+                    releases = plan_shard_releases(client, flight_id, seats)
+                    if releases is None:
+                        raise FlightReservationException(
+                            f'Flight with ID: {flight_id} is sharded, but has no shard.'
+                        )
+
+                    updates, released = releases
+                    transaction.extend(updates)
+                    seat_items.extend((flight_id, shard) for _ in updates)
+                    seats_given += released
+                    continue
+
+                # Seats go back where they were taken from, which had them, so no cap is needed
+                if shard is None:
+                    update = {
+                        'TableName': table.name,
+                        'Key': {'id': flight_id},
+                        'ConditionExpression': (
+                            'attribute_exists(id) AND attribute_not_exists(#shards)'
+                        ),
+                        'ExpressionAttributeNames': {'#shards': 'shards'},
+                        'ReturnValuesOnConditionCheckFailure': 'ALL_OLD',
+                    }
+                else:
+                    update = {
+                        'TableName': inventory_table.name,
+                        'Key': {'flightId': flight_id, 'shard': shard},
+                        'ConditionExpression': 'attribute_exists(flightId)',
+                    }
+
+                update['UpdateExpression'] = 'SET seatCapacity = seatCapacity + :seats'
+                update['ExpressionAttributeValues'] = {':seats': seats}
+                transaction.append({'Update': update})
+                seat_items.append((flight_id, shard))
+                seats_given += seats
+
+            client.transact_write_items(TransactItems=transaction)
+            return len(holds), seats_given
+        except client.exceptions.TransactionCanceledException as e:
+            # Reasons are in transaction order, holds first
+            reasons = e.response.get('CancellationReasons', [])
+            held = len(holds)
+            stale = {
+                index
+                for index, reason in enumerate(reasons[:held])
+                if reason.get('Code') == 'ConditionalCheckFailed'
+            }
+            failures = []
+            for (flight_id, shard), reason in zip(seat_items, reasons[held:]):
+                code = reason.get('Code', 'None')
+                if code == 'None' or code in RETRYABLE_REASONS:
+                    continue
+
+                if code == 'ConditionalCheckFailed' and flight_id in sharded_flights:
+                    # Shards changed since read
+                    continue
+
+                if (
+                    code == 'ConditionalCheckFailed'
+                    and shard is None
+                    and 'shards' in reason.get('Item', {})
+                    and inventory_table is not None
+                ):
+                    sharded_flights.add(flight_id)
+                    continue
+
+                failures.append(f'Flight with ID: {flight_id} can\'t get seats back ({code})')
+
+            if failures:
+                raise FlightReservationException(', '.join(failures))
+
+            holds = [hold for index, hold in enumerate(holds) if index not in stale]
+        except ClientError as e:
+            raise FlightReservationException(e.response['Error']['Message'])
+
+    raise FlightReservationException('Seat holds kept changing while being reclaimed.')
+
+
+def sweep_handler(event, context):
+    return json.dumps(sweep_expired_seat_holds())
+
+
 def lambda_handler(event, context):
+    if 'flights' in event:
+        flights = [(flight.get('flightId'), flight.get('seats', 1)) for flight in event['flights']]
+        return json.dumps({'flights': release_seats_on_flights(flights)})
+
     if 'outboundFlightId' not in event:
         raise ValueError('Invalid arguments')
 
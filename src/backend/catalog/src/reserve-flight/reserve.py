@@ -1,16 +1,61 @@
 import json
 import os
+import random
+import time
+from collections import OrderedDict
 
 import boto3
+from boto3.dynamodb.conditions import Key
+from boto3.dynamodb.types import TypeDeserializer
 from botocore.exceptions import ClientError
 
 session = boto3.Session()
-dynamodb = session.resource('dynamodb')
+dynamodb = session.resource('dynamodb', endpoint_url=os.getenv('DYNAMODB_ENDPOINT_URL'))
 table = dynamodb.Table(os.environ['FLIGHT_TABLE_NAME'])
 
+# Sharded inventory splits seats of a flight across shard items keyed by flightId and shard,
+# so concurrent reservations on a popular flight don't all contend on the same item
+inventory_table_name = os.getenv('SEAT_INVENTORY_TABLE_NAME')
+inventory_table = dynamodb.Table(inventory_table_name) if inventory_table_name else None
+INVENTORY_SHARDS = int(os.getenv('SEAT_INVENTORY_SHARDS', '10'))
+
+# Shards of flights this container found sharded, as marked on their item when sharded.
+# Flights are sharded once and for all, so entries never go stale, and flights not in here
+# are reserved on their item, whose failed condition tells when they were sharded meanwhile
+flight_shards = {}
+
+# DynamoDB transactions can't update more items than this at once
+MAX_TRANSACTION_FLIGHTS = 25
+
+# Transaction cancellation reasons worth another attempt, as no condition failed
+RETRYABLE_REASONS = {'TransactionConflict', 'ThrottlingError', 'ProvisionedThroughputExceeded'}
+
+# Flights found sold out by this container, with when that stops being trusted, so reservations
+# on them are rejected without a write bound to fail its condition. Release Flight runs in its
+# own containers, so seats it frees are only seen here once entries expire
+SOLD_OUT_TTL_SECONDS = float(os.getenv('SOLD_OUT_TTL_SECONDS', '5'))
+sold_out_flights = {}
+
+# Seat holds keep seats for a while only, until confirmed as a sale or reclaimed by Release Flight
+# sweeper once expired, so seats of bookings abandoned partway aren't kept forever
+seat_hold_table_name = os.getenv('SEAT_HOLD_TABLE_NAME')
+seat_hold_table = dynamodb.Table(seat_hold_table_name) if seat_hold_table_name else None
+SEAT_HOLD_SECONDS = int(os.getenv('SEAT_HOLD_SECONDS', '900'))
+
+# Holds still held are spread across this many partitions of the sparse index swept for expiry
+SEAT_HOLD_BUCKETS = int(os.getenv('SEAT_HOLD_BUCKETS', '4'))
+
+deserializer = TypeDeserializer()
+
 
 class FlightReservationException(Exception):
-    pass
+    def __init__(self, message, failures=None):
+        # Every argument is kept in args, so exceptions pickle and copy with their details
+        super(FlightReservationException, self).__init__(message, failures)
+        self.failures = failures or []
+
+    def __str__(self):
+        return str(self.args[0])
 
 
 class FlightFullyBookedException(FlightReservationException):
@@ -21,37 +66,867 @@ class FlightDoesNotExistException(FlightReservationException):
     pass
 
 
-def reserve_seat_on_flight(flight_id):
+class SeatHoldExpiredException(FlightReservationException):
+    pass
+
+
+class SeatHoldDoesNotExistException(FlightReservationException):
+    pass
+
+
+class SeatHoldExistsException(FlightReservationException):
+    """Raised when a hold with the same ID was created already, e.g. by an earlier attempt"""
+
+    def __init__(self, message, hold):
+        super(SeatHoldExistsException, self).__init__(message, hold)
+        # Hold is kept in args in place of failures, which an existing hold has none of
+        self.failures = []
+        self.hold = hold
+
+
+def is_sold_out(flight_id):
+    """Whether flight was found sold out by this container, within the last SOLD_OUT_TTL_SECONDS"""
+    expiry = sold_out_flights.get(flight_id)
+    if expiry is None:
+        return False
+
+    if expiry <= time.monotonic():
+        del sold_out_flights[flight_id]
+        return False
+
+    return True
+
+
+def remember_sold_out(flight_id, sold_out):
+    """Records whether flight is sold out as last seen, forgetting it when seats were found"""
+    if sold_out:
+        sold_out_flights[flight_id] = time.monotonic() + SOLD_OUT_TTL_SECONDS
+    else:
+        sold_out_flights.pop(flight_id, None)
+
+
+def coalesce_flights(flights):
+    """Adds up seats requested per flight, as a transaction can only update each item once
+
+    Parameters
+    ----------
+    flights: list
+        (flight_id, seats) pairs, e.g. one per leg of an itinerary
+
+    Returns
+    -------
+    OrderedDict
+        Seats requested by flight ID, in the order flights were first requested
+    """
+    seats_by_flight = OrderedDict()
+    for flight_id, seats in flights:
+        if not flight_id or not isinstance(seats, int) or seats < 1:
+            raise ValueError(f'Invalid arguments - flight {flight_id} with {seats} seats')
+
+        seats_by_flight[flight_id] = seats_by_flight.get(flight_id, 0) + seats
+
+    if not seats_by_flight or len(seats_by_flight) > MAX_TRANSACTION_FLIGHTS:
+        raise ValueError(
+            f'Invalid arguments - 1 to {MAX_TRANSACTION_FLIGHTS} flights can be reserved at once'
+        )
+
+    return seats_by_flight
+
+
+def reserve_seats_on_flights(flights, hold=None):
+    """Reserves seats on many flights at once, all or nothing, in a single DynamoDB transaction
+
+    When sharded inventory is enabled, seats are taken from shards of each flight instead,
+    see `reserve_seats_on_shards`. Flights this container found sold out recently are
+    rejected straight away.
+
+    Parameters
+    ----------
+    flights: list
+        (flight_id, seats) pairs, e.g. one per leg of a connecting itinerary
+    hold: dict, optional
+        Seat hold created in the same transaction, with items seats were taken from,
+        see `hold_seats_on_flights`
+
+    Returns
+    -------
+    dict
+        status: string
+            SUCCESS once seats have been reserved on every flight
+
+    Raises
+    ------
+    FlightFullyBookedException
+        When any flight doesn't have enough seats left, none of them are reserved
+    FlightDoesNotExistException
+        When any flight doesn't exist, none of them are reserved
+    FlightReservationException
+        When the transaction fails for any other reason
+
+        failures: list
+            flightId, seats and reason (FULLY_BOOKED, DOES_NOT_EXIST, SHARDED, MISSING_SHARD
+            or a DynamoDB reason code)
+            of each flight that couldn't be reserved
+    """
+    seats_by_flight = coalesce_flights(flights)
+    failures = [
+        {'flightId': flight_id, 'seats': seats, 'reason': 'FULLY_BOOKED'}
+        for flight_id, seats in seats_by_flight.items()
+        if is_sold_out(flight_id)
+    ]
+    if failures:
+        raise build_reservation_exception(failures)
+
+    if inventory_table is not None:
+        return reserve_seats_on_shards(seats_by_flight, hold=hold)
+
+    reasons = write_seat_updates(
+        [build_flight_update(flight_id, seats) for flight_id, seats in seats_by_flight.items()],
+        hold=build_hold_put(
+            hold,
+            [
+                {'flightId': flight_id, 'seats': seats}
+                for flight_id, seats in seats_by_flight.items()
+            ],
+        ),
+    )
+    if reasons:
+        failures = [
+            describe_failure(flight_id, seats, reason)
+            for (flight_id, seats), reason in zip(seats_by_flight.items(), reasons)
+            if reason.get('Code', 'None') != 'None'
+        ]
+        raise build_reservation_exception(failures)
+
+    return {
+        'status': 'SUCCESS'
+    }
+
+
+def build_flight_update(flight_id, seats):
+    """Builds a transaction update taking seats from a flight, if it has enough left
+    and its seats weren't moved to shards"""
+    return {
+        'TableName': table.name,
+        'Key': {'id': flight_id},
+        'ConditionExpression': (
+            'attribute_exists(id) AND attribute_not_exists(#shards) AND seatCapacity >= :seats'
+        ),
+        'UpdateExpression': 'SET seatCapacity = seatCapacity - :seats',
+        'ExpressionAttributeNames': {'#shards': 'shards'},
+        'ExpressionAttributeValues': {':seats': seats},
+        'ReturnValuesOnConditionCheckFailure': 'ALL_OLD',
+    }
+
+
+def build_shard_update(flight_id, shard, seats):
+    """Builds a transaction update taking seats from a shard of a flight, if it has enough left"""
+    return {
+        'TableName': inventory_table.name,
+        'Key': {'flightId': flight_id, 'shard': shard},
+        'ConditionExpression': 'attribute_exists(flightId) AND seatCapacity >= :seats',
+        'UpdateExpression': 'SET seatCapacity = seatCapacity - :seats',
+        'ExpressionAttributeValues': {':seats': seats},
+        'ReturnValuesOnConditionCheckFailure': 'ALL_OLD',
+    }
+
+
+def build_hold_put(hold, allocations):
+    """Builds a transaction put creating a seat hold, with items its seats were taken from
+
+    Parameters
+    ----------
+    hold: dict
+        Seat hold, or None when seats aren't held
+    allocations: list
+        flightId, seats and shard, if taken from a shard, of each item seats were taken from
+
+    Returns
+    -------
+    dict
+        Transaction Put item, or None when seats aren't held
+    """
+    if hold is None:
+        return None
+
+    return {
+        'TableName': seat_hold_table.name,
+        'Item': {**hold, 'allocations': allocations},
+        'ConditionExpression': 'attribute_not_exists(id)',
+        'ReturnValuesOnConditionCheckFailure': 'ALL_OLD',
+    }
+
+
+def write_seat_updates(updates, hold=None):
+    """Applies seat updates all or nothing in a single DynamoDB transaction
+
+    Parameters
+    ----------
+    updates: list
+        Transaction Update items
+    hold: dict, optional
+        Transaction Put item creating a seat hold along with seat updates
+
+    Returns
+    -------
+    list
+        Why each update was cancelled, in transaction order, or empty when all were applied.
+        Updates failing their condition come with the item as it was, if it exists,
+        which tells a full flight apart from a missing one without another round trip
+
+    Raises
+    ------
+    SeatHoldExistsException
+        When seat hold was created already, in which case no seat was taken again
+    """
+    transaction = [{'Update': update} for update in updates]
+    if hold is not None:
+        transaction.append({'Put': hold})
+
+    if len(transaction) > MAX_TRANSACTION_FLIGHTS:
+        raise FlightReservationException(
+            f'Seats are spread across more than {MAX_TRANSACTION_FLIGHTS} items'
+        )
+
     try:
-        table.update_item(
-            Key={"id": flight_id},
-            ConditionExpression="id = :idVal AND seatCapacity > zero",
-            UpdateExpression="SET seatCapacity = seatCapacity - :dec",
-            ExpressionAttributeValues={
-                ":idVal": flight_id,
-                ":dec": 1,
-                ":zero": 0
-            },
+        dynamodb.meta.client.transact_write_items(TransactItems=transaction)
+        return []
+    except dynamodb.meta.client.exceptions.TransactionCanceledException as e:
+        reasons = e.response.get('CancellationReasons') or [{'Code': 'TransactionCanceled'}]
+        if hold is not None and len(reasons) == len(transaction):
+            if reasons[-1].get('Code') == 'ConditionalCheckFailed':
+                # Error responses aren't deserialized like results, so do it here
+                existing = reasons[-1].get('Item', {})
+                raise SeatHoldExistsException(
+                    f"Seat hold with ID: {hold['Item']['id']} already exists.",
+                    hold={name: deserializer.deserialize(v) for name, v in existing.items()},
+                )
+
+        return reasons
+    except ClientError as e:
+        raise FlightReservationException(e.response['Error']['Message'])
+
+
+def describe_failure(flight_id, seats, reason):
+    """Describes why seats couldn't be reserved on a flight from its cancellation reason,
+    remembering flights found with no seat left"""
+    code = reason.get('Code', 'None')
+    if code == 'ConditionalCheckFailed':
+        if 'Item' not in reason:
+            code = 'DOES_NOT_EXIST'
+        elif 'shards' in reason['Item']:
+            # Seats were moved to shards, which sharded inventory being disabled can't reach
+            code = 'SHARDED'
+        else:
+            code = 'FULLY_BOOKED'
+            remember_sold_out(flight_id, reason['Item']['seatCapacity']['N'] == '0')
+
+    return {'flightId': flight_id, 'seats': seats, 'reason': code}
+
+
+def build_reservation_exception(failures):
+    """Builds the most specific exception explaining why flights couldn't be reserved"""
+    message = ', '.join(
+        f"Flight with ID: {failure['flightId']} can't reserve {failure['seats']} seats "
+        f"({failure['reason']})"
+        for failure in failures
+    )
+    reasons = {failure['reason'] for failure in failures}
+
+    if reasons == {'FULLY_BOOKED'}:
+        return FlightFullyBookedException(message, failures=failures)
+
+    if reasons == {'DOES_NOT_EXIST'}:
+        return FlightDoesNotExistException(message, failures=failures)
+
+    return FlightReservationException(message or 'Reservation was cancelled', failures=failures)
+
+
+class ShardAllocation:
+    """Plans which shards of a flight seats are taken from
+
+    A flight not known to be sharded is reserved on its own item. Sharding a flight marks
+    its item with how many shards it has and takes its seats away, so the item never takes
+    seats its shards have too, and its failed condition tells how many shards to use instead.
+    Shards are tried in random order, so concurrent reservations spread across them.
+    When a shard runs dry, seats it has left are learnt from its failed condition
+    and the rest spill over to the next shard.
+    """
+
+    def __init__(self, flight_id, seats):
+        self.flight_id = flight_id
+        self.seats = seats
+        self.shards = None
+        self.order = []
+        self.seats_left = {}
+        if flight_id in flight_shards:
+            self.use_shards(flight_shards[flight_id])
+
+    @property
+    def sharded(self):
+        return self.shards is not None
+
+    def use_shards(self, shards):
+        self.shards = shards
+        self.order = random.sample(range(shards), shards)
+
+    def plan(self):
+        """Returns seats to take by shard, where shard None is the flight item itself,
+        or None when shards known so far can't cover the seats requested"""
+        if not self.sharded:
+            return {None: self.seats}
+
+        plan = OrderedDict()
+        needed = self.seats
+        for shard in self.order:
+            available = min(self.seats_left.get(shard, needed), needed)
+            if available > 0:
+                plan[shard] = available
+                needed -= available
+
+            if not needed:
+                return plan
+
+        return None
+
+    def build_update(self, shard, seats):
+        if shard is None:
+            return build_flight_update(self.flight_id, seats)
+
+        return build_shard_update(self.flight_id, shard, seats)
+
+    def describe(self, shard, seats):
+        """Describes where seats are taken from, as recorded in seat holds"""
+        if shard is None:
+            return {'flightId': self.flight_id, 'seats': seats}
+
+        return {'flightId': self.flight_id, 'shard': shard, 'seats': seats}
+
+    def learn(self, shard, reason):
+        """Records what an item that failed its condition tells about the flight
+
+        Returns
+        -------
+        bool
+            Whether it's worth another attempt, i.e. the flight item was found sharded,
+            or a shard with fewer seats left than taken
+        """
+        # Error responses aren't deserialized like results, so item is as DynamoDB returns it
+        item = reason.get('Item')
+        if item is None:
+            return False
+
+        if shard is None:
+            if 'shards' not in item or inventory_table is None:
+                return False
+
+            flight_shards[self.flight_id] = int(item['shards']['N'])
+            self.use_shards(flight_shards[self.flight_id])
+            return True
+
+        self.seats_left[shard] = int(item['seatCapacity']['N'])
+        return True
+
+    @property
+    def sold_out(self):
+        """Whether every shard was found with no seat left while reserving"""
+        return (
+            self.sharded
+            and len(self.seats_left) == self.shards
+            and not any(self.seats_left.values())
         )
 
+    @property
+    def drained(self):
+        """Whether half of the shards or more were found too low while reserving"""
+        return self.sharded and len(self.seats_left) * 2 >= self.shards
+
+
+def reserve_seats_on_shards(seats_by_flight, hold=None):
+    """Reserves seats on many flights at once, all or nothing, taking them from shards
+
+    Each attempt takes seats from shards in a single DynamoDB transaction, or from the item
+    of flights not known to be sharded. Items failing their condition tell how many shards
+    the flight has, or how many seats a shard has left, so the next attempt spills over
+    to other shards, until seats are reserved or shards of a flight can't cover them.
+    Flights with many shards found dry are rebalanced afterwards.
+
+    Parameters
+    ----------
+    seats_by_flight: OrderedDict
+        Seats requested by flight ID
+    hold: dict, optional
+        Seat hold created in the same transaction, as `reserve_seats_on_flights`
+
+    Returns
+    -------
+    dict
+        status: string
+            SUCCESS once seats have been reserved on every flight
+
+    Raises
+    ------
+    FlightReservationException
+        As `reserve_seats_on_flights`
+    """
+    allocations = [
+        ShardAllocation(flight_id, seats) for flight_id, seats in seats_by_flight.items()
+    ]
+    failures = []
+    # One attempt finding a flight sharded, and one per shard found dry at most,
+    # as flights have fewer shards than a transaction can update
+    for _ in range(MAX_TRANSACTION_FLIGHTS + 1):
+        plans = [(allocation, allocation.plan()) for allocation in allocations]
+        for allocation, plan in plans:
+            if plan is None:
+                remember_sold_out(allocation.flight_id, allocation.sold_out)
+
+        failures = [
+            {'flightId': allocation.flight_id, 'seats': allocation.seats, 'reason': 'FULLY_BOOKED'}
+            for allocation, plan in plans
+            if plan is None
+        ]
+        if failures:
+            raise build_reservation_exception(failures)
+
+        updates = [
+            (allocation, shard, seats)
+            for allocation, plan in plans
+            for shard, seats in plan.items()
+        ]
+        reasons = write_seat_updates(
+            [allocation.build_update(shard, seats) for allocation, shard, seats in updates],
+            hold=build_hold_put(
+                hold,
+                [allocation.describe(shard, seats) for allocation, shard, seats in updates],
+            ),
+        )
+        if not reasons:
+            for allocation in allocations:
+                if allocation.drained:
+                    rebalance_quietly(allocation.flight_id)
+
+            return {
+                'status': 'SUCCESS'
+            }
+
+        failures = []
+        for (allocation, shard, _), reason in zip(updates, reasons):
+            code = reason.get('Code', 'None')
+            if code == 'None':
+                continue
+
+            if code == 'ConditionalCheckFailed' and allocation.learn(shard, reason):
+                continue
+
+            if code == 'ConditionalCheckFailed' and shard is not None:
+                # Flight is marked sharded, but this shard of it doesn't exist
+                failures.append(
+                    {
+                        'flightId': allocation.flight_id,
+                        'seats': allocation.seats,
+                        'reason': 'MISSING_SHARD',
+                    }
+                )
+            else:
+                failures.append(describe_failure(allocation.flight_id, allocation.seats, reason))
+
+        if any(failure['reason'] not in RETRYABLE_REASONS for failure in failures):
+            raise build_reservation_exception(failures)
+
+    raise build_reservation_exception(failures)
+
+
+def split_seats(seats, shards):
+    """Splits seats as evenly as possible across shards, lower shards taking the remainder"""
+    return [seats // shards + (1 if shard < seats % shards else 0) for shard in range(shards)]
+
+
+def query_flight_shards(flight_id):
+    """Reads every shard of a flight, strongly consistent
+
+    Returns
+    -------
+    list
+        shard, seatCapacity and maximumSeating of each shard, by shard,
+        or empty when inventory of the flight isn't sharded
+    """
+    try:
+        ret = inventory_table.query(
+            KeyConditionExpression=Key('flightId').eq(flight_id),
+            # shard is a DynamoDB reserved word
+            ProjectionExpression='#shard, seatCapacity, maximumSeating',
+            ExpressionAttributeNames={'#shard': 'shard'},
+            ConsistentRead=True,
+        )
+    except ClientError as e:
+        raise FlightReservationException(e.response['Error']['Message'])
+
+    return [
+        {
+            'shard': int(item['shard']),
+            'seatCapacity': int(item['seatCapacity']),
+            'maximumSeating': int(item['maximumSeating']),
+        }
+        for item in ret['Items']
+    ]
+
+
+def get_flight_availability(flight_id):
+    """Reads seats left on a flight, adding up its shards when its inventory is sharded
+
+    Flights read sold out are remembered as such by this container, and forgotten otherwise.
+
+    Parameters
+    ----------
+    flight_id: string
+        Flight ID
+
+    Returns
+    -------
+    dict
+        seatCapacity: int
+            Seats left
+        maximumSeating: int
+            Seats on the flight
+        shards: list
+            Seats left and maximum of each shard, empty when inventory isn't sharded
+
+    Raises
+    ------
+    FlightDoesNotExistException
+        When flight doesn't exist
+    """
+    shards = query_flight_shards(flight_id) if inventory_table is not None else []
+    if shards:
+        flight_shards[flight_id] = len(shards)
+        seats = sum(shard['seatCapacity'] for shard in shards)
+        remember_sold_out(flight_id, not seats)
         return {
-            'status': 'SUCCESS'
+            'seatCapacity': seats,
+            'maximumSeating': sum(shard['maximumSeating'] for shard in shards),
+            'shards': shards,
+        }
+
+    try:
+        flight = table.get_item(
+            Key={'id': flight_id},
+            ProjectionExpression='seatCapacity, maximumSeating',
+            ConsistentRead=True,
+        ).get('Item')
+    except ClientError as e:
+        raise FlightReservationException(e.response['Error']['Message'])
+
+    if not flight:
+        raise FlightDoesNotExistException(f'Flight with ID: {flight_id} does not exist.')
+
+    remember_sold_out(flight_id, not flight['seatCapacity'])
+    return {
+        'seatCapacity': int(flight['seatCapacity']),
+        'maximumSeating': int(flight['maximumSeating']),
+        'shards': [],
+    }
+
+
+def shard_flight_inventory(flight_id):
+    """Splits seats left on a flight across INVENTORY_SHARDS shards, enabling sharded reservations
+
+    Seats and maximum of the flight are split evenly across shards, which are created
+    in the same transaction that checks the flight didn't change since it was read.
+    That transaction also marks the flight item as sharded and sets its seats left to 0,
+    so seats aren't counted twice when a reservation or release falls back to the flight
+    item, e.g. as sharded inventory was disabled. The mark records how many shards the flight
+    got, which reservations use, so changing INVENTORY_SHARDS only affects flights sharded later.
+
+    Parameters
+    ----------
+    flight_id: string
+        Flight ID
+
+    Raises
+    ------
+    FlightReservationException
+        When flight changed, or was already sharded, while being sharded
+    """
+    shards = INVENTORY_SHARDS
+    if inventory_table is None or not 0 < shards < MAX_TRANSACTION_FLIGHTS:
+        raise ValueError(
+            f'Invalid arguments - sharded inventory needs 1 to {MAX_TRANSACTION_FLIGHTS - 1} shards'
+        )
+
+    availability = get_flight_availability(flight_id)
+    if availability['shards']:
+        raise FlightReservationException(f'Flight with ID: {flight_id} is already sharded.')
+
+    seats, maximum = availability['seatCapacity'], availability['maximumSeating']
+    transaction = [
+        {
+            'Update': {
+                'TableName': table.name,
+                'Key': {'id': flight_id},
+                'ConditionExpression': (
+                    'attribute_not_exists(#shards) '
+                    'AND seatCapacity = :seats AND maximumSeating = :maximum'
+                ),
+                'UpdateExpression': 'SET seatCapacity = :sharded, #shards = :shards',
+                'ExpressionAttributeNames': {'#shards': 'shards'},
+                'ExpressionAttributeValues': {
+                    ':seats': seats,
+                    ':maximum': maximum,
+                    ':sharded': 0,
+                    ':shards': shards,
+                },
+            }
         }
+    ]
+    for shard, (shard_seats, shard_maximum) in enumerate(
+        zip(split_seats(seats, shards), split_seats(maximum, shards))
+    ):
+        transaction.append(
+            {
+                'Put': {
+                    'TableName': inventory_table.name,
+                    'Item': {
+                        'flightId': flight_id,
+                        'shard': shard,
+                        'seatCapacity': shard_seats,
+                        'maximumSeating': shard_maximum,
+                    },
+                    'ConditionExpression': 'attribute_not_exists(flightId)',
+                }
+            }
+        )
+
+    try:
+        dynamodb.meta.client.transact_write_items(TransactItems=transaction)
+    except ClientError as e:
+        raise FlightReservationException(e.response['Error']['Message'])
+
+    flight_shards[flight_id] = shards
+
+
+def rebalance_flight_inventory(flight_id):
+    """Spreads seats left on a flight evenly across its shards again
+
+    Reservations picking shards at random drain them unevenly, so more and more attempts
+    spill over as a flight fills up. Each shard moved is conditioned on seats it had when read,
+    so nothing is lost when reservations or releases race with rebalancing; it just doesn't
+    happen and can be tried again.
+
+    Parameters
+    ----------
+    flight_id: string
+        Flight ID
+
+    Returns
+    -------
+    bool
+        Whether shards are balanced, False when they changed while being rebalanced
+    """
+    shards = query_flight_shards(flight_id)
+    seats = split_seats(sum(shard['seatCapacity'] for shard in shards), len(shards))
+    transaction = [
+        {
+            'Update': {
+                'TableName': inventory_table.name,
+                'Key': {'flightId': flight_id, 'shard': shard['shard']},
+                'ConditionExpression': 'seatCapacity = :current',
+                'UpdateExpression': 'SET seatCapacity = :seats',
+                'ExpressionAttributeValues': {
+                    ':current': shard['seatCapacity'],
+                    ':seats': shard_seats,
+                },
+            }
+        }
+        for shard, shard_seats in zip(shards, seats)
+        if shard['seatCapacity'] != shard_seats
+    ]
+    if not transaction:
+        return True
+
+    try:
+        dynamodb.meta.client.transact_write_items(TransactItems=transaction)
+        return True
+    except dynamodb.meta.client.exceptions.TransactionCanceledException:
+        return False
+    except ClientError as e:
+        raise FlightReservationException(e.response['Error']['Message'])
+
+
+def rebalance_quietly(flight_id):
+    """Rebalances a flight after a reservation, which succeeded whether or not this does"""
+    try:
+        rebalance_flight_inventory(flight_id)
+    except FlightReservationException:
+        # Next reservation spilling over as much will try again
+        pass
+
+
+def hold_seats_on_flights(flights, hold_id, hold_seconds=SEAT_HOLD_SECONDS):
+    """Holds seats on many flights for a while, until confirmed as a sale or reclaimed once expired
+
+    Seats are taken as `reserve_seats_on_flights` does, in the same transaction creating the hold
+    with the items they were taken from. Holding again with the same ID, e.g. when a state machine
+    retries, returns the hold created first without taking seats again.
+
+    Parameters
+    ----------
+    flights: list
+        (flight_id, seats) pairs
+    hold_id: string
+        Seat hold ID, e.g. booking or state machine execution ID
+    hold_seconds: int, optional
+        Seconds before the hold expires unless confirmed, by default SEAT_HOLD_SECONDS
+
+    Returns
+    -------
+    dict
+        status: string
+            SUCCESS once seats are held
+        holdId: string
+            Seat hold ID
+        expiresAt: int
+            When the hold expires unless confirmed, in seconds since epoch
+
+    Raises
+    ------
+    SeatHoldExpiredException
+        When a hold with the same ID expired already
+    FlightReservationException
+        As `reserve_seats_on_flights`
+    """
+    if seat_hold_table is None:
+        raise FlightReservationException('Seat holds are not enabled.')
+
+    hold = {
+        'id': hold_id,
+        'status': 'HELD',
+        'expiresAt': int(time.time()) + hold_seconds,
+        'heldBucket': random.randrange(SEAT_HOLD_BUCKETS),
+    }
+    try:
+        reserve_seats_on_flights(flights, hold=hold)
+        expires_at = hold['expiresAt']
+    except SeatHoldExistsException as e:
+        expires_at = describe_existing_hold(hold_id, e.hold)
+    except FlightFullyBookedException:
+        # Flights may have been sold out by this very hold, on an attempt that looked failed
+        existing = get_seat_hold(hold_id)
+        if not existing:
+            raise
+
+        expires_at = describe_existing_hold(hold_id, existing)
+
+    return {
+        'status': 'SUCCESS',
+        'holdId': hold_id,
+        'expiresAt': expires_at,
+    }
+
+
+def get_seat_hold(hold_id):
+    """Reads a seat hold, or None when it doesn't exist"""
+    try:
+        return dynamodb.meta.client.get_item(
+            TableName=seat_hold_table.name,
+            Key={'id': hold_id},
+            ConsistentRead=True,
+        ).get('Item')
+    except ClientError as e:
+        raise FlightReservationException(e.response['Error']['Message'])
+
+
+def describe_existing_hold(hold_id, hold):
+    """Returns when an existing hold expires, unless it did already, whether swept yet or not"""
+    expires_at = int(hold['expiresAt'])
+    if hold['status'] == 'EXPIRED' or (hold['status'] == 'HELD' and expires_at <= time.time()):
+        raise SeatHoldExpiredException(f'Seat hold with ID: {hold_id} expired.')
+
+    return expires_at
+
+
+def confirm_seat_hold(hold_id):
+    """Confirms a seat hold as a sale, so its seats are no longer reclaimed once it expires
+
+    Parameters
+    ----------
+    hold_id: string
+        Seat hold ID
+
+    Returns
+    -------
+    dict
+        status: string
+            SUCCESS once confirmed, or when it was already
+
+    Raises
+    ------
+    SeatHoldExpiredException
+        When hold expired before being confirmed, its seats are or will be reclaimed
+    SeatHoldDoesNotExistException
+        When hold doesn't exist
+    """
+    if seat_hold_table is None:
+        raise FlightReservationException('Seat holds are not enabled.')
+
+    try:
+        seat_hold_table.update_item(
+            Key={'id': hold_id},
+            ConditionExpression='#status = :held AND expiresAt > :now',
+            # Without heldBucket, hold leaves the sparse index swept for expired holds
+            UpdateExpression='SET #status = :confirmed REMOVE heldBucket',
+            ExpressionAttributeNames={'#status': 'status'},
+            ExpressionAttributeValues={
+                ':held': 'HELD',
+                ':confirmed': 'CONFIRMED',
+                ':now': int(time.time()),
+            },
+            ReturnValuesOnConditionCheckFailure='ALL_OLD',
+        )
     except dynamodb.meta.client.exceptions.ConditionalCheckFailedException as e:
-        # Due to no specificity from the DDB error, this could also mean the flight
-        # doesn't exist, but we should've caught that earlier in the flow.
-        # TODO: Fix that. Could either use TransactGetItems, or Get then Update.
-        raise FlightFullyBookedException(f"Flight with ID: {flight_id} is fully booked.")
+        hold = e.response.get('Item')
+        if not hold:
+            raise SeatHoldDoesNotExistException(f'Seat hold with ID: {hold_id} does not exist.')
+
+        if hold['status']['S'] != 'CONFIRMED':
+            raise SeatHoldExpiredException(f'Seat hold with ID: {hold_id} expired.')
     except ClientError as e:
         raise FlightReservationException(e.response['Error']['Message'])
 
+    return {
+        'status': 'SUCCESS'
+    }
+
+
+def reserve_seat_on_flight(flight_id):
+    return reserve_seats_on_flights([(flight_id, 1)])
+
 
 def lambda_handler(event, context):
-    if 'outboundFlightId' not in event:
+    if 'flights' in event:
+        flights = [(flight.get('flightId'), flight.get('seats', 1)) for flight in event['flights']]
+    elif 'outboundFlightId' in event:
+        flights = [(event['outboundFlightId'], event.get('seats', 1))]
+    else:
+        raise ValueError('Invalid arguments')
+
+    try:
+        if 'holdId' in event:
+            ret = hold_seats_on_flights(flights, event['holdId'])
+        else:
+            ret = reserve_seats_on_flights(flights)
+    except FlightReservationException as e:
+        raise FlightReservationException(str(e), failures=e.failures)
+
+    return json.dumps(ret)
+
+
+def confirm_handler(event, context):
+    if 'holdId' not in event:
         raise ValueError('Invalid arguments')
 
     try:
-        ret = reserve_seat_on_flight(event['outboundFlightId'])
+        ret = confirm_seat_hold(event['holdId'])
     except FlightReservationException as e:
         raise FlightReservationException(e)
 
@@ -0,0 +1,51 @@
+import importlib.util
+import os
+
+import pytest
+from botocore.stub import Stubber
+
+FUNCTIONS_DIR = os.path.join(os.path.dirname(__file__), os.pardir, "src")
+
+
+@pytest.fixture
+def load_function(monkeypatch):
+    """Loads a catalog function module afresh, as a new Lambda container would
+
+    Function code directories aren't packages, and modules read their configuration
+    from environment variables at import time, so each test gets its own module.
+    """
+    monkeypatch.setenv("AWS_DEFAULT_REGION", "us-east-1")
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "testing")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "testing")
+    monkeypatch.setenv("FLIGHT_TABLE_NAME", "Flight")
+    monkeypatch.delenv("DYNAMODB_ENDPOINT_URL", raising=False)
+
+    def load(function, module, **env):
+        for name, value in env.items():
+            monkeypatch.setenv(name, str(value))
+
+        path = os.path.join(FUNCTIONS_DIR, function, f"{module}.py")
+        spec = importlib.util.spec_from_file_location(module, path)
+        loaded = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(loaded)
+        return loaded
+
+    return load
+
+
+@pytest.fixture
+def stub():
+    """Stubs DynamoDB calls of a function module, checking every stubbed call was made"""
+    stubbers = []
+
+    def activate(module):
+        stubber = Stubber(module.dynamodb.meta.client)
+        stubber.activate()
+        stubbers.append(stubber)
+        return stubber
+
+    yield activate
+
+    for stubber in stubbers:
+        stubber.assert_no_pending_responses()
+        stubber.deactivate()
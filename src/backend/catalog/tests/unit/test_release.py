@@ -0,0 +1,484 @@
+import pytest
+
+
+@pytest.fixture
+def sharded(load_function, monkeypatch):
+    # Shards are tried in order, rather than at random
+    monkeypatch.setattr("random.sample", lambda population, k: list(population)[:k])
+    return load_function(
+        "release-flight",
+        "release",
+        SEAT_INVENTORY_TABLE_NAME="SeatInventory",
+        SEAT_INVENTORY_SHARDS=2,
+    )
+
+
+def shard_release(stubber, flight_id, shard, error=None, item=None):
+    expected_params = {
+        "TableName": "SeatInventory",
+        "Key": {"flightId": flight_id, "shard": shard},
+        "ConditionExpression": "seatCapacity < maximumSeating",
+        "UpdateExpression": "SET seatCapacity = seatCapacity + :inc",
+        "ExpressionAttributeValues": {":inc": 1},
+        "ReturnValuesOnConditionCheckFailure": "ALL_OLD",
+    }
+    if error is None:
+        stubber.add_response("update_item", {}, expected_params)
+    else:
+        stubber.add_client_error(
+            "update_item",
+            service_error_code=error,
+            expected_params=expected_params,
+            modeled_fields={"Item": item} if item else None,
+        )
+
+
+def flight_item_release(stubber, flight_id, error=None, item=None):
+    expected_params = {
+        "TableName": "Flight",
+        "Key": {"id": flight_id},
+        "ConditionExpression": (
+            "id = :idVal AND attribute_not_exists(#shards) AND seatCapacity < maximumSeating"
+        ),
+        "UpdateExpression": "SET seatCapacity = seatCapacity + :dec",
+        "ExpressionAttributeNames": {"#shards": "shards"},
+        "ExpressionAttributeValues": {":idVal": flight_id, ":dec": 1},
+        "ReturnValuesOnConditionCheckFailure": "ALL_OLD",
+    }
+    if error is None:
+        stubber.add_response("update_item", {}, expected_params)
+    else:
+        stubber.add_client_error(
+            "update_item",
+            service_error_code=error,
+            expected_params=expected_params,
+            modeled_fields={"Item": item} if item else None,
+        )
+
+
+def test_release_spills_over_to_other_shards(sharded, stub):
+    # GIVEN a flight known to be sharded, its first shard with all its seats already
+    sharded.flight_shards["flight"] = 2
+    stubber = stub(sharded)
+    shard_release(
+        stubber,
+        "flight",
+        0,
+        error="ConditionalCheckFailedException",
+        item={"seatCapacity": {"N": "4"}, "maximumSeating": {"N": "4"}},
+    )
+
+    # THEN the seat should be released on the next shard
+    shard_release(stubber, "flight", 1)
+
+    # WHEN a seat is released
+    assert sharded.reserve_seat_on_flight("flight") == {"status": "SUCCESS"}
+
+
+def test_release_unsharded_flight_on_flight_item(sharded, stub):
+    # GIVEN a flight that was never sharded
+    stubber = stub(sharded)
+
+    # THEN the seat should be released on its flight item, without trying shards first
+    flight_item_release(stubber, "flight")
+
+    # WHEN a seat is released
+    assert sharded.reserve_seat_on_flight("flight") == {"status": "SUCCESS"}
+
+
+def test_release_learns_shards_from_flight_item(sharded, stub):
+    # GIVEN a flight sharded into more shards than SEAT_INVENTORY_SHARDS, its item marked so
+    stubber = stub(sharded)
+    flight_item_release(
+        stubber,
+        "flight",
+        error="ConditionalCheckFailedException",
+        item={"seatCapacity": {"N": "0"}, "shards": {"N": "3"}},
+    )
+
+    # THEN the seat should be released on its shards, up to the last one it has
+    for shard in range(2):
+        shard_release(
+            stubber,
+            "flight",
+            shard,
+            error="ConditionalCheckFailedException",
+            item={"seatCapacity": {"N": "4"}, "maximumSeating": {"N": "4"}},
+        )
+    shard_release(stubber, "flight", 2)
+
+    # WHEN a seat is released
+    assert sharded.reserve_seat_on_flight("flight") == {"status": "SUCCESS"}
+    assert sharded.flight_shards == {"flight": 3}
+
+
+def test_release_missing_shard(sharded, stub):
+    # GIVEN a flight known to be sharded, one of its shards missing
+    sharded.flight_shards["flight"] = 2
+    stubber = stub(sharded)
+    shard_release(stubber, "flight", 0, error="ConditionalCheckFailedException")
+
+    # WHEN a seat is released
+    # THEN it should fail, rather than fall back to the flight item whose seats were moved
+    with pytest.raises(sharded.FlightReservationException, match="does not exist"):
+        sharded.reserve_seat_on_flight("flight")
+
+
+def test_release_sharded_flight_item(load_function, stub):
+    # GIVEN sharded inventory disabled, and a flight whose seats were moved to shards
+    release = load_function("release-flight", "release")
+    stubber = stub(release)
+    flight_item_release(
+        stubber,
+        "flight",
+        error="ConditionalCheckFailedException",
+        item={"seatCapacity": {"N": "0"}, "shards": {"N": "2"}},
+    )
+
+    # WHEN a seat is released
+    # THEN the flight item shouldn't free a seat its shards may have already
+    with pytest.raises(release.FlightReservationException, match="is sharded"):
+        release.reserve_seat_on_flight("flight")
+
+
+def read_flight_item(stubber, flight_id, item):
+    stubber.add_response(
+        "get_item",
+        {"Item": item} if item else {},
+        {
+            "TableName": "Flight",
+            "Key": {"id": flight_id},
+            "ProjectionExpression": "seatCapacity, maximumSeating, #shards",
+            "ExpressionAttributeNames": {"#shards": "shards"},
+            "ConsistentRead": True,
+        },
+    )
+
+
+def test_release_seats_capped_at_maximum(load_function, stub):
+    # GIVEN a flight with fewer seats taken than requested to be released
+    release = load_function("release-flight", "release")
+    stubber = stub(release)
+    read_flight_item(stubber, "flight", {"seatCapacity": {"N": "7"}, "maximumSeating": {"N": "8"}})
+
+    # THEN seats should be set to its maximum, provided they didn't change meanwhile
+    stubber.add_response(
+        "update_item",
+        {},
+        {
+            "TableName": "Flight",
+            "Key": {"id": "flight"},
+            "ConditionExpression": (
+                "attribute_not_exists(#shards) "
+                "AND seatCapacity = :current AND maximumSeating = :maximum"
+            ),
+            "UpdateExpression": "SET seatCapacity = :seats",
+            "ExpressionAttributeNames": {"#shards": "shards"},
+            "ExpressionAttributeValues": {":current": 7, ":maximum": 8, ":seats": 8},
+            "ReturnValuesOnConditionCheckFailure": "ALL_OLD",
+        },
+    )
+
+    # WHEN seats are released on many flights, the same flight requested twice
+    ret = release.release_seats_on_flights([("flight", 1), ("flight", 1)])
+
+    assert ret == [{"flightId": "flight", "seats": 2, "released": 1, "status": "CAPPED"}]
+
+
+def test_release_seats_sharded_flight_item(load_function, stub):
+    # GIVEN sharded inventory disabled, a flight whose seats were moved to shards
+    # and a flight that doesn't exist
+    release = load_function("release-flight", "release", MAX_RELEASE_WORKERS=1)
+    stubber = stub(release)
+    read_flight_item(
+        stubber,
+        "sharded",
+        {"seatCapacity": {"N": "0"}, "maximumSeating": {"N": "8"}, "shards": {"N": "2"}},
+    )
+    read_flight_item(stubber, "missing", None)
+
+    # WHEN seats are released on both
+    ret = release.release_seats_on_flights([("sharded", 1), ("missing", 1)])
+
+    # THEN the flight item shouldn't free seats its shards may have already
+    assert ret == [
+        {
+            "flightId": "sharded",
+            "seats": 1,
+            "released": 0,
+            "status": "FAILED",
+            "error": "Flight with ID: sharded is sharded.",
+        },
+        {"flightId": "missing", "seats": 1, "released": 0, "status": "DOES_NOT_EXIST"},
+    ]
+
+
+@pytest.fixture
+def sweeper(load_function):
+    return load_function(
+        "release-flight",
+        "release",
+        SEAT_HOLD_TABLE_NAME="SeatHold",
+        SEAT_INVENTORY_TABLE_NAME="SeatInventory",
+        SEAT_HOLD_BUCKETS=1,
+    )
+
+
+def seat_hold(hold_id, *allocations):
+    return {"id": hold_id, "allocations": list(allocations)}
+
+
+def expire_hold(hold_id, now):
+    return {
+        "Update": {
+            "TableName": "SeatHold",
+            "Key": {"id": hold_id},
+            "ConditionExpression": "#status = :held AND expiresAt <= :now",
+            "UpdateExpression": "SET #status = :expired REMOVE heldBucket",
+            "ExpressionAttributeNames": {"#status": "status"},
+            "ExpressionAttributeValues": {":held": "HELD", ":expired": "EXPIRED", ":now": now},
+        }
+    }
+
+
+def give_back_seats(flight_id, seats, shard=None):
+    if shard is None:
+        update = {
+            "TableName": "Flight",
+            "Key": {"id": flight_id},
+            "ConditionExpression": "attribute_exists(id) AND attribute_not_exists(#shards)",
+            "ExpressionAttributeNames": {"#shards": "shards"},
+            "ReturnValuesOnConditionCheckFailure": "ALL_OLD",
+        }
+    else:
+        update = {
+            "TableName": "SeatInventory",
+            "Key": {"flightId": flight_id, "shard": shard},
+            "ConditionExpression": "attribute_exists(flightId)",
+        }
+
+    update["UpdateExpression"] = "SET seatCapacity = seatCapacity + :seats"
+    update["ExpressionAttributeValues"] = {":seats": seats}
+    return {"Update": update}
+
+
+def test_sweep_expired_seat_holds(sweeper, stub):
+    # GIVEN expired holds, one taking seats from a flight item and the other from it and a shard
+    stubber = stub(sweeper)
+    stubber.add_response(
+        "query",
+        {
+            "Items": [
+                {
+                    "id": {"S": "first"},
+                    "allocations": {
+                        "L": [{"M": {"flightId": {"S": "flight"}, "seats": {"N": "1"}}}]
+                    },
+                },
+                {
+                    "id": {"S": "second"},
+                    "allocations": {
+                        "L": [
+                            {"M": {"flightId": {"S": "flight"}, "seats": {"N": "2"}}},
+                            {
+                                "M": {
+                                    "flightId": {"S": "sharded"},
+                                    "shard": {"N": "3"},
+                                    "seats": {"N": "1"},
+                                }
+                            },
+                        ]
+                    },
+                },
+            ]
+        },
+        {
+            "TableName": "SeatHold",
+            "IndexName": "ByHoldExpiry",
+            "KeyConditionExpression": "heldBucket = :bucket AND expiresAt <= :now",
+            "ExpressionAttributeValues": {":bucket": 0, ":now": 100},
+        },
+    )
+
+    # THEN holds should be expired and seats given back per item, in a single transaction
+    stubber.add_response(
+        "transact_write_items",
+        {},
+        {
+            "TransactItems": [
+                expire_hold("first", 100),
+                expire_hold("second", 100),
+                give_back_seats("flight", 3),
+                give_back_seats("sharded", 1, shard=3),
+            ]
+        },
+    )
+
+    # WHEN swept
+    ret = sweeper.sweep_expired_seat_holds(now=100)
+
+    assert ret == {"holds": 2, "seats": 4, "failed": 0}
+
+
+def test_batch_seat_holds_fits_transactions(sweeper):
+    # GIVEN more holds on distinct flights than a transaction can reclaim
+    holds = [seat_hold(str(i), {"flightId": str(i), "seats": 1}) for i in range(30)]
+
+    # WHEN batched
+    batches = list(sweeper.batch_seat_holds(holds))
+
+    # THEN each batch should write no more than 25 items, each hold and each seat item once
+    assert [len(batch) for batch in batches] == [12, 12, 6]
+    assert [hold for batch in batches for hold in batch] == holds
+
+
+def test_batch_seat_holds_counts_shared_items_once(sweeper):
+    # GIVEN holds all taking seats from the same flight
+    holds = [seat_hold(str(i), {"flightId": "flight", "seats": 1}) for i in range(30)]
+
+    # WHEN batched
+    # THEN the flight item should only count once per batch
+    assert [len(batch) for batch in sweeper.batch_seat_holds(holds)] == [24, 6]
+
+
+def test_reclaim_seat_holds_drops_stale_holds(sweeper, stub):
+    # GIVEN a hold confirmed since queried, along with an expired one
+    stubber = stub(sweeper)
+    holds = [
+        seat_hold("confirmed", {"flightId": "flight", "seats": 1}),
+        seat_hold("expired", {"flightId": "flight", "seats": 2}),
+    ]
+    stubber.add_client_error(
+        "transact_write_items",
+        service_error_code="TransactionCanceledException",
+        expected_params={
+            "TransactItems": [
+                expire_hold("confirmed", 100),
+                expire_hold("expired", 100),
+                give_back_seats("flight", 3),
+            ]
+        },
+        modeled_fields={
+            "CancellationReasons": [
+                {"Code": "ConditionalCheckFailed"},
+                {"Code": "None"},
+                {"Code": "None"},
+            ]
+        },
+    )
+
+    # THEN it should be tried again without the confirmed hold and its seats
+    stubber.add_response(
+        "transact_write_items",
+        {},
+        {"TransactItems": [expire_hold("expired", 100), give_back_seats("flight", 2)]},
+    )
+
+    # WHEN reclaimed
+    assert sweeper.reclaim_seat_holds(holds, 100) == (1, 2)
+
+
+def test_reclaim_seat_holds_gives_back_to_shards_of_sharded_flight(sweeper, stub, monkeypatch):
+    # GIVEN a hold on a flight item sharded since, its shards having room for the seats
+    monkeypatch.setattr("random.sample", lambda population, k: list(population)[:k])
+    stubber = stub(sweeper)
+    holds = [seat_hold("hold", {"flightId": "flight", "seats": 3})]
+    stubber.add_client_error(
+        "transact_write_items",
+        service_error_code="TransactionCanceledException",
+        expected_params={"TransactItems": [expire_hold("hold", 100), give_back_seats("flight", 3)]},
+        modeled_fields={
+            "CancellationReasons": [
+                {"Code": "None"},
+                {
+                    "Code": "ConditionalCheckFailed",
+                    "Item": {"seatCapacity": {"N": "0"}, "shards": {"N": "2"}},
+                },
+            ]
+        },
+    )
+    stubber.add_response(
+        "query",
+        {
+            "Items": [
+                {"shard": {"N": "0"}, "seatCapacity": {"N": "4"}, "maximumSeating": {"N": "5"}},
+                {"shard": {"N": "1"}, "seatCapacity": {"N": "2"}, "maximumSeating": {"N": "5"}},
+            ]
+        },
+    )
+
+    # THEN its seats should be given back to the shards, up to their maximum
+    stubber.add_response(
+        "transact_write_items",
+        {},
+        {
+            "TransactItems": [
+                expire_hold("hold", 100),
+                {
+                    "Update": {
+                        "TableName": "SeatInventory",
+                        "Key": {"flightId": "flight", "shard": 0},
+                        "ConditionExpression": "seatCapacity = :current",
+                        "UpdateExpression": "SET seatCapacity = :seats",
+                        "ExpressionAttributeValues": {":current": 4, ":seats": 5},
+                    }
+                },
+                {
+                    "Update": {
+                        "TableName": "SeatInventory",
+                        "Key": {"flightId": "flight", "shard": 1},
+                        "ConditionExpression": "seatCapacity = :current",
+                        "UpdateExpression": "SET seatCapacity = :seats",
+                        "ExpressionAttributeValues": {":current": 2, ":seats": 4},
+                    }
+                },
+            ]
+        },
+    )
+
+    # WHEN reclaimed
+    assert sweeper.reclaim_seat_holds(holds, 100) == (1, 3)
+
+
+def test_reclaim_seat_holds_surfaces_seat_item_failures(sweeper, stub):
+    # GIVEN a hold on a flight that doesn't exist anymore
+    stubber = stub(sweeper)
+    holds = [seat_hold("hold", {"flightId": "deleted", "seats": 1})]
+    stubber.add_client_error(
+        "transact_write_items",
+        service_error_code="TransactionCanceledException",
+        expected_params={
+            "TransactItems": [expire_hold("hold", 100), give_back_seats("deleted", 1)]
+        },
+        modeled_fields={
+            "CancellationReasons": [{"Code": "None"}, {"Code": "ConditionalCheckFailed"}]
+        },
+    )
+
+    # WHEN reclaimed
+    # THEN it should fail straight away, rather than try the same transaction again
+    with pytest.raises(sweeper.FlightReservationException, match="deleted"):
+        sweeper.reclaim_seat_holds(holds, 100)
+
+
+def test_sweep_leaves_failed_batches_for_next_sweep(sweeper, stub):
+    # GIVEN an expired hold whose transaction fails
+    stubber = stub(sweeper)
+    stubber.add_response(
+        "query",
+        {
+            "Items": [
+                {
+                    "id": {"S": "hold"},
+                    "allocations": {
+                        "L": [{"M": {"flightId": {"S": "flight"}, "seats": {"N": "1"}}}]
+                    },
+                }
+            ]
+        },
+    )
+    stubber.add_client_error("transact_write_items", service_error_code="InternalServerError")
+
+    # WHEN swept
+    # THEN it should be counted as failed, as it's still in the index for the next sweep
+    assert sweeper.sweep_expired_seat_holds(now=100) == {"holds": 0, "seats": 0, "failed": 1}
@@ -0,0 +1,759 @@
+import copy
+import json
+import pickle
+import sys
+import time
+
+import pytest
+from botocore.stub import ANY
+
+
+@pytest.fixture
+def reserve(load_function):
+    return load_function("reserve-flight", "reserve")
+
+
+def flight_update(flight_id, seats):
+    return {
+        "Update": {
+            "TableName": "Flight",
+            "Key": {"id": flight_id},
+            "ConditionExpression": (
+                "attribute_exists(id) AND attribute_not_exists(#shards) AND seatCapacity >= :seats"
+            ),
+            "UpdateExpression": "SET seatCapacity = seatCapacity - :seats",
+            "ExpressionAttributeNames": {"#shards": "shards"},
+            "ExpressionAttributeValues": {":seats": seats},
+            "ReturnValuesOnConditionCheckFailure": "ALL_OLD",
+        }
+    }
+
+
+def cancel_transaction(stubber, transaction, reasons):
+    stubber.add_client_error(
+        "transact_write_items",
+        service_error_code="TransactionCanceledException",
+        service_message="Transaction cancelled",
+        expected_params={"TransactItems": transaction},
+        modeled_fields={"CancellationReasons": reasons},
+    )
+
+
+def test_reserve_coalesces_seats_per_flight(reserve, stub):
+    # GIVEN a connecting itinerary requesting seats on the same flight twice
+    stubber = stub(reserve)
+    stubber.add_response(
+        "transact_write_items",
+        {},
+        {"TransactItems": [flight_update("outbound", 3), flight_update("connection", 1)]},
+    )
+
+    # WHEN seats are reserved
+    ret = reserve.reserve_seats_on_flights([("outbound", 1), ("connection", 1), ("outbound", 2)])
+
+    # THEN each flight should be updated once, with plain values for the client to serialize
+    assert ret == {"status": "SUCCESS"}
+
+
+@pytest.mark.parametrize(
+    "flights", [[], [("outbound", 0)], [(None, 1)], [(str(i), 1) for i in range(26)]]
+)
+def test_reserve_rejects_invalid_flights(reserve, stub, flights):
+    # GIVEN no flight, invalid seats or more flights than a transaction can update
+    stub(reserve)
+
+    # WHEN seats are reserved
+    # THEN it should fail before any DynamoDB call
+    with pytest.raises(ValueError):
+        reserve.reserve_seats_on_flights(flights)
+
+
+def test_reserve_fully_booked(reserve, stub):
+    # GIVEN a transaction cancelled as one flight doesn't have enough seats left
+    stubber = stub(reserve)
+    cancel_transaction(
+        stubber,
+        [flight_update("outbound", 2), flight_update("connection", 2)],
+        [
+            {"Code": "None"},
+            {
+                "Code": "ConditionalCheckFailed",
+                "Item": {"id": {"S": "connection"}, "seatCapacity": {"N": "1"}},
+            },
+        ],
+    )
+
+    # WHEN seats are reserved
+    # THEN only the flight that failed its condition should be reported, as fully booked
+    with pytest.raises(reserve.FlightFullyBookedException) as e:
+        reserve.reserve_seats_on_flights([("outbound", 2), ("connection", 2)])
+
+    assert e.value.failures == [{"flightId": "connection", "seats": 2, "reason": "FULLY_BOOKED"}]
+
+
+def test_reserve_flight_does_not_exist(reserve, stub):
+    # GIVEN a transaction cancelled on a flight with no item returned, as it doesn't exist
+    stubber = stub(reserve)
+    cancel_transaction(stubber, [flight_update("missing", 1)], [{"Code": "ConditionalCheckFailed"}])
+
+    # WHEN seats are reserved
+    # THEN the flight should be reported as missing
+    with pytest.raises(reserve.FlightDoesNotExistException) as e:
+        reserve.reserve_seats_on_flights([("missing", 1)])
+
+    assert e.value.failures == [{"flightId": "missing", "seats": 1, "reason": "DOES_NOT_EXIST"}]
+
+
+def test_reserve_mixed_failures(reserve, stub):
+    # GIVEN a transaction cancelled on a full flight and a missing one
+    stubber = stub(reserve)
+    cancel_transaction(
+        stubber,
+        [flight_update("full", 1), flight_update("missing", 1)],
+        [
+            {"Code": "ConditionalCheckFailed", "Item": {"seatCapacity": {"N": "0"}}},
+            {"Code": "ConditionalCheckFailed"},
+        ],
+    )
+
+    # WHEN seats are reserved
+    # THEN neither specific exception applies, but each failure should be reported
+    with pytest.raises(reserve.FlightReservationException) as e:
+        reserve.reserve_seats_on_flights([("full", 1), ("missing", 1)])
+
+    assert type(e.value) is reserve.FlightReservationException
+    assert [failure["reason"] for failure in e.value.failures] == ["FULLY_BOOKED", "DOES_NOT_EXIST"]
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Monotonic clock the sold out cache reads, moved forward by tests"""
+    now = [1000.0]
+    monkeypatch.setattr("time.monotonic", lambda: now[0])
+    return now
+
+
+def test_reserve_sold_out_flight_rejected_from_cache(reserve, stub, clock):
+    # GIVEN a flight found with no seat left by an earlier reservation
+    stubber = stub(reserve)
+    cancel_transaction(
+        stubber,
+        [flight_update("full", 1)],
+        [{"Code": "ConditionalCheckFailed", "Item": {"seatCapacity": {"N": "0"}}}],
+    )
+    with pytest.raises(reserve.FlightFullyBookedException):
+        reserve.reserve_seats_on_flights([("full", 1)])
+
+    # WHEN seats are reserved on it again
+    # THEN it should be rejected as fully booked without any transaction
+    with pytest.raises(reserve.FlightFullyBookedException) as e:
+        reserve.reserve_seats_on_flights([("outbound", 1), ("full", 1)])
+
+    assert e.value.failures == [{"flightId": "full", "seats": 1, "reason": "FULLY_BOOKED"}]
+
+
+def test_reserve_sold_out_flight_forgotten_after_ttl(reserve, stub, clock):
+    # GIVEN a flight remembered sold out
+    stubber = stub(reserve)
+    reserve.remember_sold_out("full", True)
+
+    # WHEN SOLD_OUT_TTL_SECONDS have passed
+    clock[0] += reserve.SOLD_OUT_TTL_SECONDS - 0.1
+    assert reserve.is_sold_out("full")
+    clock[0] += 0.1
+
+    # THEN it should be forgotten, and seats reserved from DynamoDB again
+    assert not reserve.is_sold_out("full")
+    assert reserve.sold_out_flights == {}
+    stubber.add_response("transact_write_items", {}, {"TransactItems": [flight_update("full", 1)]})
+    assert reserve.reserve_seats_on_flights([("full", 1)]) == {"status": "SUCCESS"}
+
+
+@pytest.mark.parametrize(
+    "seats, reason, exception",
+    [
+        (1, {"Code": "ConditionalCheckFailed"}, "FlightDoesNotExistException"),
+        (
+            2,
+            {"Code": "ConditionalCheckFailed", "Item": {"seatCapacity": {"N": "1"}}},
+            "FlightFullyBookedException",
+        ),
+    ],
+)
+def test_reserve_failure_not_sold_out_isnt_cached(reserve, stub, clock, seats, reason, exception):
+    # GIVEN a flight that doesn't exist, or has fewer seats left than requested but not none
+    stubber = stub(reserve)
+    cancel_transaction(stubber, [flight_update("outbound", seats)], [reason])
+
+    # WHEN seats are reserved
+    with pytest.raises(getattr(reserve, exception)):
+        reserve.reserve_seats_on_flights([("outbound", seats)])
+
+    # THEN the flight shouldn't be remembered sold out
+    assert not reserve.is_sold_out("outbound")
+    assert reserve.sold_out_flights == {}
+
+
+@pytest.mark.parametrize("seats", [0, 3])
+def test_flight_availability_refreshes_sold_out_cache(reserve, stub, clock, seats):
+    # GIVEN a flight remembered as the opposite of what it will be read as
+    stubber = stub(reserve)
+    reserve.remember_sold_out("outbound", bool(seats))
+    clock[0] += reserve.SOLD_OUT_TTL_SECONDS / 2
+    stubber.add_response(
+        "get_item",
+        {"Item": {"seatCapacity": {"N": str(seats)}, "maximumSeating": {"N": "10"}}},
+        {
+            "TableName": "Flight",
+            "Key": {"id": "outbound"},
+            "ProjectionExpression": "seatCapacity, maximumSeating",
+            "ConsistentRead": True,
+        },
+    )
+
+    # WHEN its availability is read
+    ret = reserve.get_flight_availability("outbound")
+
+    # THEN it should be remembered sold out only when read with no seat left, for a full TTL
+    assert ret["seatCapacity"] == seats
+    assert reserve.is_sold_out("outbound") == (not seats)
+    if not seats:
+        assert reserve.sold_out_flights["outbound"] == clock[0] + reserve.SOLD_OUT_TTL_SECONDS
+    else:
+        assert reserve.sold_out_flights == {}
+
+
+def test_reserve_seat_on_flight_takes_one_seat(reserve, stub):
+    # GIVEN the single seat wrapper kept for existing callers
+    stubber = stub(reserve)
+    stubber.add_response(
+        "transact_write_items", {}, {"TransactItems": [flight_update("outbound", 1)]}
+    )
+
+    # WHEN a seat is reserved
+    # THEN a single seat should be taken from the flight
+    assert reserve.reserve_seat_on_flight("outbound") == {"status": "SUCCESS"}
+
+
+def test_lambda_handler_outbound_flight(reserve, stub):
+    # GIVEN Process Booking event with an outbound flight and no seats count
+    stubber = stub(reserve)
+    stubber.add_response(
+        "transact_write_items", {}, {"TransactItems": [flight_update("outbound", 1)]}
+    )
+
+    # WHEN invoked
+    # THEN one seat should be reserved
+    assert json.loads(reserve.lambda_handler({"outboundFlightId": "outbound"}, None)) == {
+        "status": "SUCCESS"
+    }
+
+
+def test_reserve_sharded_flight_item(reserve, stub):
+    # GIVEN a flight item whose seats were moved to shards, and sharded inventory disabled
+    stubber = stub(reserve)
+    cancel_transaction(
+        stubber,
+        [flight_update("sharded", 1)],
+        [
+            {
+                "Code": "ConditionalCheckFailed",
+                "Item": {"seatCapacity": {"N": "0"}, "shards": {"N": "2"}},
+            }
+        ],
+    )
+
+    # WHEN seats are reserved
+    # THEN the flight item shouldn't take seats its shards have, nor look fully booked
+    with pytest.raises(reserve.FlightReservationException) as e:
+        reserve.reserve_seats_on_flights([("sharded", 1)])
+
+    assert type(e.value) is reserve.FlightReservationException
+    assert e.value.failures == [{"flightId": "sharded", "seats": 1, "reason": "SHARDED"}]
+
+
+@pytest.fixture
+def sharded(load_function, monkeypatch):
+    # Shards are tried in order, rather than at random
+    monkeypatch.setattr("random.sample", lambda population, k: list(population)[:k])
+    return load_function(
+        "reserve-flight",
+        "reserve",
+        SEAT_INVENTORY_TABLE_NAME="SeatInventory",
+        SEAT_INVENTORY_SHARDS=2,
+    )
+
+
+def shard_update(flight_id, shard, seats):
+    return {
+        "Update": {
+            "TableName": "SeatInventory",
+            "Key": {"flightId": flight_id, "shard": shard},
+            "ConditionExpression": "attribute_exists(flightId) AND seatCapacity >= :seats",
+            "UpdateExpression": "SET seatCapacity = seatCapacity - :seats",
+            "ExpressionAttributeValues": {":seats": seats},
+            "ReturnValuesOnConditionCheckFailure": "ALL_OLD",
+        }
+    }
+
+
+def query_shards(stubber, flight_id, shards):
+    stubber.add_response(
+        "query",
+        {
+            "Items": [
+                {
+                    "shard": {"N": str(shard)},
+                    "seatCapacity": {"N": str(seats)},
+                    "maximumSeating": {"N": str(maximum)},
+                }
+                for shard, seats, maximum in shards
+            ]
+        },
+        {
+            "TableName": "SeatInventory",
+            "KeyConditionExpression": ANY,
+            "ProjectionExpression": "#shard, seatCapacity, maximumSeating",
+            "ExpressionAttributeNames": {"#shard": "shard"},
+            "ConsistentRead": True,
+        },
+    )
+
+
+def rebalance_update(flight_id, shard, current, seats):
+    return {
+        "Update": {
+            "TableName": "SeatInventory",
+            "Key": {"flightId": flight_id, "shard": shard},
+            "ConditionExpression": "seatCapacity = :current",
+            "UpdateExpression": "SET seatCapacity = :seats",
+            "ExpressionAttributeValues": {":current": current, ":seats": seats},
+        }
+    }
+
+
+def test_reserve_spills_over_to_other_shards(sharded, stub):
+    # GIVEN a flight known to be sharded, its first shard with fewer seats left than requested
+    sharded.flight_shards["flight"] = 2
+    stubber = stub(sharded)
+    cancel_transaction(
+        stubber,
+        [shard_update("flight", 0, 3)],
+        [{"Code": "ConditionalCheckFailed", "Item": {"seatCapacity": {"N": "1"}}}],
+    )
+    # THEN seats it has left should be taken, and the rest from the next shard
+    stubber.add_response(
+        "transact_write_items",
+        {},
+        {"TransactItems": [shard_update("flight", 0, 1), shard_update("flight", 1, 2)]},
+    )
+    # THEN shards should be rebalanced, as half of them were found too low
+    query_shards(stubber, "flight", [(0, 0, 5), (1, 3, 5)])
+    stubber.add_response(
+        "transact_write_items",
+        {},
+        {
+            "TransactItems": [
+                rebalance_update("flight", 0, 0, 2),
+                rebalance_update("flight", 1, 3, 1),
+            ]
+        },
+    )
+
+    # WHEN seats are reserved
+    assert sharded.reserve_seats_on_flights([("flight", 3)]) == {"status": "SUCCESS"}
+
+
+def test_reserve_shards_fully_booked(sharded, stub):
+    # GIVEN shards of a flight known to be sharded that can't cover seats requested between them
+    sharded.flight_shards["flight"] = 2
+    stubber = stub(sharded)
+    cancel_transaction(
+        stubber,
+        [shard_update("flight", 0, 3)],
+        [{"Code": "ConditionalCheckFailed", "Item": {"seatCapacity": {"N": "1"}}}],
+    )
+    cancel_transaction(
+        stubber,
+        [shard_update("flight", 0, 1), shard_update("flight", 1, 2)],
+        [
+            {"Code": "None"},
+            {"Code": "ConditionalCheckFailed", "Item": {"seatCapacity": {"N": "1"}}},
+        ],
+    )
+
+    # WHEN seats are reserved
+    # THEN the flight should be fully booked, without another attempt
+    with pytest.raises(sharded.FlightFullyBookedException):
+        sharded.reserve_seats_on_flights([("flight", 3)])
+
+
+def test_reserve_unsharded_flight_on_flight_item(sharded, stub):
+    # GIVEN a flight that was never sharded
+    stubber = stub(sharded)
+
+    # THEN its flight item should be reserved in a single transaction, without trying shards
+    stubber.add_response(
+        "transact_write_items", {}, {"TransactItems": [flight_update("flight", 1)]}
+    )
+
+    # WHEN seats are reserved
+    assert sharded.reserve_seats_on_flights([("flight", 1)]) == {"status": "SUCCESS"}
+
+
+def test_reserve_learns_shards_from_flight_item(sharded, stub):
+    # GIVEN a flight sharded into more shards than SEAT_INVENTORY_SHARDS, its item marked so
+    stubber = stub(sharded)
+    cancel_transaction(
+        stubber,
+        [flight_update("flight", 3)],
+        [
+            {
+                "Code": "ConditionalCheckFailed",
+                "Item": {"seatCapacity": {"N": "0"}, "shards": {"N": "3"}},
+            }
+        ],
+    )
+    # THEN seats should be taken from its shards, spilling over to the last one it has
+    cancel_transaction(
+        stubber,
+        [shard_update("flight", 0, 3)],
+        [{"Code": "ConditionalCheckFailed", "Item": {"seatCapacity": {"N": "0"}}}],
+    )
+    cancel_transaction(
+        stubber,
+        [shard_update("flight", 1, 3)],
+        [{"Code": "ConditionalCheckFailed", "Item": {"seatCapacity": {"N": "0"}}}],
+    )
+    stubber.add_response(
+        "transact_write_items", {}, {"TransactItems": [shard_update("flight", 2, 3)]}
+    )
+    # THEN its three shards should be rebalanced, as most of them were found dry
+    query_shards(stubber, "flight", [(0, 0, 3), (1, 0, 3), (2, 0, 3)])
+
+    # WHEN seats are reserved
+    assert sharded.reserve_seats_on_flights([("flight", 3)]) == {"status": "SUCCESS"}
+
+    # THEN the flight should be remembered sharded, so later reservations go to its shards
+    assert sharded.flight_shards == {"flight": 3}
+
+
+def test_reserve_missing_shard(sharded, stub):
+    # GIVEN a flight known to be sharded, one of its shards missing
+    sharded.flight_shards["flight"] = 2
+    stubber = stub(sharded)
+    cancel_transaction(
+        stubber, [shard_update("flight", 0, 1)], [{"Code": "ConditionalCheckFailed"}]
+    )
+
+    # WHEN seats are reserved
+    # THEN it should fail, rather than fall back to the flight item whose seats were moved
+    with pytest.raises(sharded.FlightReservationException) as e:
+        sharded.reserve_seats_on_flights([("flight", 1)])
+
+    assert e.value.failures == [{"flightId": "flight", "seats": 1, "reason": "MISSING_SHARD"}]
+
+
+def test_rebalance_flight_inventory_conflict(sharded, stub):
+    # GIVEN shards that change while being rebalanced
+    stubber = stub(sharded)
+    query_shards(stubber, "flight", [(0, 4, 5), (1, 0, 5)])
+    cancel_transaction(
+        stubber,
+        [rebalance_update("flight", 0, 4, 2), rebalance_update("flight", 1, 0, 2)],
+        [{"Code": "ConditionalCheckFailed"}, {"Code": "None"}],
+    )
+
+    # WHEN rebalanced
+    # THEN nothing should be moved, for the next reservation to try again
+    assert sharded.rebalance_flight_inventory("flight") is False
+
+
+def test_rebalance_flight_inventory_balanced(sharded, stub):
+    # GIVEN shards already even
+    stubber = stub(sharded)
+    query_shards(stubber, "flight", [(0, 2, 5), (1, 1, 5)])
+
+    # WHEN rebalanced
+    # THEN no write should be made
+    assert sharded.rebalance_flight_inventory("flight") is True
+
+
+def test_shard_flight_inventory_moves_seats_to_shards(sharded, stub):
+    # GIVEN a flight with seats left on its item
+    stubber = stub(sharded)
+    query_shards(stubber, "flight", [])
+    stubber.add_response(
+        "get_item",
+        {"Item": {"seatCapacity": {"N": "5"}, "maximumSeating": {"N": "8"}}},
+        {
+            "TableName": "Flight",
+            "Key": {"id": "flight"},
+            "ProjectionExpression": "seatCapacity, maximumSeating",
+            "ConsistentRead": True,
+        },
+    )
+
+    # THEN seats should be split across INVENTORY_SHARDS shards, and taken off the flight item
+    # marked sharded, in the same transaction
+    stubber.add_response(
+        "transact_write_items",
+        {},
+        {
+            "TransactItems": [
+                {
+                    "Update": {
+                        "TableName": "Flight",
+                        "Key": {"id": "flight"},
+                        "ConditionExpression": (
+                            "attribute_not_exists(#shards) "
+                            "AND seatCapacity = :seats AND maximumSeating = :maximum"
+                        ),
+                        "UpdateExpression": "SET seatCapacity = :sharded, #shards = :shards",
+                        "ExpressionAttributeNames": {"#shards": "shards"},
+                        "ExpressionAttributeValues": {
+                            ":seats": 5,
+                            ":maximum": 8,
+                            ":sharded": 0,
+                            ":shards": 2,
+                        },
+                    }
+                },
+                {
+                    "Put": {
+                        "TableName": "SeatInventory",
+                        "Item": {
+                            "flightId": "flight",
+                            "shard": 0,
+                            "seatCapacity": 3,
+                            "maximumSeating": 4,
+                        },
+                        "ConditionExpression": "attribute_not_exists(flightId)",
+                    }
+                },
+                {
+                    "Put": {
+                        "TableName": "SeatInventory",
+                        "Item": {
+                            "flightId": "flight",
+                            "shard": 1,
+                            "seatCapacity": 2,
+                            "maximumSeating": 4,
+                        },
+                        "ConditionExpression": "attribute_not_exists(flightId)",
+                    }
+                },
+            ]
+        },
+    )
+
+    # WHEN sharded
+    sharded.shard_flight_inventory("flight")
+
+
+@pytest.fixture
+def holds(load_function):
+    return load_function("reserve-flight", "reserve", SEAT_HOLD_TABLE_NAME="SeatHold")
+
+
+def hold_put(hold_id, allocations):
+    return {
+        "Put": {
+            "TableName": "SeatHold",
+            "Item": {
+                "id": hold_id,
+                "status": "HELD",
+                "expiresAt": ANY,
+                "heldBucket": ANY,
+                "allocations": allocations,
+            },
+            "ConditionExpression": "attribute_not_exists(id)",
+            "ReturnValuesOnConditionCheckFailure": "ALL_OLD",
+        }
+    }
+
+
+def existing_hold(status, expires_at):
+    return {
+        "id": {"S": "hold"},
+        "status": {"S": status},
+        "expiresAt": {"N": str(expires_at)},
+    }
+
+
+def test_hold_seats_takes_seats_with_hold(holds, stub):
+    # GIVEN seats requested on a flight with a hold ID
+    stubber = stub(holds)
+
+    # THEN the hold should be created with the flight it takes seats from, in the same transaction
+    stubber.add_response(
+        "transact_write_items",
+        {},
+        {
+            "TransactItems": [
+                flight_update("flight", 2),
+                hold_put("hold", [{"flightId": "flight", "seats": 2}]),
+            ]
+        },
+    )
+
+    # WHEN seats are held
+    ret = holds.hold_seats_on_flights([("flight", 2)], "hold", hold_seconds=60)
+
+    assert ret["status"] == "SUCCESS"
+    assert ret["holdId"] == "hold"
+    assert ret["expiresAt"] > time.time()
+
+
+def test_hold_seats_retry_returns_existing_hold(holds, stub):
+    # GIVEN a hold created by an earlier attempt, still held
+    stubber = stub(holds)
+    expires_at = int(time.time()) + 60
+    cancel_transaction(
+        stubber,
+        [flight_update("flight", 1), hold_put("hold", [{"flightId": "flight", "seats": 1}])],
+        [
+            {"Code": "None"},
+            {"Code": "ConditionalCheckFailed", "Item": existing_hold("HELD", expires_at)},
+        ],
+    )
+
+    # WHEN seats are held again with the same ID
+    # THEN the existing hold should be returned, without taking seats again
+    assert holds.hold_seats_on_flights([("flight", 1)], "hold") == {
+        "status": "SUCCESS",
+        "holdId": "hold",
+        "expiresAt": expires_at,
+    }
+
+
+@pytest.mark.parametrize("status, expires_in", [("EXPIRED", 60), ("HELD", -60)])
+def test_hold_seats_retry_expired_hold(holds, stub, status, expires_in):
+    # GIVEN a hold created by an earlier attempt that expired, whether swept already or not
+    stubber = stub(holds)
+    cancel_transaction(
+        stubber,
+        [flight_update("flight", 1), hold_put("hold", [{"flightId": "flight", "seats": 1}])],
+        [
+            {"Code": "None"},
+            {
+                "Code": "ConditionalCheckFailed",
+                "Item": existing_hold(status, int(time.time()) + expires_in),
+            },
+        ],
+    )
+
+    # WHEN seats are held again with the same ID
+    # THEN it should fail rather than return an expiry in the past
+    with pytest.raises(holds.SeatHoldExpiredException):
+        holds.hold_seats_on_flights([("flight", 1)], "hold")
+
+
+def test_hold_seats_retry_on_flight_sold_out_by_hold(holds, stub):
+    # GIVEN an earlier attempt that held the last seat, though it looked failed
+    stubber = stub(holds)
+    expires_at = int(time.time()) + 60
+    cancel_transaction(
+        stubber,
+        [flight_update("flight", 1), hold_put("hold", [{"flightId": "flight", "seats": 1}])],
+        [
+            {"Code": "ConditionalCheckFailed", "Item": {"seatCapacity": {"N": "0"}}},
+            {"Code": "None"},
+        ],
+    )
+    stubber.add_response(
+        "get_item",
+        {"Item": existing_hold("HELD", expires_at)},
+        {"TableName": "SeatHold", "Key": {"id": "hold"}, "ConsistentRead": True},
+    )
+
+    # WHEN seats are held again with the same ID
+    # THEN the existing hold should be returned, rather than the flight being fully booked
+    assert holds.hold_seats_on_flights([("flight", 1)], "hold")["expiresAt"] == expires_at
+
+
+def confirm_hold(stubber, hold_id, item=None):
+    expected_params = {
+        "TableName": "SeatHold",
+        "Key": {"id": hold_id},
+        "ConditionExpression": "#status = :held AND expiresAt > :now",
+        "UpdateExpression": "SET #status = :confirmed REMOVE heldBucket",
+        "ExpressionAttributeNames": {"#status": "status"},
+        "ExpressionAttributeValues": {":held": "HELD", ":confirmed": "CONFIRMED", ":now": ANY},
+        "ReturnValuesOnConditionCheckFailure": "ALL_OLD",
+    }
+    if item is False:
+        stubber.add_response("update_item", {}, expected_params)
+    else:
+        stubber.add_client_error(
+            "update_item",
+            service_error_code="ConditionalCheckFailedException",
+            expected_params=expected_params,
+            modeled_fields={"Item": item} if item else None,
+        )
+
+
+def test_confirm_seat_hold(holds, stub):
+    # GIVEN a hold still held
+    stubber = stub(holds)
+    confirm_hold(stubber, "hold", item=False)
+
+    # WHEN confirmed
+    # THEN it should be confirmed, leaving the index swept for expired holds
+    assert holds.confirm_seat_hold("hold") == {"status": "SUCCESS"}
+
+
+def test_confirm_seat_hold_already_confirmed(holds, stub):
+    # GIVEN a hold confirmed already, e.g. by an earlier attempt
+    stubber = stub(holds)
+    confirm_hold(stubber, "hold", item=existing_hold("CONFIRMED", int(time.time()) - 60))
+
+    # WHEN confirmed again
+    # THEN it should succeed
+    assert holds.confirm_seat_hold("hold") == {"status": "SUCCESS"}
+
+
+@pytest.mark.parametrize(
+    "item, exception",
+    [
+        (existing_hold("HELD", 0), "SeatHoldExpiredException"),
+        (existing_hold("EXPIRED", 0), "SeatHoldExpiredException"),
+        (None, "SeatHoldDoesNotExistException"),
+    ],
+)
+def test_confirm_seat_hold_fails(holds, stub, item, exception):
+    # GIVEN a hold that expired, swept or not, or that doesn't exist
+    stubber = stub(holds)
+    confirm_hold(stubber, "hold", item=item)
+
+    # WHEN confirmed
+    # THEN it should fail, as its seats are or will be reclaimed
+    with pytest.raises(getattr(holds, exception)):
+        holds.confirm_seat_hold("hold")
+
+
+def test_reservation_exception_pickle_and_copy(reserve, monkeypatch):
+    # GIVEN a reservation exception carrying failures
+    # WHEN pickled, e.g. across processes, or copied
+    # THEN its message and failures should be kept
+    monkeypatch.setitem(sys.modules, "reserve", reserve)
+    failures = [{"flightId": "flight", "seats": 1, "reason": "FULLY_BOOKED"}]
+    err = reserve.FlightFullyBookedException("Flight is fully booked", failures=failures)
+
+    for restored in (pickle.loads(pickle.dumps(err)), copy.copy(err)):
+        assert type(restored) is reserve.FlightFullyBookedException
+        assert str(restored) == "Flight is fully booked"
+        assert restored.failures == failures
+
+
+def test_seat_hold_exists_pickle_and_copy(holds, monkeypatch):
+    # GIVEN an exception raised on an existing hold
+    # WHEN pickled or copied
+    # THEN the existing hold should be kept
+    monkeypatch.setitem(sys.modules, "reserve", holds)
+    err = holds.SeatHoldExistsException("Seat hold exists", hold={"id": "hold"})
+
+    for restored in (pickle.loads(pickle.dumps(err)), copy.copy(err)):
+        assert str(restored) == "Seat hold exists"
+        assert restored.hold == {"id": "hold"}
+        assert restored.failures == []
@@ -1,19 +1,29 @@
 import os
 
-import requests
+from lambda_python_powertools.helper.cold_start import cold_start
+from lambda_python_powertools.helper.validation import EventField, EventSchema, EventValidationError
+from lambda_python_powertools.logging import logger_inject_process_booking_sfn, logger_setup
+from lambda_python_powertools.metrics import MetricRegistry, Metrics, MetricUnit
+from lambda_python_powertools.tracing import Profiler, Tracer
 
-from lambda_python_powertools.logging import (
-    MetricUnit,
-    log_metric,
-    logger_inject_process_booking_sfn,
-    logger_setup,
-)
-from lambda_python_powertools.tracing import Tracer
-
-logger = logger_setup()
-tracer = Tracer()
+requests = cold_start.import_module("requests")
 
-_cold_start = True
+logger = logger_setup(
+    max_record_bytes=4096, keep_fields=("operation", "details.response_status_code")
+)
+metrics = Metrics(capture_cold_start=True)
+tracer = Tracer(patch_modules=["requests"], profiler=Profiler(metrics=metrics))
+registry = MetricRegistry(metrics=metrics)
+invalid_payment_request_metric = registry.define(
+    "InvalidPaymentRequest", MetricUnit.Count, dimensions=("operation",)
+)
+successful_payment_metric = registry.define("SuccessfulPayment", MetricUnit.Count)
+failed_payment_metric = registry.define("FailedPayment", MetricUnit.Count)
+collect_payment_event = EventSchema(
+    "CollectPaymentEvent",
+    charge_id=EventField("chargeId"),
+    customer_id=EventField("customerId", required=False),
+)
 
 # Payment API Capture URL to collect payment(i.e. https://endpoint/capture)
 payment_endpoint = os.getenv("PAYMENT_API_URL")
@@ -60,7 +70,7 @@ def collect_payment(charge_id):
         ret.raise_for_status()
         logger.info(
             {
-                "operations": "collect_payment",
+                "operation": "collect_payment",
                 "details": {
                     "response_headers": ret.headers,
                     "response_payload": ret.json(),
@@ -72,7 +82,7 @@ def collect_payment(charge_id):
         payment_response = ret.json()
 
         logger.debug("Adding collect payment operation result as tracing metadata")
-        tracer.put_metadata(charge_id, ret)
+        tracer.put_metadata(charge_id, payment_response)
 
         return {
             "receiptUrl": payment_response["capturedCharge"]["receipt_url"],
@@ -83,6 +93,7 @@ def collect_payment(charge_id):
         raise PaymentException(status_code=ret.status_code, details=err)
 
 
+@metrics.log_metrics
 @tracer.capture_lambda_handler(process_booking_sfn=True)
 @logger_inject_process_booking_sfn
 def lambda_handler(event, context):
@@ -114,40 +125,29 @@ def lambda_handler(event, context):
     BookingConfirmationException
         Booking Confirmation Exception including error message upon failure
     """
-    global _cold_start
-    if _cold_start:
-        log_metric(
-            name="ColdStart", unit=MetricUnit.Count, value=1, function_name=context.function_name
-        )
-        _cold_start = False
-
-    pre_authorization_token = event.get("chargeId")
-    customer_id = event.get("customerId")
-
-    if not pre_authorization_token:
-        log_metric(
-            name="InvalidPaymentRequest",
-            unit=MetricUnit.Count,
-            value=1,
-            operation="collect_payment",
-        )
-        logger.error({"operation": "invalid_event", "details": event})
-        raise ValueError("Invalid Charge ID")
+    try:
+        pre_authorization_token, customer_id = collect_payment_event.validate(event)
+    except EventValidationError as err:
+        invalid_payment_request_metric.emit(1, operation="collect_payment")
+        logger.error({"operation": "invalid_event", "details": event, "errors": err.errors})
+        raise
 
     try:
         logger.debug(
-            f"Collecting payment from customer {customer_id} using {pre_authorization_token} token"
+            "Collecting payment from customer %s using %s token",
+            customer_id,
+            pre_authorization_token,
         )
         ret = collect_payment(pre_authorization_token)
 
-        log_metric(name="SuccessfulPayment", unit=MetricUnit.Count, value=1)
+        successful_payment_metric.emit(1)
         logger.debug("Adding Payment Status annotation")
         tracer.put_annotation("PaymentStatus", "SUCCESS")
 
         # Step Functions can append multiple values if you return a single dict
         return ret
     except PaymentException as err:
-        log_metric(name="FailedPayment", unit=MetricUnit.Count, value=1)
+        failed_payment_metric.emit(1)
         logger.debug("Adding Payment Status annotation before raising error")
         tracer.put_annotation("PaymentStatus", "FAILED")
         logger.error({"operation": "collect_payment", "details": err})
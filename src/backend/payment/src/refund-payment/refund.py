@@ -1,24 +1,34 @@
 import os
 
-import requests
+from lambda_python_powertools.helper.cold_start import cold_start
+from lambda_python_powertools.helper.validation import EventField, EventSchema, EventValidationError
+from lambda_python_powertools.logging import logger_inject_process_booking_sfn, logger_setup
+from lambda_python_powertools.metrics import MetricRegistry, Metrics, MetricUnit
+from lambda_python_powertools.tracing import Profiler, Tracer
 
-from lambda_python_powertools.logging import (
-    MetricUnit,
-    log_metric,
-    logger_inject_process_booking_sfn,
-    logger_setup,
-)
-from lambda_python_powertools.tracing import Tracer
+requests = cold_start.import_module("requests")
 
-logger = logger_setup()
-tracer = Tracer()
+logger = logger_setup(
+    max_record_bytes=4096, keep_fields=("operation", "details.response_status_code")
+)
+metrics = Metrics(capture_cold_start=True)
+tracer = Tracer(patch_modules=["requests"], profiler=Profiler(metrics=metrics))
+registry = MetricRegistry(metrics=metrics)
+invalid_payment_request_metric = registry.define(
+    "InvalidPaymentRequest", MetricUnit.Count, dimensions=("operation",)
+)
+successful_refund_metric = registry.define("SuccessfulRefund", MetricUnit.Count)
+failed_refund_metric = registry.define("FailedRefund", MetricUnit.Count)
+refund_payment_event = EventSchema(
+    "RefundPaymentEvent",
+    charge_id=EventField("chargeId"),
+    customer_id=EventField("customerId", required=False),
+)
 
 
 # Payment API Capture URL to collect payment(i.e. https://endpoint/capture)
 payment_endpoint = os.getenv("PAYMENT_API_URL")
 
-_cold_start = True
-
 
 class RefundException(Exception):
     def __init__(self, message=None, status_code=None, details=None):
@@ -59,7 +69,7 @@ def refund_payment(charge_id):
         ret.raise_for_status()
         logger.info(
             {
-                "operations": "refund_payment",
+                "operation": "refund_payment",
                 "details": {
                     "response_headers": ret.headers,
                     "response_payload": ret.json(),
@@ -79,6 +89,7 @@ def refund_payment(charge_id):
         raise RefundException(status_code=ret.status_code, details=err)
 
 
+@metrics.log_metrics
 @tracer.capture_lambda_handler(process_booking_sfn=True)
 @logger_inject_process_booking_sfn
 def lambda_handler(event, context):
@@ -107,35 +118,26 @@ def lambda_handler(event, context):
         Refund Exception including error message upon failure
     """
 
-    global _cold_start
-    if _cold_start:
-        log_metric(
-            name="ColdStart", unit=MetricUnit.Count, value=1, function_name=context.function_name
-        )
-        _cold_start = False
-
-    payment_token = event.get("chargeId")
-    customer_id = event.get("customerId")
-
-    if not payment_token:
-        log_metric(
-            name="InvalidPaymentRequest", unit=MetricUnit.Count, value=1, operation="refund_payment"
-        )
-        logger.error({"operation": "invalid_event", "details": event})
-        raise ValueError("Invalid Charge ID")
+    try:
+        payment_token, customer_id = refund_payment_event.validate(event)
+    except EventValidationError as err:
+        invalid_payment_request_metric.emit(1, operation="refund_payment")
+        logger.error({"operation": "invalid_event", "details": event, "errors": err.errors})
+        raise
 
     try:
-        logger.debug(f"Refunding payment from customer {customer_id} using {payment_token} token")
+        logger.debug(
+            "Refunding payment from customer %s using %s token", customer_id, payment_token
+        )
         ret = refund_payment(payment_token)
 
-        log_metric(name="SuccessfulRefund", unit=MetricUnit.Count, value=1)
+        successful_refund_metric.emit(1)
         logger.debug("Adding Payment Refund Status annotation")
-        tracer.put_annotation("Refund", ret["refundId"])
-        tracer.put_annotation("PaymentStatus", "REFUNDED")
+        tracer.put_annotations({"Refund": ret["refundId"], "PaymentStatus": "REFUNDED"})
 
         return ret
     except RefundException as err:
-        log_metric(name="FailedRefund", unit=MetricUnit.Count, value=1)
+        failed_refund_metric.emit(1)
         logger.debug("Adding Payment Refund Status annotation before raising error")
         tracer.put_annotation("RefundStatus", "FAILED")
         logger.error({"operation": "refund_payment", "details": err})
@@ -0,0 +1,125 @@
+"""Cold start and init phase tracking shared by logging, metrics and tracing utilities
+
+Lambda runs module level code (init phase) once per execution environment,
+so the first invocation handled by a container is a cold start.
+
+A single tracker is shared by every powertools decorator wrapping a handler,
+so they all agree on whether the current invocation is a cold start
+regardless of how many of them are stacked.
+"""
+
+import contextlib
+import importlib
+import time
+from types import ModuleType
+from typing import Dict, Union
+
+# Powertools is imported during init phase, so this approximates when init started
+INIT_STARTED_AT = time.perf_counter()
+
+
+class ColdStartTracker:
+    """Tracks init phase duration, init steps and whether an invocation is a cold start
+
+    Init steps (e.g. imports, boto3 session, DynamoDB table) are timed once
+    during init phase, and emitted on the first invocation by
+    `Metrics(capture_cold_start=True)`, `Tracer.capture_lambda_handler` and logger inject decorators.
+
+    Example
+    -------
+    Times init steps of a Lambda function
+
+        >>> from lambda_python_powertools.helper.cold_start import cold_start
+        >>> requests = cold_start.import_module("requests")
+        >>>
+        >>> with cold_start.timed("boto3_session"):
+                session = boto3.Session()
+
+    Parameters
+    ----------
+    init_started_at : float, optional
+        `time.perf_counter` value when init phase started, by default now
+
+    Attributes
+    ----------
+    init_duration : Union[float, None]
+        milliseconds between init phase start and first invocation, None until first invocation
+    init_steps : Dict[str, float]
+        milliseconds taken by each init step
+    invocations : int
+        number of invocations handled so far
+    """
+
+    def __init__(self, init_started_at: float = None):
+        self.init_started_at = init_started_at or time.perf_counter()
+        self.init_duration: Union[float, None] = None
+        self.init_steps: Dict[str, float] = {}
+        self.invocations = 0
+        self.depth = 0
+
+    @property
+    def is_cold_start(self) -> bool:
+        """Whether current, or last, invocation is the first one handled by this container"""
+        return self.invocations == 1
+
+    @contextlib.contextmanager
+    def timed(self, step: str):
+        """Context manager timing an init step, only the first time it runs
+
+        Parameters
+        ----------
+        step : str
+            init step name (e.g. "boto3_session")
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.init_steps.setdefault(step, round((time.perf_counter() - start) * 1000, 3))
+
+    def import_module(self, name: str) -> ModuleType:
+        """Imports a module timing it as an init step named after the module
+
+        Parameters
+        ----------
+        name : str
+            module name (e.g. "requests")
+
+        Returns
+        -------
+        ModuleType
+            Imported module
+        """
+        with self.timed(name):
+            return importlib.import_module(name)
+
+    def invocation_begin(self) -> bool:
+        """Marks an invocation as started, returning whether it's a cold start
+
+        Nested calls made by stacked decorators within the same invocation
+        aren't counted as new invocations
+
+        Returns
+        -------
+        bool
+            Whether this invocation is a cold start
+        """
+        if self.depth == 0:
+            self.invocations += 1
+            if self.invocations == 1:
+                self.init_duration = round((time.perf_counter() - self.init_started_at) * 1000, 3)
+
+        self.depth += 1
+
+        return self.is_cold_start
+
+    def invocation_end(self):
+        """Marks an invocation, or a nested decorator call, as finished"""
+        self.depth = max(self.depth - 1, 0)
+
+    def reset(self):
+        """Starts tracking as if container had just been initialized, e.g. in tests"""
+        self.__init__()
+
+
+cold_start = ColdStartTracker(init_started_at=INIT_STARTED_AT)
@@ -3,14 +3,18 @@ that provide classes as data representation for
 key data used in more than one place.
 """
 
-from dataclasses import dataclass
 from enum import Enum
-from typing import Dict, Union
+from typing import Any, Dict, NamedTuple, Tuple, Union
 
+from .cold_start import cold_start
 
-@dataclass
-class LambdaContextModel:
-    """A handful of Lambda Runtime Context fields
+
+class InvocationContext(NamedTuple):
+    """Lambda Runtime Context and Process Booking State Machine fields of an invocation
+
+    Built once per invocation by `build_invocation_context`, and shared by logger
+    and Tracer decorators as well as handler code via `current_invocation_context`.
+    Being a NamedTuple, it's immutable and has no per-instance `__dict__`.
 
     Full Lambda Context object: https://docs.aws.amazon.com/lambda/latest/dg/python-context-object.html
 
@@ -36,99 +40,139 @@ class LambdaContextModel:
     function_request_id: str
         Lambda function unique request id, by default "UNDEFINED"
         e.g. "52fdfc07-2182-154f-163f-5f0f9a621d72"
+    customer_id: str
+        Unique customer identifier, by default None
+    booking_id: str
+        Unique booking identifier, by default None
+    charge_id: str
+        Payment token identifier, by default None
+    outbound_flight_id: str
+        Unique flight identifier, by default None
+    state_machine_execution_id: str
+        Unique process booking state machine execution identifier, by default None
     """
 
     function_name: str = "UNDEFINED"
     function_memory_size: str = "UNDEFINED"
     function_arn: str = "UNDEFINED"
     function_request_id: str = "UNDEFINED"
+    customer_id: str = None
+    booking_id: str = None
+    charge_id: str = None
+    outbound_flight_id: str = None
+    state_machine_execution_id: str = None
 
+    def lambda_context_fields(self) -> Dict[str, str]:
+        """Lambda Runtime Context fields by name"""
+        return dict(zip(self._fields[:4], self[:4]))
 
-@dataclass
-class ProcessBookingModel:
-    """Process Booking State Machine Input model
+    def process_booking_fields(self) -> Dict[str, str]:
+        """Process Booking State Machine fields by name"""
+        return dict(zip(self._fields[4:], self[4:]))
 
-    Selection of important keys used across logging and tracing
 
-    Parameters
-    ----------
-    customer_id: str
-        Unique customer identifier, by default "UNDEFINED"
-    booking_id: str
-        Unique booking identifier, by default "UNDEFINED"
-    charge_id: str
-        Payment token identifier, by default "UNDEFINED"
-    outbound_flight_id: str
-        Unique flight identifier, by default "UNDEFINED"
-    state_machine_execution_id: str
-        Unique process booking state machine execution identifier, by default "UNDEFINED"
-    """
+# Function ARN and its name, memory and ARN, which never change within a container
+_function_context: Tuple[Any, Tuple[str, ...]] = (None, ())
 
-    outbound_flight_id: str = "UNDEFINED"
-    customer_id: str = "UNDEFINED"
-    charge_id: str = "UNDEFINED"
-    state_machine_execution_id: str = "UNDEFINED"
-    booking_id: str = "UNDEFINED"
+# Event, Lambda context, invocation number and invocation context last built
+_invocation_context_cache: Tuple[Any, Any, int, Union[InvocationContext, None]] = (
+    None,
+    None,
+    0,
+    None,
+)
 
 
-def build_process_booking_model(event: Dict) -> ProcessBookingModel:
-    """Collects important fields from Process Booking State Machine
-    and returns a object with default values if they're not present.
+def build_invocation_context(event: Any, context: object) -> InvocationContext:
+    """Collects Lambda Runtime Context and Process Booking State Machine fields
+    of the current invocation, with default values if they're not present.
+
+    Function name, memory and ARN are only collected once per container, and the
+    invocation context is built once per invocation, so stacked Tracer and logger
+    decorators share the same object rather than parsing event and context each.
 
     Parameters
     ----------
-    event : Dict
-        Process Booking state machine input
+    event : Any
+        Lambda event, Process Booking state machine input fields are collected from dict events
 
-        customer_id: string
+        customerId: string
             Unique customer identifier
-        booking_id: string
+        bookingId: string
             Unique booking identifier
-        charge_id: string
+        chargeId: string
             Payment token identifier
-        outbound_flight_id: string
+        outboundFlightId: string
             Unique flight identifier
-        state_machine_execution_id: string
+        name: string
             Unique process booking state machine execution identifier
+    context : object
+        Lambda context object
 
     Returns
     -------
-    ProcessBookingModel
-        Process Booking state machine
+    InvocationContext
+        Invocation context
     """
-    context = {
-        "customer_id": event.get("customerId"),
-        "booking_id": event.get("bookingId"),
-        "charge_id": event.get("chargeId"),
-        "outbound_flight_id": event.get("outboundFlightId"),
-        "state_machine_execution_id": event.get("name"),
-    }
+    global _function_context, _invocation_context_cache
+
+    cached_event, cached_context, invocation, invocation_context = _invocation_context_cache
+    if event is cached_event and context is cached_context and invocation == cold_start.invocations:
+        return invocation_context
+
+    function_arn = getattr(context, "invoked_function_arn", "UNDEFINED")
+    cached_arn, function_fields = _function_context
+    if function_arn != cached_arn or not function_fields:
+        memory_size = getattr(context, "memory_limit_in_mb", None)
+        function_fields = (
+            getattr(context, "function_name", "UNDEFINED"),
+            "UNDEFINED" if memory_size is None else str(memory_size),
+            function_arn,
+        )
+        _function_context = (function_arn, function_fields)
+
+    request_id = getattr(context, "aws_request_id", "UNDEFINED")
+    if isinstance(event, dict):
+        invocation_context = InvocationContext(
+            *function_fields,
+            request_id,
+            event.get("customerId"),
+            event.get("bookingId"),
+            event.get("chargeId"),
+            event.get("outboundFlightId"),
+            event.get("name"),
+        )
+    else:
+        invocation_context = InvocationContext(*function_fields, request_id)
 
-    return ProcessBookingModel(**context)
+    _invocation_context_cache = (event, context, cold_start.invocations, invocation_context)
 
+    return invocation_context
 
-def build_lambda_context_model(context: object) -> LambdaContextModel:
-    """Captures Lambda function runtime info to be used across all log statements
 
-    Parameters
-    ----------
-    context : object
-        Lambda context object
+def current_invocation_context() -> InvocationContext:
+    """Invocation context built by logger or Tracer decorators for the current invocation
+
+    Example
+    -------
+    Reads booking id parsed by decorators from Process Booking State Machine input
+
+        >>> from lambda_python_powertools.helper.models import current_invocation_context
+        >>> @tracer.capture_lambda_handler(process_booking_sfn=True)
+        >>> @logger_inject_process_booking_sfn
+        >>> def handler(event, context):
+                booking_id = current_invocation_context().booking_id
 
     Returns
     -------
-    LambdaContextModel
-        Lambda context only with select fields
+    InvocationContext
+        Invocation context, or one with default values if none was built for this invocation
     """
+    _, _, invocation, invocation_context = _invocation_context_cache
+    if invocation_context is None or invocation != cold_start.invocations:
+        return InvocationContext()
 
-    context = {
-        "function_name": context.function_name,
-        "function_memory_size": str(context.memory_limit_in_mb),
-        "function_arn": context.invoked_function_arn,
-        "function_request_id": context.aws_request_id,
-    }
-
-    return LambdaContextModel(**context)
+    return invocation_context
 
 
 class MetricUnit(Enum):
@@ -147,17 +191,24 @@ class MetricUnit(Enum):
     Terabits = "Terabits"
     Percent = "Percent"
     Count = "Count"
-    BytesPerSecond = "Second"
-    KilobytesPerSecond = "Second"
-    MegabytesPerSecond = "Second"
-    GigabytesPerSecond = "Second"
-    TerabytesPerSecond = "Second"
-    BitsPerSecond = "Second"
-    KilobitsPerSecond = "Second"
-    MegabitsPerSecond = "Second"
-    GigabitsPerSecond = "Second"
-    TerabitsPerSecond = "Second"
-    CountPerSecond = "Second"
+    BytesPerSecond = "Bytes/Second"
+    KilobytesPerSecond = "Kilobytes/Second"
+    MegabytesPerSecond = "Megabytes/Second"
+    GigabytesPerSecond = "Gigabytes/Second"
+    TerabytesPerSecond = "Terabytes/Second"
+    BitsPerSecond = "Bits/Second"
+    KilobitsPerSecond = "Kilobits/Second"
+    MegabitsPerSecond = "Megabits/Second"
+    GigabitsPerSecond = "Gigabits/Second"
+    TerabitsPerSecond = "Terabits/Second"
+    CountPerSecond = "Count/Second"
+
+
+# Case insensitive lookup by unit name (e.g. "bytespersecond") or CloudWatch value (e.g. "bytes/second")
+METRIC_UNITS_BY_NAME: Dict[str, MetricUnit] = {
+    **{unit.value.lower(): unit for unit in MetricUnit},
+    **{name.lower(): unit for name, unit in MetricUnit.__members__.items()},
+}
 
 
 def build_metric_unit_from_str(unit: Union[str, MetricUnit]) -> MetricUnit:
@@ -176,14 +227,11 @@ def build_metric_unit_from_str(unit: Union[str, MetricUnit]) -> MetricUnit:
     if isinstance(unit, MetricUnit):
         return unit
 
-    if isinstance(unit, str):
-        unit = unit.lower().capitalize()
-
     metric_unit = None
 
     try:
-        metric_unit = MetricUnit[unit]
-    except (TypeError, KeyError):
+        metric_unit = METRIC_UNITS_BY_NAME[unit.lower()]
+    except (AttributeError, KeyError):
         metric_units = [units for units, _ in MetricUnit.__members__.items()]
         raise ValueError(
             f"Invalid Metric Unit - Received {unit}. Value Metric Units are {metric_units}"
@@ -0,0 +1,147 @@
+"""JSON serialization shared by logging and metrics utilities
+
+Uses orjson when installed (`pip install lambda_python_powertools[fast]`)
+and falls back to the standard library otherwise.
+
+Types commonly logged by Airline functions (e.g. botocore ClientError,
+requests CaseInsensitiveDict headers, DynamoDB Decimal) have dedicated encoders
+so they're serialized without reflection, and anything else is cast to `str`
+so a log statement never fails to be serialized.
+"""
+
+import datetime
+import json
+from decimal import Decimal
+from typing import Any, Callable, Dict
+
+try:
+    import orjson
+
+    ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+except ImportError:  # pragma: no cover
+    orjson = None
+
+ENCODERS: Dict[type, Callable[[Any], Any]] = {}
+
+# Encoders resolved by `json_default` for exact types, kept apart from registered ones
+# so registering an encoder only invalidates what was resolved rather than registered
+_CACHED_ENCODERS: Dict[type, Callable[[Any], Any]] = {}
+
+
+def register_encoder(cls: type, encoder: Callable[[Any], Any]):
+    """Registers a JSON encoder for a type and its subclasses
+
+    Example
+    -------
+    Serializes a custom Booking class as a dict
+
+        >>> from lambda_python_powertools.helper.serializer import register_encoder
+        >>> register_encoder(Booking, lambda booking: {"id": booking.id, "status": booking.status})
+
+    Parameters
+    ----------
+    cls : type
+        Type to be serialized with given encoder
+    encoder : Callable[[Any], Any]
+        Callable returning a JSON serializable value
+    """
+    ENCODERS[cls] = encoder
+
+    # Drop encoders resolved for subclasses that may now resolve to this encoder
+    for cached_cls in list(_CACHED_ENCODERS):
+        if issubclass(cached_cls, cls):
+            del _CACHED_ENCODERS[cached_cls]
+
+
+def json_default(obj: Any) -> Any:
+    """Encodes values unsupported by JSON backends using registered encoders, or `str`
+
+    Encoders are looked up by exact type first, then through the type MRO
+    and cached for the exact type so subsequent lookups are a single dict access
+    """
+    obj_type = type(obj)
+    encoder = _CACHED_ENCODERS.get(obj_type)
+
+    if encoder is None:
+        encoder = _find_encoder(obj_type)
+        _CACHED_ENCODERS[obj_type] = encoder
+
+    return encoder(obj)
+
+
+def _find_encoder(obj_type: type) -> Callable[[Any], Any]:
+    """Finds the closest encoder registered for a type or its base classes, or `str`"""
+    for cls in obj_type.__mro__:
+        encoder = ENCODERS.get(cls) or NAMED_ENCODERS.get(f"{cls.__module__}.{cls.__qualname__}")
+        if encoder is not None:
+            return encoder
+
+    return str
+
+
+def json_dumps(obj: Any) -> str:
+    """Serializes to JSON using the fastest backend available
+
+    Falls back to the standard library should orjson reject a value
+    (e.g. integers larger than 64 bits). orjson is told to pass datetime,
+    date and time values on to registered encoders, so both backends
+    serialize them the same way.
+
+    Parameters
+    ----------
+    obj : Any
+        Value to serialize
+
+    Returns
+    -------
+    str
+        JSON document
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj, default=json_default, option=ORJSON_OPTIONS).decode()
+        except TypeError:
+            pass
+
+    return json.dumps(obj, default=json_default)
+
+
+def _encode_decimal(value: Decimal) -> Any:
+    """Encodes DynamoDB numbers as int whenever possible, and Infinity or NaN as strings"""
+    if not value.is_finite():
+        return str(value)
+
+    if value == value.to_integral_value():
+        return int(value)
+
+    return float(value)
+
+
+def _encode_client_error(err: Exception) -> Dict:
+    """Encodes botocore ClientError without its full response metadata"""
+    error = err.response.get("Error", {})
+    metadata = err.response.get("ResponseMetadata", {})
+
+    return {
+        "operation": err.operation_name,
+        "code": error.get("Code"),
+        "message": error.get("Message"),
+        "http_status_code": metadata.get("HTTPStatusCode"),
+        "request_id": metadata.get("RequestId"),
+    }
+
+
+register_encoder(Decimal, _encode_decimal)
+register_encoder(datetime.date, lambda value: value.isoformat())
+register_encoder(datetime.time, lambda value: value.isoformat())
+register_encoder(datetime.timedelta, lambda value: value.total_seconds())
+register_encoder(set, list)
+register_encoder(frozenset, list)
+register_encoder(bytes, lambda value: value.decode("utf-8", errors="replace"))
+
+
+# Registered by qualified name so botocore and requests aren't imported unless in use
+NAMED_ENCODERS: Dict[str, Callable[[Any], Any]] = {
+    "botocore.exceptions.ClientError": _encode_client_error,
+    "requests.structures.CaseInsensitiveDict": dict,
+}
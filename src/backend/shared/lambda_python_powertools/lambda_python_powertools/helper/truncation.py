@@ -0,0 +1,198 @@
+"""Size-bounded projection of structured data shared by logging and tracing utilities
+
+Values are walked once while an approximate JSON size is accumulated,
+so only what fits in the budget is ever converted to JSON-friendly types.
+Strings are cut and containers summarised once the budget runs out.
+"""
+
+from typing import Any, Collection, FrozenSet, Iterable, NamedTuple, Tuple
+
+from .serializer import json_default
+
+TRUNCATED_KEY = "__truncated__"
+MAX_DEPTH = 10
+
+# Room left for truncation markers, e.g. `"...[truncated 1234 chars]"`
+MARKER_SIZE = 32
+
+# Dotted paths of kept fields, and of dicts containing them
+KeepFields = Tuple[FrozenSet[str], FrozenSet[str]]
+
+
+class BoundedValue(NamedTuple):
+    """Value projected within a size budget
+
+    Parameters
+    ----------
+    value: Any
+        projected value, safe to be serialized
+    size: int
+        approximate size in bytes once serialized as JSON
+    truncations: int
+        number of strings cut or containers summarised, 0 if value was kept as-is
+    """
+
+    value: Any
+    size: int
+    truncations: int
+
+
+def bound_size(value: Any, max_bytes: int, keep_fields: Iterable[str] = ()) -> BoundedValue:
+    """Projects a value so that its JSON representation is approximately up to max_bytes
+
+    Fields listed in `keep_fields` are kept in full and accounted first, while
+    the remaining fields share what's left of the budget in their original order.
+
+    Example
+    -------
+    Caps a payment response to 1KB keeping its status code
+
+        >>> from lambda_python_powertools.helper.truncation import bound_size
+        >>> bounded = bound_size(
+                {"operation": "collect_payment", "details": {"response_status_code": 200, "headers": ...}},
+                max_bytes=1024,
+                keep_fields=("operation", "details.response_status_code"),
+            )
+        >>> bounded.value, bounded.truncations
+
+    Parameters
+    ----------
+    value : Any
+        Value to be projected
+    max_bytes : int
+        Approximate maximum size in bytes once serialized as JSON
+    keep_fields : Iterable[str], optional
+        Dotted paths of dict keys kept regardless of budget (e.g. "details.booking_id"), by default ()
+
+    Returns
+    -------
+    BoundedValue
+        Projected value, its approximate size and number of truncations
+    """
+    keep_fields = frozenset(keep_fields)
+    keep_ancestors = frozenset(
+        field.rsplit(".", depth)[0]
+        for field in keep_fields
+        for depth in range(1, field.count(".") + 1)
+    )
+
+    return _bound(value, max_bytes, (keep_fields, keep_ancestors), "", 0)
+
+
+def _bound(value: Any, budget: float, keep: KeepFields, path: str, depth: int) -> BoundedValue:
+    if value is None or isinstance(value, bool):
+        return BoundedValue(value, 5, 0)
+
+    if isinstance(value, (int, float)):
+        return BoundedValue(value, len(str(value)), 0)
+
+    if isinstance(value, str):
+        return _bound_str(value, budget)
+
+    if isinstance(value, dict):
+        return _bound_dict(value, budget, keep, path, depth)
+
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return _bound_list(list(value), budget, keep, path, depth)
+
+    # e.g. ClientError or CaseInsensitiveDict are converted with serializer encoders
+    return _bound(json_default(value), budget, keep, path, depth)
+
+
+def _bound_str(value: str, budget: float) -> BoundedValue:
+    size = len(value) + 2
+    if size <= budget:
+        return BoundedValue(value, size, 0)
+
+    kept = int(max(budget - MARKER_SIZE, 0))
+    truncated = f"{value[:kept]}...[truncated {len(value) - kept} chars]"
+
+    return BoundedValue(truncated, len(truncated) + 2, 1)
+
+
+def _bound_dict(
+    value: dict, budget: float, keep: KeepFields, path: str, depth: int
+) -> BoundedValue:
+    if depth >= MAX_DEPTH:
+        return _summarise(f"dict with {len(value)} keys")
+
+    kept_items, other_items = _partition(value, keep, path)
+
+    projected, size, truncations = {}, 2, 0
+
+    # Kept fields have no budget, while dicts containing kept fields get what's left
+    for key, item in kept_items:
+        key = str(key)
+        key_size = len(key) + 4
+        field = f"{path}{key}"
+        remaining = float("inf") if field in keep[0] else max(budget - size - key_size, 0)
+        bounded = _bound(item, remaining, keep, f"{field}.", depth + 1)
+        projected[key] = bounded.value
+        size += key_size + bounded.size
+        truncations += bounded.truncations
+
+    for position, (key, item) in enumerate(other_items):
+        key = str(key)
+        key_size = len(key) + 4
+        remaining = budget - size - key_size - MARKER_SIZE
+        if remaining <= 0:
+            projected[TRUNCATED_KEY] = f"{len(other_items) - position} more keys"
+            size += len(TRUNCATED_KEY) + MARKER_SIZE
+            truncations += 1
+            break
+
+        bounded = _bound(item, remaining, keep, f"{path}{key}.", depth + 1)
+        projected[key] = bounded.value
+        size += key_size + bounded.size
+        truncations += bounded.truncations
+
+    return BoundedValue(projected, size, truncations)
+
+
+def _bound_list(
+    value: list, budget: float, keep: KeepFields, path: str, depth: int
+) -> BoundedValue:
+    if depth >= MAX_DEPTH:
+        return _summarise(f"list with {len(value)} items")
+
+    projected, size, truncations = [], 2, 0
+
+    for position, item in enumerate(value):
+        remaining = budget - size - 1 - MARKER_SIZE
+        if remaining <= 0:
+            projected.append(f"{TRUNCATED_KEY} {len(value) - position} more items")
+            size += MARKER_SIZE
+            truncations += 1
+            break
+
+        bounded = _bound(item, remaining, keep, path, depth + 1)
+        projected.append(bounded.value)
+        size += bounded.size + 1
+        truncations += bounded.truncations
+
+    return BoundedValue(projected, size, truncations)
+
+
+def _partition(value: dict, keep: KeepFields, path: str) -> Tuple[Collection, Collection]:
+    """Splits dict items into kept fields, or dicts containing them, and the remaining ones
+
+    Items are only copied when there are fields to keep, so large dicts are walked
+    no further than their budget allows
+    """
+    keep_fields, keep_ancestors = keep
+    if not keep_fields:
+        return (), value.items()
+
+    kept, others = [], []
+    for key, item in value.items():
+        field = f"{path}{key}"
+        if field in keep_fields or field in keep_ancestors:
+            kept.append((key, item))
+        else:
+            others.append((key, item))
+
+    return kept, others
+
+
+def _summarise(summary: str) -> BoundedValue:
+    return BoundedValue(f"{TRUNCATED_KEY} {summary}", len(summary) + MARKER_SIZE, 1)
@@ -0,0 +1,200 @@
+"""Precompiled schemas validating Lambda events and extracting their typed fields in one pass
+
+When a schema is defined at import time, a validate function specialized to its fields
+is generated and compiled, as `collections.namedtuple` does for its classes. Valid events
+are then checked and extracted with straight line code, costing about as much as hand written
+checks, while any other goes through a loop over fields collecting every error found.
+"""
+
+from typing import Any, Callable, Dict, List, NamedTuple, Tuple, Type, Union
+
+# Marks a field absent from the event, as None can be a legitimate default
+_MISSING = object()
+
+
+class EventField(NamedTuple):
+    """Event field definition
+
+    Parameters
+    ----------
+    path : str
+        event key, or dot separated keys for nested fields (e.g. "payment.price")
+    types : Union[Type, Tuple[Type, ...]], optional
+        expected type(s) of the value, by default str
+    required : bool, optional
+        whether field must be present, not None nor an empty string, by default True
+    default : Any, optional
+        value used when an optional field is missing, by default None
+    """
+
+    path: str
+    types: Union[Type, Tuple[Type, ...]] = str
+    required: bool = True
+    default: Any = None
+
+
+class EventValidationError(ValueError):
+    """Raised when an event doesn't match its schema
+
+    Parameters
+    ----------
+    schema : str
+        schema name
+    errors : List[Dict[str, str]]
+        one error per invalid field, with the field path and why it's invalid
+        e.g. [{"field": "chargeId", "error": "missing"}]
+    """
+
+    def __init__(self, schema: str, errors: List[Dict[str, str]]):
+        # Both arguments are kept in args, so the exception can be pickled and copied
+        super().__init__(schema, errors)
+        self.schema = schema
+        self.errors = errors
+
+    def __str__(self) -> str:
+        return f"Invalid {self.schema} event - Received invalid fields {self.errors}"
+
+
+class EventSchema:
+    """Schema validating events and extracting their fields into a typed model
+
+    `validate(event)` returns a NamedTuple model with fields as attributes, and defaults
+    for optional fields missing, or raises `EventValidationError` listing every invalid field.
+
+    Example
+    -------
+    Validates Collect Payment events
+
+        >>> from lambda_python_powertools.helper.validation import EventField, EventSchema
+        >>> collect_payment_schema = EventSchema(
+                "CollectPaymentEvent",
+                charge_id=EventField("chargeId"),
+                customer_id=EventField("customerId", required=False),
+            )
+        >>>
+        >>> def handler(event, context):
+                payment = collect_payment_schema.validate(event)
+                collect_payment(payment.charge_id)
+
+    Parameters
+    ----------
+    name : str
+        schema name, also used as model name
+    fields : EventField
+        fields by model attribute name
+    """
+
+    def __init__(self, name: str, **fields: EventField):
+        self.name = name
+        self.model = NamedTuple(name, [(attribute, Any) for attribute in fields])
+        self.fields = tuple(
+            (field.path, tuple(field.path.split(".")), field.types, field.required, field.default)
+            for field in fields.values()
+        )
+        self.validate = self.__compile()
+
+    def __compile(self) -> Callable[[Any], Tuple]:
+        """Generates validate function extracting and checking every field inline
+
+        Events whose fields are of the expected type, or missing when optional, are returned
+        from generated code; any other goes through `__validate_fields` for errors.
+        """
+        namespace = {
+            "_new": tuple.__new__,
+            "_model": self.model,
+            "_fallback": self.__validate_fields,
+        }
+        lines = ["def validate(event):", "    if event.__class__ is dict:", "        try:"]
+        checks = []
+        defaults = []
+        for index, (_, keys, types, required, default) in enumerate(self.fields):
+            value = f"event.get({keys[0]!r})"
+            for key in keys[1:]:
+                value = f"({value} or _empty).get({key!r})"
+                namespace["_empty"] = {}
+
+            lines.append(f"            v{index} = {value}")
+            if types is str:
+                check = f"v{index}.__class__ is str"
+            else:
+                namespace[f"_types{index}"] = types
+                check = f"isinstance(v{index}, _types{index})"
+
+            if required:
+                checks.append(f"{check} and v{index} != ''")
+                continue
+
+            namespace[f"_default{index}"] = default
+            checks.append(f"({check} or v{index} is None)")
+            if types is str:
+                missing = f"not v{index}"
+            elif isinstance(types, tuple) and str in types:
+                missing = f"v{index} is None or v{index} == ''"
+            else:
+                missing = f"v{index} is None"
+            defaults += [
+                f"            if {missing}:",
+                f"                v{index} = _default{index}",
+            ]
+
+        values = ", ".join(f"v{index}" for index in range(len(self.fields)))
+        lines += [
+            "        except AttributeError:",
+            "            return _fallback(event)",
+            f"        if {' and '.join(checks) or 'True'}:",
+            *defaults,
+            f"            return _new(_model, ({values}{',' if len(self.fields) == 1 else ''}))",
+            "    return _fallback(event)",
+        ]
+
+        exec("\n".join(lines), namespace)
+        validate = namespace["validate"]
+        validate.__qualname__ = f"{self.name}.validate"
+
+        return validate
+
+    def __validate_fields(self, event: Any) -> Tuple:
+        """Validates an event field by field, collecting every error found
+
+        Parameters
+        ----------
+        event : Any
+            Lambda event
+
+        Returns
+        -------
+        Tuple
+            Model with fields as attributes, and defaults for optional fields missing
+
+        Raises
+        ------
+        EventValidationError
+            When event isn't a dict, or any of its fields is missing or of an unexpected type
+        """
+        if not isinstance(event, dict):
+            raise EventValidationError(
+                self.name,
+                [{"field": "", "error": f"expected dict, received {type(event).__name__}"}],
+            )
+
+        values = []
+        errors = []
+        for path, keys, types, required, default in self.fields:
+            value = event
+            for key in keys:
+                value = value.get(key, _MISSING) if isinstance(value, dict) else _MISSING
+
+            if value is _MISSING or value is None or value == "":
+                if required:
+                    errors.append({"field": path, "error": "missing"})
+                values.append(default)
+            elif isinstance(value, types):
+                values.append(value)
+            else:
+                errors.append({"field": path, "error": f"unexpected type {type(value).__name__}"})
+                values.append(default)
+
+        if errors:
+            raise EventValidationError(self.name, errors)
+
+        return self.model._make(values)
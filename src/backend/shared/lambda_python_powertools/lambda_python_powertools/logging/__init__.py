@@ -1,12 +1,16 @@
 """Logging utility
 """
 from ..helper.models import MetricUnit
+from .formatter import JsonFormatter, set_invocation_context
+from .lazy import LazyMessage
+from .limiter import LogSizeLimiter
 from .logger import (
     log_metric,
     logger_inject_lambda_context,
     logger_inject_process_booking_sfn,
     logger_setup,
 )
+from .writer import BatchingStreamHandler, flush_log_writer
 
 __all__ = [
     "logger_setup",
@@ -14,4 +18,10 @@ __all__ = [
     "logger_inject_process_booking_sfn",
     "log_metric",
     "MetricUnit",
+    "JsonFormatter",
+    "set_invocation_context",
+    "LazyMessage",
+    "LogSizeLimiter",
+    "BatchingStreamHandler",
+    "flush_log_writer",
 ]
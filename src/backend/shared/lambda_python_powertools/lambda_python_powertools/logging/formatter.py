@@ -0,0 +1,146 @@
+import functools
+import json
+import logging
+from contextvars import ContextVar
+from typing import Any, Dict, Tuple, Union
+
+from ..helper.models import InvocationContext, current_invocation_context
+from ..helper.serializer import json_dumps
+from .lazy import LazyMessage
+
+# None until decorators set a context, as a shared mutable default would leak keys across invocations
+invocation_context: ContextVar = ContextVar("invocation_context", default=None)
+
+# Invocation context last seen from a thread without context variable, and keys built from it
+_thread_context: Tuple[Union[InvocationContext, None], Union[Dict, None]] = (None, None)
+
+
+class JsonFormatter(logging.Formatter):
+    """AWS Lambda Logging formatter that also merges per-invocation context
+
+    Static keys (e.g. service) are given once when logger is setup and formatted
+    using `%` against the log record, in the same way aws_lambda_logging does.
+
+    Per-invocation keys (e.g. request id, booking id) are read from `invocation_context`
+    context variable on every record, so decorators only need to swap a dict
+    instead of rebuilding root handlers and formatters on every invocation.
+    Records logged from threads started by handler code, which don't inherit it,
+    get keys of the current invocation context instead, see `get_invocation_context`.
+
+    Records are serialized with powertools JSON serializer by default, which uses orjson when installed
+    and has dedicated encoders for types logged by Airline functions (e.g. ClientError, Decimal).
+
+    Parameters
+    ----------
+    json_serializer : Callable[[Dict], str], optional
+        Callable serializing a log record dict into a JSON string, by default `json_dumps`
+    json_default : Callable, optional
+        Formatter for otherwise unserialisable values using standard library json instead
+    kwargs
+        Additional static keys to be added in every log statement
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__()
+        json_serializer = kwargs.pop("json_serializer", None)
+        json_default = kwargs.pop("json_default", None)
+
+        if json_default is not None:
+            json_serializer = functools.partial(json.dumps, default=json_default)
+
+        self.json_serializer = json_serializer or json_dumps
+        self.format_dict = {
+            "timestamp": "%(asctime)s",
+            "level": "%(levelname)s",
+            "location": "%(name)s.%(funcName)s:%(lineno)d",
+        }
+        self.format_dict.update(kwargs)
+
+    def format(self, record: logging.LogRecord) -> str:
+        record_dict = record.__dict__.copy()
+        record_dict["asctime"] = self.formatTime(record)
+
+        log_dict = {k: v % record_dict for k, v in self.format_dict.items() if v}
+        context = get_invocation_context()
+        if context:
+            log_dict.update(context)
+        log_dict["message"] = self._format_message(record)
+
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+
+        if record.exc_text:
+            log_dict["exception"] = record.exc_text
+
+        return self.json_serializer(log_dict)
+
+    @staticmethod
+    def _format_message(record: logging.LogRecord) -> Any:
+        """Returns record message as-is if a dict, or decoded from JSON whenever possible
+
+        LazyMessage is built at this point, as the record is about to be emitted
+        """
+        if isinstance(record.msg, LazyMessage):
+            record.msg = record.msg.resolve()
+
+        if isinstance(record.msg, dict):
+            return record.msg
+
+        message = record.getMessage()
+        try:
+            return json.loads(message)
+        except (TypeError, ValueError):
+            return message
+
+
+def set_invocation_context(**context) -> Dict:
+    """Replaces per-invocation keys appended to every log statement
+
+    Keys without value are left out, as aws_lambda_logging did for static keys
+
+    Example
+    -------
+    Appends a customer id to every log statement until next invocation
+
+        >>> from lambda_python_powertools.logging import set_invocation_context
+        >>> set_invocation_context(customer_id="d749f277")
+
+    Returns
+    -------
+    Dict
+        Invocation context now in use
+    """
+    context = {key: value for key, value in context.items() if value is not None}
+    invocation_context.set(context)
+
+    return context
+
+
+def get_invocation_context() -> Union[Dict, None]:
+    """Returns per-invocation keys appended to log statements of the current thread
+
+    Threads don't inherit context variables, so records logged from threads started by
+    handler code (e.g. ThreadPoolExecutor workers) fall back to Lambda context and
+    Process Booking fields of `current_invocation_context`, without cold start or sampling rate.
+
+    Returns
+    -------
+    Union[Dict, None]
+        Invocation context in use, or None outside of an invocation
+    """
+    global _thread_context
+
+    context = invocation_context.get()
+    if context is not None:
+        return context
+
+    invocation = current_invocation_context()
+    cached_invocation, context = _thread_context
+    if invocation is not cached_invocation:
+        # Built once per invocation, so limiters caching its size by identity keep doing so
+        context = {key: value for key, value in invocation._asdict().items() if value is not None}
+        if invocation == InvocationContext():
+            context = None
+        _thread_context = (invocation, context)
+
+    return context
@@ -0,0 +1,44 @@
+from typing import Any, Callable
+
+
+class LazyMessage:
+    """Log message that is only built if the log record is going to be emitted
+
+    Standard logging skips disabled levels before a message is formatted, however
+    dicts and f-strings passed as messages are built by the caller regardless of the level.
+    LazyMessage defers building a message to the formatter, so `logger.debug` costs
+    a level check when DEBUG is off.
+
+    JsonFormatter resolves LazyMessage into a structured message (e.g. dict),
+    while any other formatter receives its string representation.
+
+    Example
+    -------
+    Logs structured details only when DEBUG is enabled
+
+        >>> from lambda_python_powertools.logging import LazyMessage, logger_setup
+        >>> logger = logger_setup(service="booking")
+        >>>
+        >>> logger.debug(LazyMessage(lambda: {"operation": "cancel_booking", "details": ret}))
+
+    Plain messages should use logging `%` arguments, which are lazy already
+
+        >>> logger.debug("Cancelling booking - %s", booking_id)
+
+    Parameters
+    ----------
+    factory : Callable[[], Any]
+        Callable returning log message, only called when record is formatted
+    """
+
+    __slots__ = ("factory",)
+
+    def __init__(self, factory: Callable[[], Any]):
+        self.factory = factory
+
+    def resolve(self) -> Any:
+        """Builds log message"""
+        return self.factory()
+
+    def __str__(self) -> str:
+        return str(self.resolve())
@@ -0,0 +1,100 @@
+import logging
+from typing import Dict, Iterable, Tuple, Union
+
+from ..helper.truncation import bound_size
+from .formatter import get_invocation_context
+from .lazy import LazyMessage
+
+# Room left for keys added by JsonFormatter (e.g. timestamp, level, location, service)
+RECORD_OVERHEAD = 256
+
+# Smallest budget given to a message regardless of invocation context size
+MIN_MESSAGE_BYTES = 256
+
+
+class LogSizeLimiter(logging.Filter):
+    """Logging filter capping log record messages to an approximate size in bytes
+
+    Messages are projected with `helper.truncation.bound_size` before they're formatted,
+    so only what fits in the budget is ever serialized: long strings are cut,
+    and dicts or lists are summarised once the budget runs out.
+    Fields listed in `keep_fields` are kept in full regardless of budget.
+
+    Budget accounts for per-invocation context and static keys added by JsonFormatter,
+    while exception tracebacks are left untouched.
+
+    Filters only apply to records logged through the logger they're added to,
+    and disabled levels are skipped before filtering so `logger.debug` remains a level check.
+
+    Example
+    -------
+    Caps log records from payment logger to 4KB while keeping operation and response status
+
+        >>> from lambda_python_powertools.logging import logger_setup
+        >>> logger = logger_setup(
+                service="payment",
+                max_record_bytes=4096,
+                keep_fields=("operation", "details.response_status_code")
+            )
+
+    Adds a limiter to any logger, and inspects how often records were truncated
+
+        >>> from lambda_python_powertools.logging import LogSizeLimiter
+        >>> limiter = LogSizeLimiter(max_bytes=4096)
+        >>> logger.addFilter(limiter)
+        >>> limiter.truncated_records, limiter.truncated_fields
+
+    Parameters
+    ----------
+    max_bytes : int
+        approximate maximum size in bytes of a log record once formatted
+    keep_fields : Iterable[str], optional
+        dotted paths of message keys kept regardless of budget (e.g. "details.booking_id"), by default ()
+
+    Attributes
+    ----------
+    truncated_records : int
+        number of records whose message was truncated
+    truncated_fields : int
+        number of strings cut or containers summarised across all records
+    """
+
+    def __init__(self, max_bytes: int, keep_fields: Iterable[str] = ()):
+        super().__init__()
+        self.max_bytes = max_bytes
+        self.keep_fields = tuple(keep_fields)
+        self.truncated_records = 0
+        self.truncated_fields = 0
+        self.context_size: Tuple[Union[Dict, None], int] = (None, 0)
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        message = record.msg
+        if isinstance(message, LazyMessage):
+            message = message.resolve()
+        elif record.args:
+            message = record.getMessage()
+
+        bounded = bound_size(message, self.__message_budget(), self.keep_fields)
+        if bounded.truncations:
+            self.truncated_records += 1
+            self.truncated_fields += bounded.truncations
+
+            record.msg, record.args = bounded.value, ()
+        elif message is not record.msg:
+            # Lazy or %-formatted message has been built already, so it's reused by formatters
+            record.msg, record.args = message, ()
+
+        return True
+
+    def __message_budget(self) -> int:
+        """Returns bytes left for a message once invocation context and static keys are accounted
+
+        Context size is cached until decorators set a new invocation context
+        """
+        context = get_invocation_context()
+        cached_context, size = self.context_size
+        if context is not cached_context:
+            size = bound_size(context, self.max_bytes).size if context else 0
+            self.context_size = (context, size)
+
+        return max(self.max_bytes - RECORD_OVERHEAD - size, MIN_MESSAGE_BYTES)
@@ -2,36 +2,56 @@ import functools
 import itertools
 import logging
 import os
+import random
+import sys
 from distutils.util import strtobool
-from typing import Any, Callable, Dict
+from typing import Any, Callable, Dict, Iterable, Union
 
 import aws_lambda_logging
 
-from ..helper.models import (
-    MetricUnit,
-    build_lambda_context_model,
-    build_metric_unit_from_str,
-    build_process_booking_model,
-)
+from ..helper.cold_start import cold_start
+from ..helper.models import MetricUnit, build_invocation_context, build_metric_unit_from_str
+from .formatter import JsonFormatter, set_invocation_context
+from .limiter import LogSizeLimiter
+from .writer import BatchingStreamHandler, flush_log_writer, install_log_writer, write_line
 
 logger = logging.getLogger(__name__)
 logger.setLevel(os.getenv("LOG_LEVEL", "INFO"))
 
-is_cold_start = True
+# Debug sampling configured by logger_setup and decided once per invocation by decorators
+log_sampling = {"logger": None, "level": "INFO", "rate": 0.0, "sampled": False}
 
 
-def logger_setup(service: str = "service_undefined", level: str = "INFO", **kwargs):
+def logger_setup(
+    service: str = "service_undefined",
+    level: str = "INFO",
+    sample_rate: float = 0.0,
+    batch_writes: bool = False,
+    max_record_bytes: int = None,
+    keep_fields: Iterable[str] = (),
+    **kwargs,
+):
     """Setups root logger to format statements in JSON.
 
     Includes service name and any additional key=value into logs
     It also accepts both service name or level explicitly via env vars
 
+    Root handlers and formatters are meant to be configured once per container (e.g. at import),
+    while per-invocation keys are injected by `logger_inject_lambda_context`
+    and `logger_inject_process_booking_sfn` decorators without re-running this setup
+
     Environment variables
     ---------------------
     POWERTOOLS_SERVICE_NAME : str
         service name
     LOG_LEVEL: str
         logging level (e.g. INFO, DEBUG)
+    POWERTOOLS_LOGGER_SAMPLE_RATE: float
+        fraction of invocations logged at DEBUG level (e.g. 0.1)
+    POWERTOOLS_LOGGER_BATCH_WRITES: str
+        write logs and metrics to stdout in batches from a background thread (e.g. "true", "True", "TRUE")
+    POWERTOOLS_LOGGER_MAX_RECORD_BYTES: int
+        approximate maximum size in bytes of log records from service logger (e.g. 4096)
 
     Parameters
     ----------
@@ -39,6 +59,19 @@ def logger_setup(service: str = "service_undefined", level: str = "INFO", **kwar
         service name to be appended in logs, by default "service_undefined"
     level : str, optional
         logging.level, by default "INFO"
+    sample_rate : float, optional
+        fraction of invocations logged at DEBUG level regardless of `level`, by default 0.0
+        sampling is decided once per invocation by logger inject decorators
+    batch_writes : bool, optional
+        replaces root handlers with a BatchingStreamHandler writing to stdout from a background thread,
+        by default False. Logger inject decorators flush it before handler returns
+    max_record_bytes : int, optional
+        adds a LogSizeLimiter to service logger truncating messages to fit approximately
+        in given size once formatted, by default None
+    keep_fields : Iterable[str], optional
+        dotted paths of message keys kept regardless of max_record_bytes, by default ()
+    json_serializer : Callable[[Dict], str], optional
+        Callable serializing log records into JSON, by default orjson if installed or standard library
 
     Example
     -------
@@ -59,14 +92,47 @@ def logger_setup(service: str = "service_undefined", level: str = "INFO", **kwar
         >>> def handler(event, context):
                 logger.info("Hello")
 
+    Setups structured logging in JSON with DEBUG level for 10% of invocations
+
+        $ export POWERTOOLS_LOGGER_SAMPLE_RATE="0.1"
+        >>> from lambda_python_powertools.logging import logger_setup, logger_inject_lambda_context
+        >>> logger = logger_setup()
+        >>>
+        >>> @logger_inject_lambda_context
+        >>> def handler(event, context):
+                logger.debug("Only logged in sampled invocations")
+
+    Setups structured logging in JSON capping records to 4KB but keeping their operation
+
+        >>> from lambda_python_powertools.logging import logger_setup
+        >>> logger = logger_setup(service="payment", max_record_bytes=4096, keep_fields=("operation",))
+
+    Raises
+    ------
+    ValueError
+        When sample rate is not a number between 0 and 1
     """
     service = os.getenv("POWERTOOLS_SERVICE_NAME") or service
     log_level = os.getenv("LOG_LEVEL") or level
+    sample_rate = float(os.getenv("POWERTOOLS_LOGGER_SAMPLE_RATE") or sample_rate)
+    if not 0 <= sample_rate <= 1:
+        raise ValueError(f"Invalid log sample rate - Received {sample_rate}. Value must be 0 to 1")
+
+    max_record_bytes = int(os.getenv("POWERTOOLS_LOGGER_MAX_RECORD_BYTES") or max_record_bytes or 0)
+
     logger = logging.getLogger(name=service)
     logger.setLevel(log_level)
+    log_sampling.update(logger=logger, level=log_level, rate=sample_rate, sampled=False)
+    __install_size_limiter(logger, max_bytes=max_record_bytes, keep_fields=keep_fields)
+
+    batch_writes_env_option = str(os.getenv("POWERTOOLS_LOGGER_BATCH_WRITES", "false"))
+    if strtobool(batch_writes_env_option) or batch_writes:
+        __install_batching_handler()
 
     # Patch logger by structuring its outputs as JSON
-    aws_lambda_logging.setup(level=log_level, service=service, **kwargs)
+    aws_lambda_logging.setup(
+        level=log_level, formatter_cls=JsonFormatter, service=service, **kwargs
+    )
 
     return logger
 
@@ -135,12 +201,21 @@ def logger_inject_lambda_context(
             logger.debug("Event received")
             logger.info(event)
 
-        lambda_context = build_lambda_context_model(context)
-        cold_start = __is_cold_start()
+        is_cold_start = cold_start.invocation_begin()
+        try:
+            invocation = build_invocation_context(event=event, context=context)
+            sampling_rate = __sample_log_level()
 
-        logger_setup(cold_start=cold_start, **lambda_context.__dict__)
+            set_invocation_context(
+                **__build_cold_start_context(is_cold_start),
+                sampling_rate=sampling_rate,
+                **invocation.lambda_context_fields(),
+            )
 
-        return lambda_handler(event, context)
+            return lambda_handler(event, context)
+        finally:
+            cold_start.invocation_end()
+            flush_log_writer()
 
     return decorate
 
@@ -174,36 +249,86 @@ def logger_inject_process_booking_sfn(lambda_handler: Callable[[Dict, Any], Any]
         logger.debug("Process booking event received")
         logger.debug(event)
 
-        lambda_context = build_lambda_context_model(context)
-        process_booking_context = build_process_booking_model(event)
-        cold_start = __is_cold_start()
+        is_cold_start = cold_start.invocation_begin()
+        try:
+            invocation = build_invocation_context(event=event, context=context)
+            sampling_rate = __sample_log_level()
 
-        logger_setup(
-            cold_start=cold_start, **lambda_context.__dict__, **process_booking_context.__dict__
-        )
+            set_invocation_context(
+                **__build_cold_start_context(is_cold_start),
+                sampling_rate=sampling_rate,
+                **invocation._asdict(),
+            )
 
-        return lambda_handler(event, context)
+            return lambda_handler(event, context)
+        finally:
+            cold_start.invocation_end()
+            flush_log_writer()
 
     return decorate
 
 
-def __is_cold_start() -> str:
-    """Verifies whether is cold start and return a string used for struct logging
+def __build_cold_start_context(is_cold_start: bool) -> Dict:
+    """Builds cold start keys for struct logging, including init duration on cold starts
 
     Returns
     -------
-    str
-        lower case bool as a string
-        aws_lambda_logging doesn't support bool; cast cold start value to string
+    Dict
+        cold_start as lower case bool string, as aws_lambda_logging didn't support bool,
+        and init_duration in milliseconds or None if not a cold start
+    """
+    return {
+        "cold_start": str(is_cold_start).lower(),
+        "init_duration": cold_start.init_duration if is_cold_start else None,
+    }
+
+
+def __install_batching_handler():
+    """Replaces root handlers with a single BatchingStreamHandler writing to stdout
+
+    Lambda runtime root handler is replaced too, otherwise every record would be written twice
     """
-    cold_start = "false"
+    handler = BatchingStreamHandler(stream=sys.stdout)
+    for root_handler in logging.root.handlers[:]:
+        logging.root.removeHandler(root_handler)
+        root_handler.close()
+
+    logging.root.addHandler(handler)
+    install_log_writer(handler)
+
+
+def __install_size_limiter(logger: logging.Logger, max_bytes: int, keep_fields: Iterable[str]):
+    """Replaces LogSizeLimiter filters in given logger, or removes them if max_bytes isn't set"""
+    for log_filter in logger.filters[:]:
+        if isinstance(log_filter, LogSizeLimiter):
+            logger.removeFilter(log_filter)
+
+    if max_bytes:
+        logger.addFilter(LogSizeLimiter(max_bytes=max_bytes, keep_fields=keep_fields))
 
-    global is_cold_start
-    if is_cold_start:
-        cold_start = str(is_cold_start).lower()
-        is_cold_start = False
 
-    return cold_start
+def __sample_log_level() -> Union[float, None]:
+    """Decides whether current invocation should be logged at DEBUG level given sample rate
+
+    Levels are only changed when sampling decision differs from previous invocation
+
+    Returns
+    -------
+    Union[float, None]
+        sample rate used for struct logging, or None if sampling isn't configured
+    """
+    sample_rate = log_sampling["rate"]
+    if not sample_rate:
+        return None
+
+    sampled = random.random() < sample_rate
+    if sampled != log_sampling["sampled"]:
+        level = logging.DEBUG if sampled else log_sampling["level"]
+        logging.root.setLevel(level)
+        log_sampling["logger"].setLevel(level)
+        log_sampling["sampled"] = sampled
+
+    return sample_rate
 
 
 def log_metric(
@@ -228,6 +353,12 @@ def log_metric(
 
     Metric units are available via MetricUnit Enum
 
+    Prefer `lambda_python_powertools.metrics.Metrics` for Lambda handlers,
+    as it buffers metrics and writes a single Embedded Metric Format document per invocation
+    that CloudWatch picks up without an external process.
+    Metrics emitted often should be declared once via `lambda_python_powertools.metrics.MetricRegistry`,
+    which validates units and dimensions at import and caches the metric line template
+
     Environment variables
     ---------------------
     POWERTOOLS_SERVICE_NAME : str
@@ -277,7 +408,12 @@ def log_metric(
     """
 
     logger.debug(
-        f"Building new custom metric. Name: {name}, Service: {service}, Unit: {unit}, Value: {value}, Dimensions: {dimensions}"
+        "Building new custom metric. Name: %s, Service: %s, Unit: %s, Value: %s, Dimensions: %s",
+        name,
+        service,
+        unit,
+        value,
+        dimensions,
     )
     service = os.getenv("POWERTOOLS_SERVICE_NAME") or service
     dimensions = __build_dimensions(**dimensions)
@@ -287,7 +423,7 @@ def log_metric(
     if dimensions:
         metric = f"MONITORING|{value}|{unit.name}|{name}|{namespace}|service={service},{dimensions}"
 
-    print(metric)
+    write_line(metric)
 
 
 def __build_dimensions(**dimensions) -> str:
@@ -0,0 +1,134 @@
+import logging
+import queue
+import sys
+import threading
+import traceback
+from typing import IO, List, Union
+
+log_writer: Union["BatchingStreamHandler", None] = None
+
+
+class BatchingStreamHandler(logging.Handler):
+    """Logging handler that writes formatted records to a stream in batches from a background thread
+
+    Records are formatted in the caller thread, so per-invocation context and lazy messages
+    are resolved as usual, and queued in memory. A background thread drains the queue and writes
+    as many lines as available, up to `max_batch_size`, in a single write to the stream.
+
+    `flush` blocks until every queued line has been written, and must be called
+    before Lambda handler returns as Lambda may freeze the container right after.
+    Logger inject decorators and Metrics do so when installed via `logger_setup(batch_writes=True)`.
+
+    Example
+    -------
+    Batches stdout writes for all log statements and metrics
+
+        >>> from lambda_python_powertools.logging import logger_setup, logger_inject_lambda_context
+        >>> logger = logger_setup(service="booking", batch_writes=True)
+        >>>
+        >>> @logger_inject_lambda_context
+        >>> def handler(event, context):
+                logger.info("Hello")
+
+    Parameters
+    ----------
+    stream : IO, optional
+        stream to write to, by default sys.stdout
+    max_batch_size : int, optional
+        maximum number of lines written at once, by default 100
+    """
+
+    def __init__(self, stream: IO = None, max_batch_size: int = 100):
+        super().__init__()
+        self.stream = stream or sys.stdout
+        self.max_batch_size = max_batch_size
+        self.queue: queue.Queue = queue.Queue()
+        self.thread: Union[threading.Thread, None] = None
+        self.thread_lock = threading.Lock()
+
+    def emit(self, record: logging.LogRecord):
+        try:
+            self.write(self.format(record))
+        except Exception:
+            self.handleError(record)
+
+    def write(self, line: str):
+        """Queues a line to be written by background thread"""
+        if self.thread is None:
+            self.__start()
+
+        self.queue.put(line)
+
+    def flush(self):
+        """Blocks until all queued lines have been written to the stream"""
+        if self.thread is not None:
+            self.queue.join()
+
+    def close(self):
+        """Writes pending lines, then stops and joins background thread"""
+        with self.thread_lock:
+            if self.thread is not None:
+                self.queue.put(None)
+                self.thread.join()
+                self.thread = None
+
+        super().close()
+
+    def __start(self):
+        with self.thread_lock:
+            if self.thread is None:
+                self.thread = threading.Thread(
+                    target=self.__write_batches, name="powertools-log-writer", daemon=True
+                )
+                self.thread.start()
+
+    def __write_batches(self):
+        """Writes queued lines in batches until a None sentinel is received"""
+        running = True
+        while running:
+            batch: List[str] = [self.queue.get()]
+            while len(batch) < self.max_batch_size:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            if None in batch:
+                running = False
+                batch = [line for line in batch if line is not None]
+
+            try:
+                if batch:
+                    self.stream.write("\n".join(batch) + "\n")
+                    self.stream.flush()
+            except Exception:
+                traceback.print_exc(file=sys.stderr)
+            finally:
+                for _ in range(len(batch) + (0 if running else 1)):
+                    self.queue.task_done()
+
+
+def install_log_writer(handler: Union[BatchingStreamHandler, None]):
+    """Sets the handler used by `write_line` and `flush_log_writer`, or None to disable batching"""
+    global log_writer
+    log_writer = handler
+
+
+def write_line(line: str):
+    """Writes a line to stdout, through the batching log writer if installed
+
+    Parameters
+    ----------
+    line : str
+        Line to be written without trailing newline
+    """
+    if log_writer is None:
+        print(line)
+    else:
+        log_writer.write(line)
+
+
+def flush_log_writer():
+    """Blocks until every line queued in the batching log writer, if installed, is written"""
+    if log_writer is not None:
+        log_writer.flush()
@@ -0,0 +1,8 @@
+"""Metrics utility"""
+
+from ..helper.models import MetricUnit
+from .definitions import MetricDefinition, MetricRegistry
+from .histogram import Histogram
+from .metrics import Metrics
+
+__all__ = ["Metrics", "MetricUnit", "MetricRegistry", "MetricDefinition", "Histogram"]
@@ -0,0 +1,237 @@
+import os
+from typing import Dict, Iterable, Union
+
+from ..helper.models import MetricUnit, build_metric_unit_from_str
+from ..logging.writer import write_line
+from .metrics import MAX_DIMENSIONS, Metrics
+
+
+class MetricDefinition:
+    """Metric declared once with validated unit and dimensions, emitted many times
+
+    Metric line template is built once when declared, so `emit` only formats
+    the metric value and dimension values given.
+
+    Values are added to a Metrics collector if the definition is bound to one,
+    otherwise written to stdout in the same format as `log_metric`:
+
+    Output: MONITORING|<metric_value>|<metric_unit>|<metric_name>|<namespace>|<dimensions>
+
+    Definitions are meant to be created via `MetricRegistry.define`
+
+    Parameters
+    ----------
+    name : str
+        metric name
+    unit : MetricUnit
+        metric unit enum value (e.g. MetricUnit.Seconds)
+    namespace : str
+        metric namespace
+    service : str
+        service name used as the first dimension
+    dimensions : Iterable[str], optional
+        names of additional dimensions accepted by `emit`, by default ()
+    collector : Metrics, optional
+        Metrics collector values are added to instead of written to stdout, by default None
+
+    Raises
+    ------
+    ValueError
+        When metric name is empty, unit is invalid or there are more than 9 dimensions
+    """
+
+    __slots__ = (
+        "name",
+        "unit",
+        "namespace",
+        "service",
+        "dimensions",
+        "allowed_dimensions",
+        "collector",
+        "line_template",
+        "service_dimension",
+    )
+
+    def __init__(
+        self,
+        name: str,
+        unit: Union[str, MetricUnit],
+        namespace: str,
+        service: str,
+        dimensions: Iterable[str] = (),
+        collector: Metrics = None,
+    ):
+        dimensions = tuple(dimensions)
+        if not name:
+            raise ValueError("Invalid Metric Name - Metric name must not be empty")
+
+        if len(dimensions) > MAX_DIMENSIONS:
+            raise ValueError(
+                f"Invalid Metric Dimensions - Received {len(dimensions)} dimensions for {name}. "
+                f"Max of {MAX_DIMENSIONS} dimensions are allowed in addition to service"
+            )
+
+        self.name = name
+        self.unit = build_metric_unit_from_str(unit)
+        self.namespace = namespace
+        self.service = service
+        self.dimensions = dimensions
+        self.allowed_dimensions = frozenset(dimensions)
+        self.collector = collector
+        self.line_template = f"MONITORING|%s|{self.unit.name}|{name}|{namespace}|service={service}"
+        self.service_dimension = ("service", service)
+
+    def emit(self, value: float = 0, **dimensions):
+        """Emits a metric value, ignoring empty dimension values like `log_metric`
+
+        Parameters
+        ----------
+        value : float, optional
+            metric value, by default 0
+        dimensions: dict, optional
+            values of dimensions declared for this metric (e.g. operation="collect_payment")
+
+        Raises
+        ------
+        ValueError
+            When a dimension wasn't declared for this metric
+        """
+        if dimensions and not dimensions.keys() <= self.allowed_dimensions:
+            undeclared = sorted(dimensions.keys() - self.allowed_dimensions)
+            raise ValueError(
+                f"Invalid Metric Dimensions - Received {undeclared} for {self.name}. "
+                f"Declared dimensions are {list(self.dimensions)}"
+            )
+
+        # Dimensions are always taken in declaration order so each combination has a single set
+        dimension_values = [
+            (dimension, dimensions[dimension])
+            for dimension in self.dimensions
+            if dimensions.get(dimension)
+        ]
+
+        if self.collector is not None:
+            dimension_set = (self.service_dimension, *dimension_values)
+            self.collector.put_metric(
+                name=self.name, unit=self.unit, value=value, dimension_set=dimension_set
+            )
+            return
+
+        line = self.line_template % value
+        if dimension_values:
+            line += "," + ",".join(
+                f"{dimension}={dim_value}" for dimension, dim_value in dimension_values
+            )
+
+        write_line(line)
+
+
+class MetricRegistry:
+    """Registry of metrics declared once per service at import time
+
+    Units, dimension names and limits are validated when metrics are declared,
+    so invalid metric definitions fail as the function loads rather than per invocation.
+
+    Environment variables
+    ---------------------
+    POWERTOOLS_SERVICE_NAME : str
+        service name
+    POWERTOOLS_METRICS_NAMESPACE : str
+        metric namespace
+
+    Example
+    -------
+    Declares payment metrics once and adds them to a Metrics collector
+
+        >>> from lambda_python_powertools.metrics import Metrics, MetricRegistry, MetricUnit
+        >>> metrics = Metrics(service="payment")
+        >>> registry = MetricRegistry(metrics=metrics)
+        >>> successful_payment = registry.define("SuccessfulPayment", MetricUnit.Count)
+        >>> invalid_request = registry.define(
+                "InvalidPaymentRequest", MetricUnit.Count, dimensions=("operation",)
+            )
+        >>>
+        >>> @metrics.log_metrics
+        >>> def handler(event, context):
+                successful_payment.emit(1)
+                invalid_request.emit(1, operation="collect_payment")
+
+    Declares metrics written to stdout as MONITORING lines like `log_metric`
+
+        >>> registry = MetricRegistry(service="payment")
+        >>> successful_payment = registry.define("SuccessfulPayment", MetricUnit.Count)
+        >>> successful_payment.emit(1)
+        MONITORING|1|Count|SuccessfulPayment|ServerlessAirline|service=payment
+
+    Parameters
+    ----------
+    service : str, optional
+        service name used as dimension, by default "service_undefined"
+    namespace : str, optional
+        metric namespace (e.g. application name), by default "ServerlessAirline"
+    metrics : Metrics, optional
+        Metrics collector values are added to, also defining service and namespace, by default None
+    """
+
+    def __init__(
+        self,
+        service: str = "service_undefined",
+        namespace: str = "ServerlessAirline",
+        metrics: Metrics = None,
+    ):
+        self.service = os.getenv("POWERTOOLS_SERVICE_NAME") or service
+        self.namespace = os.getenv("POWERTOOLS_METRICS_NAMESPACE") or namespace
+        if metrics is not None:
+            self.service, self.namespace = metrics.service, metrics.namespace
+
+        self.metrics = metrics
+        self.definitions: Dict[str, MetricDefinition] = {}
+
+    def define(
+        self, name: str, unit: Union[str, MetricUnit], dimensions: Iterable[str] = ()
+    ) -> MetricDefinition:
+        """Declares a metric, or returns the existing definition if declared with same unit and dimensions
+
+        Parameters
+        ----------
+        name : str
+            metric name
+        unit : MetricUnit
+            metric unit enum value (e.g. MetricUnit.Seconds)
+        dimensions : Iterable[str], optional
+            names of additional dimensions accepted when emitting, by default ()
+
+        Returns
+        -------
+        MetricDefinition
+            Metric handle to emit values with
+
+        Raises
+        ------
+        ValueError
+            When metric definition is invalid, or differs from a metric already declared with same name
+        """
+        definition = MetricDefinition(
+            name=name,
+            unit=unit,
+            namespace=self.namespace,
+            service=self.service,
+            dimensions=dimensions,
+            collector=self.metrics,
+        )
+
+        existing = self.definitions.get(name)
+        if existing is None:
+            self.definitions[name] = definition
+            return definition
+
+        if (existing.unit, existing.dimensions) != (definition.unit, definition.dimensions):
+            raise ValueError(
+                f"Metric {name} already declared with unit {existing.unit.name} "
+                f"and dimensions {list(existing.dimensions)}"
+            )
+
+        return existing
+
+    def __getitem__(self, name: str) -> MetricDefinition:
+        return self.definitions[name]
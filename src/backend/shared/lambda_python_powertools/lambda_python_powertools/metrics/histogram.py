@@ -0,0 +1,213 @@
+import contextlib
+import math
+import time
+from typing import Dict, List, Tuple, Union
+
+from ..helper.models import MetricUnit, build_metric_unit_from_str
+
+# Elapsed seconds multiplier for time units supported by `Histogram.time`
+TIME_UNIT_MULTIPLIERS = {
+    MetricUnit.Seconds: 1,
+    MetricUnit.Milliseconds: 1e3,
+    MetricUnit.Microseconds: 1e6,
+}
+
+
+class Histogram:
+    """Distribution of observations aggregated in-process as a compact sketch
+
+    Observations are counted in logarithmic buckets so that any value is represented
+    within `relative_accuracy` of its actual value (e.g. 1%), regardless of how many
+    observations are recorded. Memory grows with the number of distinct buckets only,
+    typically a few dozen for latencies.
+
+    Histograms are emitted as a single metric via `Metrics.add_histogram`, whose values
+    are bucket representatives sampled at evenly spaced ranks, so CloudWatch percentiles
+    (e.g. p99) follow the distribution of every observation with bounded output.
+
+    Example
+    -------
+    Measures per-call latency of collect payment across a batch
+
+        >>> from lambda_python_powertools.metrics import Histogram, Metrics, MetricUnit
+        >>> metrics = Metrics(service="payment")
+        >>> latency = Histogram(name="CollectPaymentLatency", unit=MetricUnit.Milliseconds)
+        >>>
+        >>> @metrics.log_metrics
+        >>> def handler(event, context):
+                for charge in event["charges"]:
+                    with latency.time():
+                        collect_payment(charge)
+
+                metrics.add_histogram(latency)
+
+    Parameters
+    ----------
+    name : str
+        metric name
+    unit : MetricUnit, optional
+        metric unit enum value, by default MetricUnit.Milliseconds
+    relative_accuracy : float, optional
+        maximum relative error of bucket representatives, by default 0.01
+
+    Raises
+    ------
+    ValueError
+        When metric unit is invalid or relative accuracy is not between 0 and 1
+    """
+
+    def __init__(
+        self,
+        name: str,
+        unit: Union[str, MetricUnit] = MetricUnit.Milliseconds,
+        relative_accuracy: float = 0.01,
+    ):
+        if not 0 < relative_accuracy < 1:
+            raise ValueError(
+                f"Invalid relative accuracy - Received {relative_accuracy}. Value must be 0 to 1"
+            )
+
+        self.name = name
+        self.unit = build_metric_unit_from_str(unit)
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.log_gamma = math.log(self.gamma)
+        self.buckets: Dict[int, int] = {}
+        self.zero_count = 0
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def observe(self, value: float):
+        """Records an observation
+
+        Values lower than or equal to zero are counted as zero
+
+        Parameters
+        ----------
+        value : float
+            observed value in histogram unit
+        """
+        self.count += 1
+        self.sum += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+        if value <= 0:
+            self.zero_count += 1
+            return
+
+        index = math.ceil(math.log(value) / self.log_gamma)
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+
+    @contextlib.contextmanager
+    def time(self):
+        """Context manager observing elapsed time of its block, even if it raises
+
+        Raises
+        ------
+        ValueError
+            When histogram unit isn't Seconds, Milliseconds or Microseconds
+        """
+        multiplier = TIME_UNIT_MULTIPLIERS.get(self.unit)
+        if multiplier is None:
+            raise ValueError(f"Histogram {self.name} unit {self.unit.name} is not a time unit")
+
+        start = time.perf_counter()
+        try:
+            yield self
+        finally:
+            self.observe((time.perf_counter() - start) * multiplier)
+
+    def values_and_counts(self) -> Tuple[List[float], List[int]]:
+        """Returns bucket representatives and their number of observations, ordered by value
+
+        Returns
+        -------
+        Tuple[List[float], List[int]]
+            Values and counts arrays of the same length
+        """
+        values, counts = [], []
+        if self.zero_count:
+            values.append(0)
+            counts.append(self.zero_count)
+
+        for index in sorted(self.buckets):
+            values.append(self.__bucket_value(index))
+            counts.append(self.buckets[index])
+
+        return values, counts
+
+    def sample_values(self, size: int) -> List[float]:
+        """Returns up to `size` bucket representatives distributed as observations are, in order
+
+        Each observation is returned as its bucket representative when there are no more
+        than `size` of them. Otherwise values are taken at evenly spaced ranks, each standing
+        for `count / size` observations, so percentiles hold within one sample of their rank.
+
+        Parameters
+        ----------
+        size : int
+            maximum number of values returned
+
+        Returns
+        -------
+        List[float]
+            Values in ascending order
+        """
+        values, counts = self.values_and_counts()
+        if self.count <= size:
+            return [value for value, count in zip(values, counts) for _ in range(count)]
+
+        samples = []
+        buckets = zip(values, counts)
+        value, seen = 0.0, 0
+        for sample in range(size):
+            # Middle rank of observations this sample stands for, always below count
+            rank = (sample + 0.5) * self.count / size
+            while seen <= rank:
+                value, count = next(buckets)
+                seen += count
+            samples.append(min(max(value, self.min), self.max))
+
+        return samples
+
+    def percentile(self, percentile: float) -> Union[float, None]:
+        """Returns an approximation of the given percentile (e.g. 99), or None if empty
+
+        Parameters
+        ----------
+        percentile : float
+            percentile between 0 and 100
+
+        Returns
+        -------
+        Union[float, None]
+            Value within relative accuracy of the actual percentile
+        """
+        if not self.count:
+            return None
+
+        rank = percentile / 100 * (self.count - 1)
+        seen = 0
+        values, counts = self.values_and_counts()
+        for value, count in zip(values, counts):
+            seen += count
+            if seen > rank:
+                return min(max(value, self.min), self.max)
+
+        return self.max
+
+    def clear(self):
+        """Discards observations recorded so far"""
+        self.buckets = {}
+        self.zero_count = 0
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def __bucket_value(self, index: int) -> float:
+        """Returns the value representing a bucket within relative accuracy of its bounds"""
+        return float(f"{2 * self.gamma ** index / (self.gamma + 1):.6g}")
@@ -0,0 +1,382 @@
+import functools
+import itertools
+import logging
+import os
+import time
+from typing import Any, Callable, Dict, List, Tuple, Union
+
+from ..helper.cold_start import cold_start
+from ..helper.models import MetricUnit, build_metric_unit_from_str
+from ..helper.serializer import json_dumps
+from ..logging.writer import flush_log_writer, write_line
+from .histogram import Histogram
+
+logger = logging.getLogger(__name__)
+logger.setLevel(os.getenv("LOG_LEVEL", "INFO"))
+
+# CloudWatch accepts a max of 10 dimensions per metric
+# We include service name as a dimension so we take up to 9 additional dimensions
+MAX_DIMENSIONS = 9
+
+# Embedded Metric Format accepts up to 100 metrics per directive
+# and up to 100 values per metric
+MAX_METRICS = 100
+MAX_METRIC_VALUES = 100
+
+
+class Metrics:
+    """Metrics collector emitting CloudWatch Embedded Metric Format (EMF) with Airline defaults
+
+    Metrics are buffered in memory during a Lambda invocation and written to stdout
+    as few EMF JSON documents as possible once the decorated handler finishes.
+    Metrics with the same name and dimensions are merged into a single metric with many values,
+    and metrics with different dimension sets share a document whenever dimension values don't clash.
+
+    CloudWatch Logs extracts metrics from EMF documents natively,
+    so there's no need to parse log lines and call PutMetricData asynchronously.
+
+    EMF spec: https://docs.aws.amazon.com/AmazonCloudWatch/latest/monitoring/CloudWatch_Embedded_Metric_Format_Specification.html
+
+    Environment variables
+    ---------------------
+    POWERTOOLS_SERVICE_NAME : str
+        service name
+    POWERTOOLS_METRICS_NAMESPACE : str
+        metric namespace
+
+    Example
+    -------
+    Counts successful payments with service as the default dimension
+
+        >>> from lambda_python_powertools.metrics import Metrics, MetricUnit
+        >>> metrics = Metrics(service="payment")
+
+        >>> @metrics.log_metrics
+        >>> def handler(event: dict, context: Any) -> Dict:
+                metrics.add_metric(name="SuccessfulPayment", unit=MetricUnit.Count, value=1)
+
+    Counts invalid requests per operation as an additional dimension
+
+        >>> metrics.add_metric(
+                name="InvalidPaymentRequest",
+                unit=MetricUnit.Count,
+                value=1,
+                operation="collect_payment"
+            )
+
+    Emits cold start, init duration and init step durations on the first invocation
+
+        >>> metrics = Metrics(service="payment", capture_cold_start=True)
+
+    Parameters
+    ----------
+    service : str, optional
+        service name used as dimension, by default "service_undefined"
+    namespace : str, optional
+        metric namespace (e.g. application name), by default "ServerlessAirline"
+    capture_cold_start : bool, optional
+        adds ColdStart, InitDuration and InitStepDuration metrics with function name as dimension
+        on the first invocation handled by the container, by default False
+    """
+
+    def __init__(
+        self,
+        service: str = "service_undefined",
+        namespace: str = "ServerlessAirline",
+        capture_cold_start: bool = False,
+    ):
+        self.service = os.getenv("POWERTOOLS_SERVICE_NAME") or service
+        self.namespace = os.getenv("POWERTOOLS_METRICS_NAMESPACE") or namespace
+        self.capture_cold_start = capture_cold_start
+        self.metric_sets: Dict[Tuple[Tuple[str, str], ...], Dict[str, Dict]] = {}
+
+    def add_metric(self, name: str, unit: Union[str, MetricUnit], value: float = 0, **dimensions):
+        """Adds a metric value to be emitted once handler finishes
+
+        Values for the same metric name and dimensions are merged, and
+        empty dimension values are ignored like in `log_metric`
+
+        Parameters
+        ----------
+        name : str
+            metric name
+        unit : MetricUnit
+            metric unit enum value (e.g. MetricUnit.Seconds)
+        value : float, optional
+            metric value, by default 0
+        dimensions: dict, optional
+            keyword arguments as additional dimensions (e.g. customer=customerId)
+
+        Raises
+        ------
+        ValueError
+            When metric unit is invalid or differs from a previously added metric with the same name
+        """
+        unit = build_metric_unit_from_str(unit)
+        dimension_set = self.__build_dimension_set(**dimensions)
+
+        self.put_metric(name=name, unit=unit, value=value, dimension_set=dimension_set)
+
+    def put_metric(
+        self, name: str, unit: MetricUnit, value: float, dimension_set: Tuple[Tuple[str, str], ...]
+    ):
+        """Adds a metric value with an already validated unit and dimension set
+
+        Used by `MetricDefinition` handles, which validate units and dimensions once when declared
+
+        Parameters
+        ----------
+        name : str
+            metric name
+        unit : MetricUnit
+            metric unit enum value
+        value : float
+            metric value
+        dimension_set : Tuple[Tuple[str, str], ...]
+            dimension name and value pairs, starting with service name
+
+        Raises
+        ------
+        ValueError
+            When metric unit differs from a previously added metric with the same name
+        """
+        self.__metric_values(name=name, unit=unit, dimension_set=dimension_set).append(value)
+
+    def add_histogram(self, histogram: Histogram, clear: bool = True, **dimensions):
+        """Adds observations aggregated in a histogram as a single metric
+
+        Up to MAX_METRIC_VALUES bucket representatives sampled across observations are added,
+        so a histogram fits a single EMF document however many observations it has. CloudWatch
+        percentiles and averages follow every observation, whereas SampleCount and Sum
+        count samples, use `histogram.count` and `histogram.sum` for those
+
+        Parameters
+        ----------
+        histogram : Histogram
+            histogram whose name and unit are used as metric name and unit
+        clear : bool, optional
+            discards histogram observations once added, by default True
+        dimensions: dict, optional
+            keyword arguments as additional dimensions (e.g. customer=customerId)
+
+        Raises
+        ------
+        ValueError
+            When histogram unit differs from a previously added metric with the same name
+        """
+        dimension_set = self.__build_dimension_set(**dimensions)
+        if histogram.count:
+            metric_values = self.__metric_values(
+                name=histogram.name, unit=histogram.unit, dimension_set=dimension_set
+            )
+            metric_values.extend(histogram.sample_values(MAX_METRIC_VALUES))
+
+        if clear:
+            histogram.clear()
+
+    def serialize(self) -> List[Dict]:
+        """Serializes metrics added so far into as few EMF documents as possible
+
+        Returns
+        -------
+        List[Dict]
+            EMF documents
+        """
+        timestamp = int(time.time() * 1000)
+        documents: List[Dict] = []
+
+        for dimension_set, metric_set in self.metric_sets.items():
+            for metric_chunk in self.__chunk_metric_set(metric_set):
+                document = self.__find_compatible_document(documents, dimension_set, metric_chunk)
+                if document is None:
+                    document = {"_aws": {"Timestamp": timestamp, "CloudWatchMetrics": []}}
+                    documents.append(document)
+
+                document.update(dimension_set)
+                document["_aws"]["CloudWatchMetrics"].append(
+                    {
+                        "Namespace": self.namespace,
+                        "Dimensions": [[dimension for dimension, _ in dimension_set]],
+                        "Metrics": [
+                            {"Name": name, "Unit": metric["unit"].value}
+                            for name, metric in metric_chunk
+                        ],
+                    }
+                )
+                for name, metric in metric_chunk:
+                    values = metric["values"]
+                    document[name] = values[0] if len(values) == 1 else values
+
+        return documents
+
+    def flush(self):
+        """Writes metrics added so far to stdout as EMF documents and clear them
+
+        EMF documents go through the batching log writer when installed via logger_setup,
+        which is flushed before returning
+        """
+        documents = self.serialize()
+        self.clear()
+
+        logger.debug("Flushing %d EMF documents", len(documents))
+        for document in documents:
+            write_line(json_dumps(document))
+
+        flush_log_writer()
+
+    def clear(self):
+        """Discards metrics added so far"""
+        self.metric_sets = {}
+
+    def log_metrics(self, lambda_handler: Callable[[Dict, Any], Any] = None):
+        """Decorator to flush metrics added during an invocation once handler finishes
+
+        Metrics are flushed even if lambda handler raises an exception
+        so that failure metrics are also captured
+
+        Example
+        -------
+        Lambda function using log_metrics decorator
+
+            >>> metrics = Metrics(service="payment")
+            >>> @metrics.log_metrics
+                def handler(event, context)
+
+        Parameters
+        ----------
+        lambda_handler : Callable
+            Lambda handler to decorate
+
+        Returns
+        -------
+        decorate : Callable
+            Decorated lambda handler
+        """
+
+        @functools.wraps(lambda_handler)
+        def decorate(event, context):
+            is_cold_start = cold_start.invocation_begin()
+            try:
+                if is_cold_start and self.capture_cold_start:
+                    self.__add_cold_start_metrics(
+                        function_name=getattr(context, "function_name", None)
+                    )
+
+                return lambda_handler(event, context)
+            finally:
+                cold_start.invocation_end()
+                self.flush()
+
+        return decorate
+
+    def __add_cold_start_metrics(self, function_name: str = None):
+        """Adds cold start count, init duration and each init step duration"""
+        logger.debug("Adding cold start metrics")
+        self.add_metric(
+            name="ColdStart", unit=MetricUnit.Count, value=1, function_name=function_name
+        )
+        if cold_start.init_duration is not None:
+            self.add_metric(
+                name="InitDuration",
+                unit=MetricUnit.Milliseconds,
+                value=cold_start.init_duration,
+                function_name=function_name,
+            )
+
+        for step, duration in cold_start.init_steps.items():
+            self.add_metric(
+                name="InitStepDuration",
+                unit=MetricUnit.Milliseconds,
+                value=duration,
+                function_name=function_name,
+                step=step,
+            )
+
+    def __metric_values(
+        self, name: str, unit: MetricUnit, dimension_set: Tuple[Tuple[str, str], ...]
+    ) -> List[float]:
+        """Returns values added so far for a metric, validating its unit is consistent
+
+        Raises
+        ------
+        ValueError
+            When metric unit differs from a previously added metric with the same name
+        """
+        metric_set = self.metric_sets.setdefault(dimension_set, {})
+        metric = metric_set.setdefault(name, {"unit": unit, "values": []})
+        if metric["unit"] is not unit:
+            raise ValueError(
+                f"Metric {name} already added with unit {metric['unit'].name}, received {unit.name}"
+            )
+
+        return metric["values"]
+
+    def __build_dimension_set(self, **dimensions) -> Tuple[Tuple[str, str], ...]:
+        """Builds a hashable dimension set including service name as the first dimension
+
+        Returns
+        -------
+        Tuple[Tuple[str, str], ...]
+            Dimension name and value pairs
+        """
+        dimensions_partition = itertools.islice(
+            ((dimension, value) for dimension, value in dimensions.items() if value), MAX_DIMENSIONS
+        )
+
+        return (("service", self.service), *dimensions_partition)
+
+    @staticmethod
+    def __chunk_metric_set(metric_set: Dict[str, Dict]) -> List[List[Tuple[str, Dict]]]:
+        """Splits metrics into chunks honouring EMF limits of metrics per directive and values per metric
+
+        Returns
+        -------
+        List[List[Tuple[str, Dict]]]
+            Chunks of metric name and metric pairs
+        """
+        metrics = []
+        for name, metric in metric_set.items():
+            unit, values = metric["unit"], metric["values"]
+            for start in range(0, len(values), MAX_METRIC_VALUES):
+                values_chunk = values[start : start + MAX_METRIC_VALUES]
+                metrics.append((name, {"unit": unit, "values": values_chunk}))
+
+        chunks: List[List[Tuple[str, Dict]]] = []
+        for name, metric in metrics:
+            chunk = next(
+                (
+                    chunk
+                    for chunk in chunks
+                    if len(chunk) < MAX_METRICS and all(name != added for added, _ in chunk)
+                ),
+                None,
+            )
+            if chunk is None:
+                chunk = []
+                chunks.append(chunk)
+            chunk.append((name, metric))
+
+        return chunks
+
+    @staticmethod
+    def __find_compatible_document(
+        documents: List[Dict],
+        dimension_set: Tuple[Tuple[str, str], ...],
+        metric_chunk: List[Tuple[str, Dict]],
+    ) -> Union[Dict, None]:
+        """Finds an EMF document whose top-level keys don't clash with given dimensions and metrics
+
+        Returns
+        -------
+        Union[Dict, None]
+            Compatible EMF document or None if a new document is needed
+        """
+        for document in documents:
+            dimensions_match = all(
+                document.get(dimension, value) == value for dimension, value in dimension_set
+            )
+            metrics_absent = all(name not in document for name, _ in metric_chunk)
+            if dimensions_match and metrics_absent:
+                return document
+
+        return None
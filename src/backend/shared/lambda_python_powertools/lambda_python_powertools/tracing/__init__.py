@@ -1,5 +1,8 @@
 """Tracing utility
 """
+from .metadata import MetadataCapture
+from .profiler import Profiler
+from .sampling import LocalSampler, SamplingRule
 from .tracer import Tracer
 
-__all__ = ["Tracer"]
+__all__ = ["LocalSampler", "MetadataCapture", "Profiler", "SamplingRule", "Tracer"]
@@ -0,0 +1,83 @@
+"""Policies deciding when decorated functions' responses are captured as trace metadata
+
+X-Ray SDK sends segments to the daemon over UDP, where documents larger than 64KB are dropped,
+and serializes metadata values as segments are sent. Responses are therefore only captured
+when their policy says so, and projected within a byte budget via `helper.truncation.bound_size`
+so that only what fits in the budget is ever converted to JSON-friendly types.
+"""
+
+import random
+from enum import Enum
+from typing import Union
+
+# Default budget per metadata value, leaving room for other subsegments within a 64KB segment
+METADATA_MAX_BYTES = 16 * 1024
+
+
+class MetadataCapture(Enum):
+    """When a decorated function's response is captured as metadata
+
+    Exceptions raised are captured regardless of policy
+
+    Always: response is captured on every call
+    OnError: response is never captured, only exceptions raised
+    Sampled: response is captured for a sampled fraction of calls
+    """
+
+    Always = "always"
+    OnError = "on_error"
+    Sampled = "sampled"
+
+
+def build_metadata_capture_from_str(capture: Union[str, MetadataCapture]) -> MetadataCapture:
+    """Builds metadata capture enum from string, case insensitive (e.g. "ON_ERROR")
+
+    Parameters
+    ----------
+    capture : Union[str, MetadataCapture]
+        metadata capture enum value or its string value
+
+    Returns
+    -------
+    MetadataCapture
+        Metadata capture enum
+
+    Raises
+    ------
+    ValueError
+        When metadata capture isn't supported
+    """
+    if isinstance(capture, MetadataCapture):
+        return capture
+
+    try:
+        return MetadataCapture(capture.strip().lower())
+    except (AttributeError, ValueError):
+        captures = [item.value for item in MetadataCapture]
+        raise ValueError(
+            f"Invalid Metadata Capture - Received {capture}. Value Metadata Captures are {captures}"
+        )
+
+
+def should_capture_response(capture: MetadataCapture, sample_rate: float) -> bool:
+    """Decides whether a response should be captured as metadata for the current call
+
+    Parameters
+    ----------
+    capture : MetadataCapture
+        metadata capture policy
+    sample_rate : float
+        fraction of calls whose response is captured, only used when policy is Sampled
+
+    Returns
+    -------
+    bool
+        Whether response should be captured
+    """
+    if capture is MetadataCapture.Always:
+        return True
+
+    if capture is MetadataCapture.OnError:
+        return False
+
+    return random.random() < sample_rate
@@ -0,0 +1,153 @@
+"""Selective and lazy patching of libraries supported by X-Ray SDK
+
+`patch_all` imports and patches every library X-Ray SDK supports during init phase,
+while Airline functions only talk to a couple of them (e.g. DynamoDB via boto3, or requests).
+
+Libraries are either patched right away, or once they're first imported
+via an import hook, so functions never pay for importing libraries they don't use.
+"""
+
+import importlib.abc
+import logging
+import os
+import sys
+from types import ModuleType
+from typing import Callable, Dict, Iterable, List, Tuple
+
+logger = logging.getLogger(__name__)
+logger.setLevel(os.getenv("LOG_LEVEL", "INFO"))
+
+# Modules whose import triggers a lazy patch, when they differ from X-Ray SDK module names
+PATCH_TRIGGERS = {
+    "boto3": "botocore",
+    "aioboto3": "aiobotocore",
+    "httplib": "http.client",
+    "mysql": "mysql.connector",
+    "sqlalchemy_core": "sqlalchemy",
+}
+
+Patcher = Callable[[Tuple[str, ...]], None]
+
+
+class PatchingLoader(importlib.abc.Loader):
+    """Loader patching a module with X-Ray SDK right after it's been executed
+
+    Parameters
+    ----------
+    loader : importlib.abc.Loader
+        Loader originally found for the module
+    patches : List[Tuple[str, Patcher]]
+        X-Ray SDK module names to patch and their patcher
+    """
+
+    def __init__(self, loader: importlib.abc.Loader, patches: List[Tuple[str, Patcher]]):
+        self.loader = loader
+        self.patches = patches
+
+    def create_module(self, spec):
+        return self.loader.create_module(spec)
+
+    def exec_module(self, module: ModuleType):
+        # Restore original loader so module reloads, tracebacks and resources behave as usual
+        module.__spec__.loader = self.loader
+        module.__loader__ = self.loader
+        self.loader.exec_module(module)
+
+        for module_name, patcher in self.patches:
+            try:
+                logger.debug("Lazily patching %s on %s import", module_name, module.__name__)
+                patcher((module_name,))
+            except Exception:
+                logger.exception("Failed to patch %s on %s import", module_name, module.__name__)
+
+
+class LazyPatchFinder(importlib.abc.MetaPathFinder):
+    """Import hook patching modules with X-Ray SDK the first time they're imported
+
+    Finder only intercepts modules registered for patching, and is a no-op
+    for any other import or once all registered modules have been imported.
+    """
+
+    def __init__(self):
+        self.pending: Dict[str, List[Tuple[str, Patcher]]] = {}
+
+    def register(self, trigger: str, module_name: str, patcher: Patcher):
+        """Patches module_name with given patcher once trigger module is imported
+
+        Parameters
+        ----------
+        trigger : str
+            module whose import triggers the patch (e.g. "botocore")
+        module_name : str
+            X-Ray SDK module name to patch (e.g. "boto3")
+        patcher : Patcher
+            callable patching a tuple of X-Ray SDK module names
+        """
+        self.pending.setdefault(trigger, []).append((module_name, patcher))
+
+    def find_spec(self, fullname: str, path=None, target=None):
+        if fullname not in self.pending:
+            return None
+
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+
+            spec = finder.find_spec(fullname, path, target)
+            if spec is not None:
+                break
+        else:
+            return None
+
+        if spec.loader is None or not hasattr(spec.loader, "exec_module"):
+            return None
+
+        spec.loader = PatchingLoader(loader=spec.loader, patches=self.pending.pop(fullname))
+        return spec
+
+
+lazy_patch_finder = LazyPatchFinder()
+
+
+def patch_modules(modules: Iterable[str], lazy: bool = False, patcher: Patcher = None):
+    """Patches given libraries with X-Ray SDK, right away or once they're first imported
+
+    Libraries already imported are always patched right away.
+
+    Example
+    -------
+    Patches boto3 once it's imported
+
+        >>> from lambda_python_powertools.tracing.patching import patch_modules
+        >>> patch_modules(["boto3"], lazy=True)
+        >>> import boto3  # patched here
+
+    Parameters
+    ----------
+    modules : Iterable[str]
+        X-Ray SDK module names (e.g. "boto3", "requests")
+    lazy : bool, optional
+        defers patching until libraries are imported, by default False
+    patcher : Patcher, optional
+        callable patching a tuple of X-Ray SDK module names, by default `aws_xray_sdk.core.patch`
+    """
+    if patcher is None:
+        # Imported here so X-Ray SDK import is accounted as its own init step by Tracer
+        from aws_xray_sdk.core import patch as patcher
+
+    patch_now = []
+    for module_name in modules:
+        trigger = PATCH_TRIGGERS.get(module_name, module_name)
+        if not lazy or trigger in sys.modules:
+            patch_now.append(module_name)
+            continue
+
+        logger.debug("Deferring %s patch until %s is imported", module_name, trigger)
+        lazy_patch_finder.register(trigger=trigger, module_name=module_name, patcher=patcher)
+
+    if lazy and lazy_patch_finder not in sys.meta_path:
+        sys.meta_path.insert(0, lazy_patch_finder)
+
+    if patch_now:
+        logger.debug("Patching modules: %s", patch_now)
+        patcher(tuple(patch_now))
@@ -0,0 +1,132 @@
+import functools
+import inspect
+import time
+from typing import Callable, Dict
+
+from ..metrics import Histogram, Metrics, MetricUnit
+
+PROFILE_METRIC_NAME = "MethodDuration"
+
+
+class Profiler:
+    """In-process timing profile of functions decorated with `Tracer.capture_method`
+
+    Every call is timed, regardless of whether tracing is disabled or the invocation sampled,
+    and aggregated per function in a `Histogram` (count, sum, min, max and buckets).
+
+    Histograms are added to a Metrics collector as `MethodDuration` metric with
+    a `method` dimension when `flush` is called, which `Tracer.capture_lambda_handler`
+    does at the end of each invocation. With a flush interval, histograms keep aggregating
+    across invocations until the interval has elapsed, and each flush still emits a bounded
+    number of values per function, however many calls were observed meanwhile.
+
+    `Metrics.log_metrics` should wrap `Tracer.capture_lambda_handler`,
+    so that histograms flushed at the end of an invocation are emitted by that same invocation.
+
+    Example
+    -------
+    Profiles booking functions, emitting their duration at most once a minute
+
+        >>> from lambda_python_powertools.metrics import Metrics
+        >>> from lambda_python_powertools.tracing import Profiler, Tracer
+        >>> metrics = Metrics(service="booking")
+        >>> tracer = Tracer(service="booking", profiler=Profiler(metrics=metrics, flush_interval=60))
+        >>>
+        >>> @tracer.capture_method
+        >>> def reserve_booking(booking):
+                ...
+        >>>
+        >>> @metrics.log_metrics
+        >>> @tracer.capture_lambda_handler
+        >>> def handler(event, context):
+                reserve_booking(event)
+
+    Parameters
+    ----------
+    metrics : Metrics
+        Metrics collector histograms are added to
+    flush_interval : float, optional
+        minimum seconds between flushes, by default 0 (every invocation)
+    relative_accuracy : float, optional
+        maximum relative error of histogram buckets, by default 0.01
+    """
+
+    def __init__(
+        self, metrics: Metrics, flush_interval: float = 0, relative_accuracy: float = 0.01
+    ):
+        self.metrics = metrics
+        self.flush_interval = flush_interval
+        self.relative_accuracy = relative_accuracy
+        self.histograms: Dict[str, Histogram] = {}
+        self.last_flush = time.monotonic()
+
+    def profile(self, function: Callable) -> Callable:
+        """Wraps a function, coroutine, generator or async generator timing each call
+
+        Coroutines are timed until they complete, and generators until they're exhausted or closed
+
+        Parameters
+        ----------
+        function : Callable
+            Function to time, whose name is used as `method` dimension
+
+        Returns
+        -------
+        Callable
+            Function timing each call
+        """
+        histogram = self.histograms.setdefault(
+            function.__name__,
+            Histogram(
+                name=PROFILE_METRIC_NAME,
+                unit=MetricUnit.Milliseconds,
+                relative_accuracy=self.relative_accuracy,
+            ),
+        )
+
+        if inspect.iscoroutinefunction(function):
+
+            async def decorate(*args, **kwargs):
+                with histogram.time():
+                    return await function(*args, **kwargs)
+
+        elif inspect.isgeneratorfunction(function):
+
+            def decorate(*args, **kwargs):
+                with histogram.time():
+                    return (yield from function(*args, **kwargs))
+
+        elif inspect.isasyncgenfunction(function):
+
+            async def decorate(*args, **kwargs):
+                with histogram.time():
+                    async for item in function(*args, **kwargs):
+                        yield item
+
+        else:
+
+            def decorate(*args, **kwargs):
+                with histogram.time():
+                    return function(*args, **kwargs)
+
+        return functools.wraps(function)(decorate)
+
+    def flush(self, force: bool = False):
+        """Adds histograms with observations to Metrics collector, once flush interval has elapsed
+
+        Histograms are sampled down to a single EMF document each, see `Metrics.add_histogram`,
+        and cleared, so the next flush only covers calls made since
+
+        Parameters
+        ----------
+        force : bool, optional
+            flushes regardless of flush interval, by default False
+        """
+        now = time.monotonic()
+        if not force and now - self.last_flush < self.flush_interval:
+            return
+
+        self.last_flush = now
+        for method, histogram in self.histograms.items():
+            if histogram.count:
+                self.metrics.add_histogram(histogram, method=method)
@@ -0,0 +1,166 @@
+"""Local sampling rules deciding which invocations are traced by Tracer
+
+Rules follow X-Ray sampling rules semantics: a reservoir traces up to `fixed_target`
+matching invocations per second, and `rate` of any further matching invocations is traced.
+
+Unlike X-Ray SDK rules, which match on HTTP host, method and path, local rules match on
+Lambda function name and on event fields (e.g. Process Booking State Machine `outboundFlightId`).
+"""
+
+import fnmatch
+import random
+import time
+from typing import Any, Dict, Iterable, Union
+
+
+class SamplingRule:
+    """Sampling rule with fixed target per second plus a fixed rate
+
+    Example
+    -------
+    Traces 1 collect payment invocation per second plus 10% of the others
+
+        >>> from lambda_python_powertools.tracing import SamplingRule
+        >>> rule = SamplingRule(handler="*CollectPayment*", fixed_target=1, rate=0.1)
+
+    Traces every invocation for a flight under investigation
+
+        >>> rule = SamplingRule(fields={"outboundFlightId": "f3b1*"}, fixed_target=0, rate=1)
+
+    Parameters
+    ----------
+    fixed_target : int, optional
+        matching invocations traced per second before rate applies, by default 1
+    rate : float, optional
+        fraction of matching invocations traced once fixed target is reached, by default 0.05
+    handler : str, optional
+        glob pattern matching Lambda function name, by default "*"
+    fields : Dict[str, str], optional
+        glob patterns matching event fields values (e.g. {"outboundFlightId": "f3b1*"}), by default {}
+
+    Raises
+    ------
+    ValueError
+        When fixed target is negative or rate is not between 0 and 1
+    """
+
+    __slots__ = ("fixed_target", "rate", "handler", "fields", "reservoir_second", "reservoir_used")
+
+    def __init__(
+        self,
+        fixed_target: int = 1,
+        rate: float = 0.05,
+        handler: str = "*",
+        fields: Dict[str, str] = None,
+    ):
+        if fixed_target < 0:
+            raise ValueError(
+                f"Invalid Sampling Rule - Received fixed target {fixed_target}. Value must be 0 or more"
+            )
+
+        if not 0 <= rate <= 1:
+            raise ValueError(f"Invalid Sampling Rule - Received rate {rate}. Value must be 0 to 1")
+
+        self.fixed_target = fixed_target
+        self.rate = rate
+        self.handler = handler
+        self.fields = fields or {}
+        self.reservoir_second = 0
+        self.reservoir_used = 0
+
+    def matches(self, handler: str, event: Any) -> bool:
+        """Whether rule applies to an invocation
+
+        Parameters
+        ----------
+        handler : str
+            Lambda function name
+        event : Any
+            Lambda event, only dict events have fields
+
+        Returns
+        -------
+        bool
+            Whether handler and every field pattern match
+        """
+        if not fnmatch.fnmatchcase(handler, self.handler):
+            return False
+
+        if not self.fields:
+            return True
+
+        if not isinstance(event, dict):
+            return False
+
+        return all(
+            fnmatch.fnmatchcase(str(event.get(field, "")), pattern)
+            for field, pattern in self.fields.items()
+        )
+
+    def sample(self) -> bool:
+        """Decides whether a matching invocation is traced, borrowing from reservoir first
+
+        Returns
+        -------
+        bool
+            Whether invocation is traced
+        """
+        now = int(time.time())
+        if now != self.reservoir_second:
+            self.reservoir_second = now
+            self.reservoir_used = 0
+
+        if self.reservoir_used < self.fixed_target:
+            self.reservoir_used += 1
+            return True
+
+        return random.random() < self.rate
+
+
+class LocalSampler:
+    """Decides which invocations are traced using the first matching rule, or a default rule
+
+    Example
+    -------
+    Traces every invocation for a flight, and 1 per second plus 5% of any other
+
+        >>> from lambda_python_powertools.tracing import LocalSampler, SamplingRule
+        >>> sampler = LocalSampler(
+                rules=[SamplingRule(fields={"outboundFlightId": "f3b1*"}, fixed_target=0, rate=1)]
+            )
+        >>> sampler.should_sample(handler="ServerlessAirline-CollectPayment", event=event)
+
+    Parameters
+    ----------
+    rules : Iterable[Union[SamplingRule, Dict]]
+        rules, or their keyword arguments, evaluated in order
+    default : SamplingRule, optional
+        rule applied when none match, by default 1 invocation per second plus 5%
+    """
+
+    def __init__(self, rules: Iterable[Union[SamplingRule, Dict]], default: SamplingRule = None):
+        self.rules = [
+            rule if isinstance(rule, SamplingRule) else SamplingRule(**rule) for rule in rules
+        ]
+        self.default = default or SamplingRule()
+
+    def should_sample(self, handler: str, event: Any) -> bool:
+        """Decides whether an invocation is traced
+
+        Parameters
+        ----------
+        handler : str
+            Lambda function name
+        event : Any
+            Lambda event
+
+        Returns
+        -------
+        bool
+            Whether invocation is traced
+        """
+        for rule in self.rules:
+            if rule.matches(handler=handler, event=event):
+                return rule.sample()
+
+        return self.default.sample()
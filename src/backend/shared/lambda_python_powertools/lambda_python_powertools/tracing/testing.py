@@ -0,0 +1,200 @@
+"""In-memory X-Ray recorder and UDP daemon stand-in to measure Tracer overhead locally
+
+Unit tests stub the recorder out, so they never pay for building, serializing and emitting
+segments. These helpers give Tracer a real X-Ray SDK recorder whose segments are either kept
+in memory, or sent over UDP to a local listener speaking X-Ray daemon protocol,
+so benchmarks account for every step a traced Lambda invocation goes through.
+"""
+
+import socket
+import threading
+from typing import List
+
+from aws_xray_sdk.core import AWSXRayRecorder
+from aws_xray_sdk.core.context import Context
+from aws_xray_sdk.core.emitters.udp_emitter import PROTOCOL_DELIMITER, PROTOCOL_HEADER, UDPEmitter
+
+# Largest segment document X-Ray daemon accepts
+DAEMON_MAX_PACKET_BYTES = 64 * 1024
+
+# Largest UDP datagram that can be received
+UDP_MAX_PACKET_BYTES = 65535
+
+
+class InMemoryEmitter:
+    """X-Ray SDK emitter keeping serialized segments and subsegments in memory
+
+    Entities are serialized exactly as UDPEmitter does before sending them to X-Ray daemon
+    """
+
+    def __init__(self):
+        self.documents: List[str] = []
+
+    def send_entity(self, entity):
+        self.documents.append(entity.serialize())
+
+    def set_daemon_address(self, address):
+        pass
+
+    @property
+    def ip(self):
+        return None
+
+    @property
+    def port(self):
+        return None
+
+    @property
+    def sizes(self) -> List[int]:
+        """Size in bytes of each document as sent over UDP, including protocol header"""
+        overhead = len(PROTOCOL_HEADER) + len(PROTOCOL_DELIMITER)
+        return [overhead + len(document.encode("utf-8")) for document in self.documents]
+
+    def clear(self):
+        self.documents.clear()
+
+
+class UDPDaemonStub:
+    """Local UDP listener receiving segments the way X-Ray daemon does
+
+    Datagrams are received in a background thread, stripped of their protocol header
+    and kept in order along with their size. Segments too large for a datagram never arrive,
+    as X-Ray SDK emitter fails to send them and only logs it.
+
+    Example
+    -------
+    Tracer sending segments to a local daemon stand-in
+
+        >>> from lambda_python_powertools.tracing import Tracer
+        >>> from lambda_python_powertools.tracing.testing import UDPDaemonStub, build_recorder
+        >>> with UDPDaemonStub() as daemon:
+                recorder = build_recorder(daemon_address=daemon.address)
+                tracer = Tracer(provider=recorder, service="booking", patch_modules=[])
+                ...
+                daemon.wait_for(count=1)
+
+    Parameters
+    ----------
+    host : str, optional
+        address to listen on, by default "127.0.0.1"
+    port : int, optional
+        port to listen on, by default 0 (any free port)
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0):
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.socket.bind((host, port))
+        self.socket.settimeout(0.1)
+        self.host, self.port = self.socket.getsockname()
+        self.documents: List[str] = []
+        self.sizes: List[int] = []
+        self.received = threading.Condition()
+        self.running = False
+        self.thread = None
+
+    @property
+    def address(self) -> str:
+        """Daemon address as expected by X-Ray SDK (e.g. "127.0.0.1:2000")"""
+        return f"{self.host}:{self.port}"
+
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self.__receive, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+        if self.thread is not None:
+            self.thread.join()
+        self.socket.close()
+
+    def wait_for(self, count: int, timeout: float = 5) -> bool:
+        """Waits until given number of documents have been received
+
+        Parameters
+        ----------
+        count : int
+            number of documents
+        timeout : float, optional
+            maximum seconds to wait, by default 5
+
+        Returns
+        -------
+        bool
+            Whether documents have been received before timeout
+        """
+        with self.received:
+            return self.received.wait_for(lambda: len(self.documents) >= count, timeout=timeout)
+
+    def clear(self):
+        with self.received:
+            self.documents.clear()
+            self.sizes.clear()
+
+    def __receive(self):
+        while self.running:
+            try:
+                data = self.socket.recv(UDP_MAX_PACKET_BYTES)
+            except socket.timeout:
+                continue
+            except OSError:
+                return
+
+            _, _, document = data.decode("utf-8").partition(PROTOCOL_DELIMITER)
+            with self.received:
+                self.documents.append(document)
+                self.sizes.append(len(data))
+                self.received.notify_all()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *args):
+        self.stop()
+
+
+def build_recorder(emitter: InMemoryEmitter = None, daemon_address: str = None) -> AWSXRayRecorder:
+    """Builds an X-Ray recorder, separate from the global one, emitting segments locally
+
+    Recorder samples every segment and has its own context, so segments have to be
+    started and ended explicitly, as Lambda does around each invocation.
+
+    Example
+    -------
+    Tracer keeping segments in memory
+
+        >>> from lambda_python_powertools.tracing import Tracer
+        >>> from lambda_python_powertools.tracing.testing import InMemoryEmitter, build_recorder
+        >>> emitter = InMemoryEmitter()
+        >>> recorder = build_recorder(emitter=emitter)
+        >>> tracer = Tracer(provider=recorder, service="booking", patch_modules=[])
+        >>> recorder.begin_segment("booking")
+        >>> handler(event, context)
+        >>> recorder.end_segment()
+        >>> emitter.documents
+
+    Parameters
+    ----------
+    emitter : InMemoryEmitter, optional
+        emitter keeping segments in memory, by default a new one unless given a daemon address
+    daemon_address : str, optional
+        address segments are sent to over UDP (e.g. UDPDaemonStub address), by default None
+
+    Returns
+    -------
+    AWSXRayRecorder
+        X-Ray recorder
+    """
+    if emitter is None:
+        emitter = UDPEmitter(daemon_address=daemon_address) if daemon_address else InMemoryEmitter()
+
+    recorder = AWSXRayRecorder()
+    recorder.configure(
+        sampling=False,
+        plugins=(),
+        context=Context(context_missing="LOG_ERROR"),
+        emitter=emitter,
+    )
+
+    return recorder
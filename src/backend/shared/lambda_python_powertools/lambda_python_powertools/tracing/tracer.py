@@ -1,34 +1,81 @@
 import functools
+import inspect
+import json
 import logging
 import os
+import time
+from contextvars import ContextVar
 from distutils.util import strtobool
-from typing import Any, Callable, Dict
+from typing import Any, Callable, Dict, Sequence, Tuple, Union
+
+from ..helper.cold_start import cold_start
+from ..helper.models import build_invocation_context
+from ..helper.truncation import bound_size
+from .metadata import (
+    METADATA_MAX_BYTES,
+    MetadataCapture,
+    build_metadata_capture_from_str,
+    should_capture_response,
+)
+from .patching import patch_modules
+from .profiler import Profiler
+from .sampling import LocalSampler, SamplingRule
+
+with cold_start.timed("aws_xray_sdk"):
+    from aws_xray_sdk.core import models, patch_all, xray_recorder
 
-from aws_xray_sdk.core import models, patch_all, xray_recorder
-
-is_cold_start = True
 logger = logging.getLogger(__name__)
 logger.setLevel(os.getenv("LOG_LEVEL", "INFO"))
 
+# Subsegment of the coroutine being traced in the current asyncio task, if any
+async_subsegment: ContextVar = ContextVar("async_subsegment", default=None)
+
+# Whether current invocation has been sampled by Tracer sampling rules
+invocation_sampled: ContextVar = ContextVar("invocation_sampled", default=True)
+
 
 class Tracer:
     """Tracer using AWS-XRay to provide decorators with known Airline defaults for Lambda functions
 
     When running locally, it honours POWERTOOLS_TRACE_DISABLED environment variable
     so end user code doesn't have to be modified to run it locally
-    instead Tracer returns dummy segments/subsegments.
+    instead decorators return functions undecorated, adding no overhead per call.
 
     When running locally via SAM CLI, it'll automatically disable tracing.
 
-    It patches all available libraries supported by X-Ray SDK
+    It patches all available libraries supported by X-Ray SDK unless given modules to patch,
+    either right away or lazily once each library is first imported
     Ref: https://docs.aws.amazon.com/xray-sdk-for-python/latest/reference/thirdparty.html
 
+    Responses of decorated functions are captured as metadata always, only on error
+    or for a sampled fraction of calls, and metadata values are capped to a byte budget
+    so segments stay within X-Ray daemon UDP limit.
+
+    Invocations are all traced unless given local sampling rules. Invocations not sampled
+    skip subsegments, annotations and metadata altogether, unless lambda handler raises,
+    in which case its subsegment is recorded with the exception and state machine annotations.
+
+    Given a Profiler, every call to functions decorated with `capture_method` is also timed
+    in-process and emitted as metrics, regardless of tracing being disabled or sampled.
+
     Environment variables
     ---------------------
     POWERTOOLS_TRACE_DISABLED : str
         disable tracer (e.g. "true", "True", "TRUE")
     POWERTOOLS_SERVICE_NAME : str
         service name
+    POWERTOOLS_TRACE_PATCH_MODULES : str
+        comma separated modules to patch (e.g. "boto3,requests")
+    POWERTOOLS_TRACE_LAZY_PATCH : str
+        patch modules once first imported (e.g. "true", "True", "TRUE")
+    POWERTOOLS_TRACE_METADATA_CAPTURE : str
+        when responses are captured as metadata (e.g. "always", "on_error", "sampled")
+    POWERTOOLS_TRACE_METADATA_SAMPLE_RATE : str
+        fraction of calls whose response is captured when sampled (e.g. "0.1")
+    POWERTOOLS_TRACE_METADATA_MAX_BYTES : str
+        approximate maximum size in bytes of each metadata value (e.g. "16384")
+    POWERTOOLS_TRACE_SAMPLING_RULES : str
+        JSON list of sampling rules (e.g. '[{"fields": {"outboundFlightId": "f3b1*"}, "rate": 1}]')
 
     Example
     -------
@@ -81,6 +128,39 @@ class Tracer:
             >>> response = greeting(name="Lessa")
             >>> return response
 
+    A Lambda function only patching boto3, once it's first imported
+
+        >>> from lambda_python_powertools.tracing import Tracer
+        >>> tracer = Tracer(service="booking", patch_modules=["boto3"], lazy_patch=True)
+        >>> import boto3
+
+    A Lambda function capturing responses of 10% of calls, and errors of every call
+
+        >>> from lambda_python_powertools.tracing import MetadataCapture, Tracer
+        >>> tracer = Tracer(
+                service="payment",
+                metadata_capture=MetadataCapture.Sampled,
+                metadata_sample_rate=0.1
+            )
+
+    A Lambda function tracing 1 invocation per second plus 5%, and every invocation for a flight
+
+        >>> from lambda_python_powertools.tracing import SamplingRule, Tracer
+        >>> tracer = Tracer(
+                service="payment",
+                sampling_rules=[
+                    SamplingRule(fields={"outboundFlightId": "f3b1*"}, fixed_target=0, rate=1),
+                    SamplingRule(fixed_target=1, rate=0.05),
+                ]
+            )
+
+    A Lambda function emitting decorated functions duration as metrics
+
+        >>> from lambda_python_powertools.metrics import Metrics
+        >>> from lambda_python_powertools.tracing import Profiler, Tracer
+        >>> metrics = Metrics(service="booking")
+        >>> tracer = Tracer(service="booking", profiler=Profiler(metrics=metrics))
+
     Parameters
     ----------
     service: str
@@ -88,6 +168,33 @@ class Tracer:
     disabled: bool
         Flag to explicitly disable tracing, useful when running locally.
         Env: POWERTOOLS_TRACE_DISABLED="true"
+    patch_modules: Sequence[str]
+        X-Ray SDK modules to patch (e.g. ["boto3", "requests"]), by default all supported modules
+        Env: POWERTOOLS_TRACE_PATCH_MODULES="boto3,requests"
+    lazy_patch: bool
+        Flag to patch modules once they're first imported, only used with patch_modules
+        Env: POWERTOOLS_TRACE_LAZY_PATCH="true"
+    metadata_capture: Union[str, MetadataCapture]
+        When decorated functions' responses are captured as metadata, by default always
+        Env: POWERTOOLS_TRACE_METADATA_CAPTURE="on_error"
+    metadata_sample_rate: float
+        Fraction of calls whose response is captured when sampled, by default 0.1
+        Env: POWERTOOLS_TRACE_METADATA_SAMPLE_RATE="0.1"
+    metadata_max_bytes: int
+        Approximate maximum size in bytes of each metadata value, by default 16KB
+        Env: POWERTOOLS_TRACE_METADATA_MAX_BYTES="16384"
+    sampling_rules: Sequence[Union[SamplingRule, Dict]]
+        Rules, or their keyword arguments, matching Lambda function name and event fields
+        to decide which invocations are traced, by default every invocation is traced
+        Env: POWERTOOLS_TRACE_SAMPLING_RULES='[{"handler": "*Collect*", "rate": 0.1}]'
+    profiler: Profiler
+        Profiler timing calls to functions decorated with `capture_method`, flushed
+        at the end of each invocation, by default None
+
+    Raises
+    ------
+    ValueError
+        When metadata capture, metadata sample rate or sampling rules are invalid
 
     Returns
     -------
@@ -100,14 +207,50 @@ class Tracer:
         service: str = "service_undefined",
         disabled: bool = False,
         provider: xray_recorder = xray_recorder,
+        patch_modules: Sequence[str] = None,
+        lazy_patch: bool = False,
+        metadata_capture: Union[str, MetadataCapture] = MetadataCapture.Always,
+        metadata_sample_rate: float = 0.1,
+        metadata_max_bytes: int = METADATA_MAX_BYTES,
+        sampling_rules: Sequence[Union[SamplingRule, Dict]] = None,
+        profiler: Profiler = None,
     ):
         self.provider = provider or xray_recorder
         self.disabled = self.__is_trace_disabled() or disabled
         self.service = os.getenv("POWERTOOLS_SERVICE_NAME") or service
+
+        patch_modules_env_option = os.getenv("POWERTOOLS_TRACE_PATCH_MODULES")
+        if patch_modules_env_option:
+            patch_modules = [module.strip() for module in patch_modules_env_option.split(",")]
+
+        lazy_patch_env_option = str(os.getenv("POWERTOOLS_TRACE_LAZY_PATCH", "false"))
+        self.patch_modules = patch_modules
+        self.lazy_patch = strtobool(lazy_patch_env_option) or lazy_patch
+
+        self.metadata_capture = build_metadata_capture_from_str(
+            os.getenv("POWERTOOLS_TRACE_METADATA_CAPTURE") or metadata_capture
+        )
+        self.metadata_sample_rate = self.__validate_sample_rate(
+            float(os.getenv("POWERTOOLS_TRACE_METADATA_SAMPLE_RATE", metadata_sample_rate))
+        )
+        self.metadata_max_bytes = int(
+            os.getenv("POWERTOOLS_TRACE_METADATA_MAX_BYTES", metadata_max_bytes)
+        )
+
+        sampling_rules_env_option = os.getenv("POWERTOOLS_TRACE_SAMPLING_RULES")
+        if sampling_rules_env_option:
+            sampling_rules = json.loads(sampling_rules_env_option)
+
+        self.sampler = LocalSampler(rules=sampling_rules) if sampling_rules else None
+        self.profiler = profiler
         self.__patch()
 
     def capture_lambda_handler(
-        self, lambda_handler: Callable[[Dict, Any], Any] = None, process_booking_sfn: bool = False
+        self,
+        lambda_handler: Callable[[Dict, Any], Any] = None,
+        process_booking_sfn: bool = False,
+        metadata_capture: Union[str, MetadataCapture] = None,
+        metadata_sample_rate: float = None,
     ):
         """Decorator to create subsegment for lambda handlers
 
@@ -116,6 +259,10 @@ class Tracer:
         across all Lambdas, and we can hide that boilerplate in here
         and also capture any exception any Lambda function throws or its response as metadata
 
+        When tracing is disabled, lambda handler is returned undecorated, or only flushing profiler
+
+        Invocations not sampled by Tracer sampling rules are only traced if they raise
+
         Example
         -------
         Lambda function using capture_lambda_handler decorator
@@ -130,10 +277,22 @@ class Tracer:
             >>> @tracer.capture_lambda_handler
                 def handler(event, context)
 
+        Lambda function only capturing its response as metadata when it raises
+
+            >>> tracer = Tracer(service="payment")
+            >>> @tracer.capture_lambda_handler(metadata_capture="on_error")
+                def handler(event, context)
+
         Parameters
         ----------
         method : Callable
             Method to annotate on
+        process_booking_sfn : bool, optional
+            Flag to annotate Process Booking State Machine input, by default False
+        metadata_capture : Union[str, MetadataCapture], optional
+            When response is captured as metadata, by default Tracer metadata_capture
+        metadata_sample_rate : float, optional
+            Fraction of calls whose response is captured when sampled, by default Tracer metadata_sample_rate
 
         Raises
         ------
@@ -147,24 +306,55 @@ class Tracer:
         # This allows us to avoid writing wrapper_wrapper type of fn
         if lambda_handler is None:
             logger.debug("Decorator called with parameters")
-            logger.debug(f"process booking sfn: {process_booking_sfn}")
+            logger.debug("process booking sfn: %s", process_booking_sfn)
             return functools.partial(
-                self.capture_lambda_handler, process_booking_sfn=process_booking_sfn
+                self.capture_lambda_handler,
+                process_booking_sfn=process_booking_sfn,
+                metadata_capture=metadata_capture,
+                metadata_sample_rate=metadata_sample_rate,
             )
 
+        if self.disabled:
+            logger.debug("Tracing has been disabled, returning lambda handler undecorated")
+            return self.__flush_profile_after(lambda_handler)
+
+        subsegment_name = f"## {lambda_handler.__name__}"
+        capture, sample_rate = self.__resolve_metadata_capture(
+            metadata_capture=metadata_capture, metadata_sample_rate=metadata_sample_rate
+        )
+
         @functools.wraps(lambda_handler)
         def decorate(event, context):
-            self.__create_subsegment(name=f"## {lambda_handler.__name__}")
+            if self.sampler is not None:
+                handler_name = getattr(context, "function_name", lambda_handler.__name__)
+                if not self.sampler.should_sample(handler=handler_name, event=event):
+                    return self.__call_unsampled(
+                        lambda_handler=lambda_handler,
+                        event=event,
+                        context=context,
+                        process_booking_sfn=process_booking_sfn,
+                    )
+
+            is_cold_start = cold_start.invocation_begin()
+            try:
+                subsegment = self.__create_subsegment(name=subsegment_name)
+                if is_cold_start:
+                    self.__capture_cold_start(subsegment=subsegment)
+            except Exception:
+                cold_start.invocation_end()
+                raise
 
             if process_booking_sfn:
-                self.__capture_process_booking_state_machine(event=event)
+                self.__capture_process_booking_state_machine(
+                    subsegment=subsegment, event=event, context=context
+                )
 
             try:
                 logger.debug("Calling lambda handler")
                 response = lambda_handler(event, context)
                 logger.debug("Received lambda handler response successfully")
                 logger.debug(response)
-                if response:
+                if response and should_capture_response(capture, sample_rate):
                     self.put_metadata("lambda handler response", response)
             except Exception as err:
                 logger.debug("Exception received from lambda handler")
@@ -172,17 +362,34 @@ class Tracer:
                 raise err
             finally:
                 self.__end_subsegment()
+                cold_start.invocation_end()
+                self.__flush_profile()
 
             return response
 
         return decorate
 
-    def capture_method(self, method: Callable = None):
+    def capture_method(
+        self,
+        method: Callable = None,
+        metadata_capture: Union[str, MetadataCapture] = None,
+        metadata_sample_rate: float = None,
+    ):
         """Decorator to create subsegment for arbitrary functions
 
         It also captures both response and exceptions as metadata
         and creates a subsegment named `## <method_name>`
 
+        Coroutines, generators and async generators keep their subsegment open
+        until they complete, or are exhausted. Their subsegments are added to the entity
+        in progress when they start and closed explicitly, rather than pushed to
+        X-Ray SDK thread local entity stack, so concurrent coroutines or interleaved
+        generators don't end one another's subsegment. Coroutines traced within
+        a traced coroutine are nested under it, including across `asyncio.gather`,
+        while calls traced by X-Ray SDK patches are recorded under the entity in progress.
+
+        When tracing is disabled, method is returned undecorated, or only timed by profiler
+
         Example
         -------
         Custom function using capture_method decorator
@@ -192,10 +399,26 @@ class Tracer:
             >>> @tracer.capture_method
                 def some_function()
 
+        Custom function capturing its response for 1% of calls
+
+            >>> @tracer.capture_method(metadata_capture="sampled", metadata_sample_rate=0.01)
+                def some_function()
+
+        Coroutines collecting payments concurrently, each within its own subsegment
+
+            >>> @tracer.capture_method
+                async def collect_payment(charge_id)
+
+            >>> await asyncio.gather(*[collect_payment(charge_id) for charge_id in charges])
+
         Parameters
         ----------
         method : Callable
             Method to annotate on
+        metadata_capture : Union[str, MetadataCapture], optional
+            When response is captured as metadata, by default Tracer metadata_capture
+        metadata_sample_rate : float, optional
+            Fraction of calls whose response is captured when sampled, by default Tracer metadata_sample_rate
 
         Raises
         ------
@@ -203,21 +426,57 @@ class Tracer:
             Exception raised by method
         """
 
+        # Decorator called with parameters, see capture_lambda_handler
+        if method is None:
+            return functools.partial(
+                self.capture_method,
+                metadata_capture=metadata_capture,
+                metadata_sample_rate=metadata_sample_rate,
+            )
+
+        if self.profiler is not None:
+            method = self.profiler.profile(method)
+
+        if self.disabled:
+            logger.debug("Tracing has been disabled, returning %s undecorated", method.__name__)
+            return method
+
+        method_name = method.__name__
+        subsegment_name = f"## {method_name}"
+        response_key = f"{method_name} response"
+        error_key = f"{method_name} error"
+        capture, sample_rate = self.__resolve_metadata_capture(
+            metadata_capture=metadata_capture, metadata_sample_rate=metadata_sample_rate
+        )
+
+        if inspect.iscoroutinefunction(method):
+            return self.__capture_coroutine(method=method, capture=capture, sample_rate=sample_rate)
+
+        if inspect.isgeneratorfunction(method):
+            return self.__capture_generator(method=method, capture=capture, sample_rate=sample_rate)
+
+        if inspect.isasyncgenfunction(method):
+            return self.__capture_async_generator(
+                method=method, capture=capture, sample_rate=sample_rate
+            )
+
         @functools.wraps(method)
         def decorate(*args, **kwargs):
-            method_name = f"{method.__name__}"
-            self.__create_subsegment(name=f"## {method_name}")
+            if not invocation_sampled.get():
+                return method(*args, **kwargs)
+
+            self.__create_subsegment(name=subsegment_name)
 
             try:
-                logger.debug(f"Calling method: {method_name}")
+                logger.debug("Calling method: %s", method_name)
                 response = method(*args, **kwargs)
-                logger.debug(f"Received {method_name} response successfully")
+                logger.debug("Received %s response successfully", method_name)
                 logger.debug(response)
-                if response is not None:
-                    self.put_metadata(f"{method_name} response", response)
+                if response is not None and should_capture_response(capture, sample_rate):
+                    self.put_metadata(response_key, response)
             except Exception as err:
-                logger.debug(f"Exception received from '{method_name}'' method")
-                self.put_metadata(f"{method_name} error", err)
+                logger.debug("Exception received from '%s' method", method_name)
+                self.put_metadata(error_key, err)
                 raise err
             finally:
                 self.__end_subsegment()
@@ -245,15 +504,51 @@ class Tracer:
         """
         # Will no longer be needed once #155 is resolved
         # https://github.com/aws/aws-xray-sdk-python/issues/155
-        if self.disabled:
+        if self.disabled or not invocation_sampled.get():
             return
 
-        logger.debug(f"Annotating on key '{key}'' with '{value}''")
+        logger.debug("Annotating on key '%s' with '%s'", key, value)
         self.provider.put_annotation(key=key, value=value)
 
+    def put_annotations(self, annotations: Dict[str, Any]):
+        """Adds many annotations to existing segment or subsegment at once
+
+        Current segment or subsegment is looked up once for all annotations
+
+        Example
+        -------
+        Custom annotations for a pseudo service named booking
+
+            >>> tracer = Tracer(service="booking")
+            >>> tracer.put_annotations({"Booking": booking_id, "BookingStatus": "RESERVED"})
+
+        Parameters
+        ----------
+        annotations : Dict[str, Any]
+            Annotation keys and values (e.g. {"BookingStatus": "CONFIRMED"})
+        """
+        if self.disabled or not invocation_sampled.get():
+            return
+
+        logger.debug("Annotating on keys %s", list(annotations))
+        entity = self.provider.get_trace_entity()
+        if entity is None:
+            return
+
+        self.__annotate(entity=entity, annotations=annotations)
+
+    @staticmethod
+    def __annotate(entity: models.entity.Entity, annotations: Dict[str, Any]):
+        """Adds annotations to a given segment or subsegment"""
+        for key, value in annotations.items():
+            entity.put_annotation(key, value)
+
     def put_metadata(self, key: str, value: object, namespace: str = None):
         """Adds metadata to existing segment or subsegment
 
+        Value is capped to Tracer metadata_max_bytes, and only what fits in the budget
+        is converted to JSON-friendly types (e.g. botocore ClientError as a dict)
+
         Parameters
         ----------
         key : str
@@ -273,41 +568,364 @@ class Tracer:
         """
         # Will no longer be needed once #155 is resolved
         # https://github.com/aws/aws-xray-sdk-python/issues/155
-        if self.disabled:
+        if self.disabled or not invocation_sampled.get():
             return
 
         _namespace = namespace or self.service
-        logger.debug(f"Adding metadata on key '{key}'' with '{value}'' at namespace '{namespace}''")
-        self.provider.put_metadata(key=key, value=value, namespace=_namespace)
+        logger.debug(
+            "Adding metadata on key '%s' with '%s' at namespace '%s'", key, value, namespace
+        )
+        self.provider.put_metadata(
+            key=key, value=self.__bound_metadata(key=key, value=value), namespace=_namespace
+        )
+
+    def __bound_metadata(self, key: str, value: Any) -> Any:
+        """Projects metadata value within Tracer metadata_max_bytes"""
+        bounded = bound_size(value, self.metadata_max_bytes)
+        if bounded.truncations:
+            logger.debug(
+                "Metadata on key '%s' truncated %d times to fit %d bytes",
+                key,
+                bounded.truncations,
+                self.metadata_max_bytes,
+            )
+
+        return bounded.value
+
+    def __capture_coroutine(
+        self, method: Callable, capture: MetadataCapture, sample_rate: float
+    ) -> Callable:
+        """Wraps a coroutine function keeping a subsegment open until the coroutine completes"""
+        method_name = method.__name__
+
+        @functools.wraps(method)
+        async def decorate(*args, **kwargs):
+            if not invocation_sampled.get():
+                return await method(*args, **kwargs)
+
+            subsegment = self.__begin_detached_subsegment(name=f"## {method_name}")
+            if subsegment is None:
+                return await method(*args, **kwargs)
+
+            token = async_subsegment.set(subsegment)
+            try:
+                response = await method(*args, **kwargs)
+                if response is not None and should_capture_response(capture, sample_rate):
+                    self.__put_subsegment_metadata(subsegment, f"{method_name} response", response)
+            except Exception as err:
+                logger.debug("Exception received from '%s' coroutine", method_name)
+                self.__put_subsegment_metadata(subsegment, f"{method_name} error", err)
+                raise
+            finally:
+                async_subsegment.reset(token)
+                self.__end_detached_subsegment(subsegment)
+
+            return response
+
+        return decorate
+
+    def __capture_generator(
+        self, method: Callable, capture: MetadataCapture, sample_rate: float
+    ) -> Callable:
+        """Wraps a generator function keeping a subsegment open from first item until exhausted
+
+        Items yielded aren't captured as metadata, only the generator return value if any
+        """
+        method_name = method.__name__
+
+        @functools.wraps(method)
+        def decorate(*args, **kwargs):
+            if not invocation_sampled.get():
+                return (yield from method(*args, **kwargs))
+
+            subsegment = self.__begin_detached_subsegment(name=f"## {method_name}")
+            if subsegment is None:
+                return (yield from method(*args, **kwargs))
+
+            try:
+                response = yield from method(*args, **kwargs)
+                if response is not None and should_capture_response(capture, sample_rate):
+                    self.__put_subsegment_metadata(subsegment, f"{method_name} response", response)
+            except Exception as err:
+                logger.debug("Exception received from '%s' generator", method_name)
+                self.__put_subsegment_metadata(subsegment, f"{method_name} error", err)
+                raise
+            finally:
+                self.__end_detached_subsegment(subsegment)
+
+            return response
+
+        return decorate
+
+    def __capture_async_generator(
+        self, method: Callable, capture: MetadataCapture, sample_rate: float
+    ) -> Callable:
+        """Wraps an async generator function keeping a subsegment open until it's exhausted
+
+        Values sent and exceptions thrown in are forwarded to the generator, as `yield from`
+        would for generators, while cancellation and other base exceptions close it.
+        Coroutines traced while the generator runs are nested under its subsegment,
+        though not those of its consumer in between items.
+
+        Items yielded aren't captured as metadata, as async generators can't return values
+        """
+        method_name = method.__name__
 
-    def __capture_process_booking_state_machine(self, event: Dict = None):
-        """Captures process booking state machine input for annotation and metadata
+        @functools.wraps(method)
+        async def decorate(*args, **kwargs):
+            subsegment = None
+            if invocation_sampled.get():
+                subsegment = self.__begin_detached_subsegment(name=f"## {method_name}")
+
+            if subsegment is None:
+                async for item in method(*args, **kwargs):
+                    yield item
+                return
+
+            generator = method(*args, **kwargs)
+
+            async def resume(step: Callable, value: Any) -> Any:
+                token = async_subsegment.set(subsegment)
+                try:
+                    return await step(value)
+                finally:
+                    async_subsegment.reset(token)
+
+            try:
+                item = await resume(generator.asend, None)
+                while True:
+                    try:
+                        sent = yield item
+                    except Exception as thrown:
+                        item = await resume(generator.athrow, thrown)
+                    else:
+                        item = await resume(generator.asend, sent)
+            except StopAsyncIteration:
+                pass
+            except Exception as err:
+                logger.debug("Exception received from '%s' async generator", method_name)
+                self.__put_subsegment_metadata(subsegment, f"{method_name} error", err)
+                raise
+            finally:
+                await generator.aclose()
+                self.__end_detached_subsegment(subsegment)
+
+        return decorate
+
+    def __begin_detached_subsegment(self, name: str) -> models.subsegment.Subsegment:
+        """Creates a subsegment under the entity in progress without pushing it to the entity stack
+
+        Parent is the subsegment of the coroutine being traced in the current asyncio task,
+        or X-Ray SDK current segment or subsegment otherwise
 
         Parameters
         ----------
-        event : dict
-            Process Booking State Machine
+        name : str
+            Subsegment name
+
+        Returns
+        -------
+        models.subsegment.Subsegment
+            AWS X-Ray Subsegment, a dummy subsegment if segment isn't sampled,
+            or None if there is no segment, in which case the method isn't traced
+        """
+        parent = async_subsegment.get() or self.provider.get_trace_entity()
+        if parent is None:
+            # X-Ray SDK already handled the missing segment as per its context_missing
+            # strategy, logging it by default, as begin_subsegment does for sync methods
+            return None
+
+        segment = getattr(parent, "parent_segment", parent)
+
+        if segment.sampled:
+            subsegment = models.subsegment.Subsegment(name, "local", segment)
+        else:
+            subsegment = models.dummy_entities.DummySubsegment(segment, name)
+
+        # Same as X-Ray SDK, so segment ref counter accounts for subsegments in progress
+        parent.add_subsegment(subsegment)
+
+        return subsegment
+
+    def __end_detached_subsegment(self, subsegment: models.subsegment.Subsegment):
+        """Closes a subsegment created by `__begin_detached_subsegment`, streaming it if eligible
+
+        Parameters
+        ----------
+        subsegment : models.subsegment.Subsegment
+            Subsegment previously created
         """
-        logger.debug("Capturing input from process booking state machine")
-        logger.debug(event)
+        subsegment.close()
+        self.provider.stream_subsegments()
+
+    def __put_subsegment_metadata(
+        self, subsegment: models.subsegment.Subsegment, key: str, value: Any
+    ):
+        """Adds metadata to a given subsegment rather than X-Ray SDK current entity"""
+        subsegment.put_metadata(key, self.__bound_metadata(key=key, value=value), self.service)
+
+    def __call_unsampled(
+        self,
+        lambda_handler: Callable[[Dict, Any], Any],
+        event: Dict,
+        context: Any,
+        process_booking_sfn: bool,
+    ) -> Any:
+        """Calls lambda handler for an invocation not sampled, only tracing it if it raises
+
+        Parameters
+        ----------
+        lambda_handler : Callable[[Dict, Any], Any]
+            Lambda handler
+        event : Dict
+            Lambda event
+        context : Any
+            Lambda context
+        process_booking_sfn : bool
+            Flag to annotate Process Booking State Machine input when handler raises
 
-        customer_id = event.get("customerId", "UNDEFINED")
-        booking_id = event.get("bookingId", "UNDEFINED")
-        charge_id = event.get("chargeId", "UNDEFINED")
-        outbound_flight_id = event.get("outboundFlightId", "UNDEFINED")
-        state_machine_execution_id = event.get("name", "UNDEFINED")
+        Raises
+        ------
+        err
+            Exception raised by lambda handler
+        """
+        is_cold_start = cold_start.invocation_begin()
+        started_at = time.time()
+        try:
+            token = invocation_sampled.set(False)
+            try:
+                return lambda_handler(event, context)
+            finally:
+                invocation_sampled.reset(token)
+        except Exception as err:
+            logger.debug("Exception received from lambda handler not sampled, tracing it")
+            subsegment = self.__create_subsegment(name=f"## {lambda_handler.__name__}")
+            subsegment.start_time = started_at
+            try:
+                if is_cold_start:
+                    self.__capture_cold_start(subsegment=subsegment)
+
+                if process_booking_sfn:
+                    self.__capture_process_booking_state_machine(
+                        subsegment=subsegment, event=event, context=context
+                    )
+
+                self.put_metadata(f"{self.service}_error", err)
+            finally:
+                self.__end_subsegment()
 
+            raise
+        finally:
+            cold_start.invocation_end()
+            self.__flush_profile()
+
+    def __flush_profile(self):
+        """Flushes profiler, if any, without ever failing an invocation"""
+        if self.profiler is None:
+            return
+
+        try:
+            self.profiler.flush()
+        except Exception:
+            logger.exception("Failed to flush profile")
+
+    def __flush_profile_after(
+        self, lambda_handler: Callable[[Dict, Any], Any]
+    ) -> Callable[[Dict, Any], Any]:
+        """Wraps lambda handler only to flush profiler, or returns it as-is if there's none"""
+        if self.profiler is None:
+            return lambda_handler
+
+        @functools.wraps(lambda_handler)
+        def decorate(event, context):
+            try:
+                return lambda_handler(event, context)
+            finally:
+                self.__flush_profile()
+
+        return decorate
+
+    def __resolve_metadata_capture(
+        self, metadata_capture: Union[str, MetadataCapture], metadata_sample_rate: float
+    ) -> Tuple[MetadataCapture, float]:
+        """Resolves decorator metadata capture policy, falling back to Tracer defaults
+
+        Returns
+        -------
+        Tuple[MetadataCapture, float]
+            Metadata capture policy and sample rate
+        """
+        if metadata_capture is None:
+            capture = self.metadata_capture
+        else:
+            capture = build_metadata_capture_from_str(metadata_capture)
+
+        if metadata_sample_rate is None:
+            sample_rate = self.metadata_sample_rate
+        else:
+            sample_rate = self.__validate_sample_rate(metadata_sample_rate)
+
+        return capture, sample_rate
+
+    @staticmethod
+    def __validate_sample_rate(sample_rate: float) -> float:
+        """Validates metadata sample rate is a fraction between 0 and 1"""
+        if not 0 <= sample_rate <= 1:
+            raise ValueError(
+                f"Invalid Metadata Sample Rate - Received {sample_rate}. Value must be 0 to 1"
+            )
+
+        return sample_rate
+
+    def __capture_process_booking_state_machine(
+        self, subsegment: models.subsegment, event: Dict = None, context: Any = None
+    ):
+        """Annotates lambda handler subsegment with process booking state machine input
+
+        Input fields are extracted once per invocation into the invocation context shared with
+        `logger_inject_process_booking_sfn` logging context and handler code
+
+        Parameters
+        ----------
+        subsegment : models.subsegment
+            Lambda handler subsegment
+        event : dict
+            Process Booking State Machine
+        context : Any
+            Lambda context
+        """
         logger.debug("Annotating process booking state machine data into subsegment")
-        self.put_annotation("Payment", charge_id)
-        self.put_annotation("Booking", booking_id)
-        self.put_annotation("Customer", customer_id)
-        self.put_annotation("Flight", outbound_flight_id)
-        self.put_annotation("StateMachineExecution", state_machine_execution_id)
+        booking = build_invocation_context(event=event, context=context)
+
+        annotations = {
+            "Payment": booking.charge_id,
+            "Booking": booking.booking_id,
+            "Customer": booking.customer_id,
+            "Flight": booking.outbound_flight_id,
+            "StateMachineExecution": booking.state_machine_execution_id,
+        }
+        self.__annotate(
+            entity=subsegment,
+            annotations={
+                key: "UNDEFINED" if value is None else value for key, value in annotations.items()
+            },
+        )
+
+    def __capture_cold_start(self, subsegment: models.subsegment):
+        """Annotates cold start and init duration, and adds init steps as metadata
 
-    def __create_subsegment(self, name: str) -> models.subsegment:
-        """Creates subsegment or a dummy segment plus subsegment if tracing is disabled
+        Parameters
+        ----------
+        subsegment : models.subsegment
+            Lambda handler subsegment of the first invocation
+        """
+        logger.debug("Annotating cold start")
+        subsegment.put_annotation("ColdStart", True)
+        subsegment.put_annotation("InitDuration", cold_start.init_duration)
+        subsegment.put_metadata("init_steps", cold_start.init_steps, self.service)
 
-        It also assumes Tracer would be instantiated statically so that cold starts are captured.
+    def __create_subsegment(self, name: str) -> models.subsegment:
+        """Creates subsegment
 
         Parameters
         ----------
@@ -325,23 +943,7 @@ class Tracer:
         models.subsegment
             AWS X-Ray Subsegment
         """
-        # Will no longer be needed once #155 is resolved
-        # https://github.com/aws/aws-xray-sdk-python/issues/155
-        subsegment = None
-
-        if self.disabled:
-            logger.debug("Tracing has been disabled, return dummy subsegment instead")
-            segment = models.dummy_entities.DummySegment()
-            subsegment = models.dummy_entities.DummySubsegment(segment)
-        else:
-            subsegment = self.provider.begin_subsegment(name=name)
-            global is_cold_start
-            if is_cold_start:
-                logger.debug("Annotating cold start")
-                subsegment.put_annotation("ColdStart", True)
-                is_cold_start = False
-
-        return subsegment
+        return self.provider.begin_subsegment(name=name)
 
     def __end_subsegment(self):
         """Ends an existing subsegment
@@ -351,10 +953,6 @@ class Tracer:
         subsegment : models.subsegment
             Subsegment previously created
         """
-        if self.disabled:
-            logger.debug("Tracing has been disabled, return instead")
-            return
-
         self.provider.end_subsegment()
 
     def __patch(self):
@@ -373,7 +971,11 @@ class Tracer:
             logger.debug("Running under SAM CLI env or not in Lambda; aborting patch")
             return
 
-        patch_all()  # pragma: no cover
+        with cold_start.timed("xray_patch"):
+            if self.patch_modules is None:
+                patch_all()
+            else:
+                patch_modules(self.patch_modules, lazy=self.lazy_patch)
 
     def __is_trace_disabled(self) -> bool:
         """Detects whether trace has been disabled
@@ -14,6 +14,8 @@ with open("HISTORY.md") as history_file:
 
 requirements = ["aws-xray-sdk==2.4.2", "aws-lambda-logging==0.1.1"]  # noqa: E501
 
+extras_requirements = {"fast": ["orjson"]}
+
 setup_requirements = ["pytest-runner"]
 
 test_requirements = ["pytest"]
@@ -29,6 +31,7 @@ setup(
     ],
     description="Python utilities for AWS Lambda functions used by the Serverless Airline example",
     install_requires=requirements,
+    extras_require=extras_requirements,
     license="MIT license",
     long_description=readme + "\n\n" + history,
     include_package_data=True,
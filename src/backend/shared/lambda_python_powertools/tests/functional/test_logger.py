@@ -1,11 +1,17 @@
 import io
 import json
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
+from decimal import Decimal
 
+import aws_lambda_logging
 import pytest
 
+from lambda_python_powertools.helper.cold_start import cold_start
 from lambda_python_powertools.logging import (
+    LazyMessage,
+    LogSizeLimiter,
     MetricUnit,
     log_metric,
     logger_inject_lambda_context,
@@ -268,12 +274,10 @@ def test_inject_lambda_cold_start(root_logger, stdout, lambda_context):
     # WHEN logger is setup
     # THEN cold_start key should only be true in the first call
 
-    from lambda_python_powertools.logging import logger
-
     # # As we run tests in parallel global cold_start value can be false
     # # here we reset to simulate the correct behaviour
     # # since Lambda will only import our logger lib once per concurrent execution
-    logger.is_cold_start = True
+    cold_start.reset()
 
     logger = logger_setup()
 
@@ -297,10 +301,12 @@ def test_inject_lambda_cold_start(root_logger, stdout, lambda_context):
     # First execution
     assert "true" == first_log["cold_start"]
     assert "true" == second_log["cold_start"]
+    assert first_log["init_duration"] >= 0
 
     # Second execution
     assert "false" == third_log["cold_start"]
     assert "false" == fourth_log["cold_start"]
+    assert "init_duration" not in third_log
 
 
 def test_log_metric(capsys):
@@ -378,3 +384,256 @@ def test_log_metric_invalid_unit(invalid_input, expected):
 
     with pytest.raises(expected):
         log_metric(name="test_metric", **invalid_input)
+
+
+def test_inject_lambda_context_does_not_setup_logger_per_invocation(
+    mocker, root_logger, stdout, lambda_context
+):
+    # GIVEN logger has been setup once at import
+    # WHEN a decorated lambda handler is called many times
+    # THEN root handlers should not be reconfigured per invocation
+    logger = logger_setup()
+    setup_spy = mocker.spy(aws_lambda_logging, "setup")
+
+    @logger_inject_lambda_context
+    def handler(event, context):
+        logger.info("Hello")
+
+    handler({}, lambda_context)
+    handler({}, lambda_context)
+
+    assert setup_spy.call_count == 0
+
+
+def test_inject_process_booking_sfn_swaps_context(root_logger, stdout, lambda_context):
+    # GIVEN a lambda function is decorated with process booking logger
+    # WHEN it is called with two different bookings
+    # THEN each log statement should only carry its own invocation context
+    logger = logger_setup()
+
+    @logger_inject_process_booking_sfn
+    def handler(event, context):
+        logger.info("Hello")
+
+    handler({"bookingId": "first", "chargeId": "ch_first"}, lambda_context)
+    handler({"bookingId": "second"}, lambda_context)
+
+    stdout.seek(0)
+    first_log, second_log = [json.loads(line.strip()) for line in stdout.readlines()]
+
+    assert first_log["booking_id"] == "first"
+    assert first_log["charge_id"] == "ch_first"
+    assert second_log["booking_id"] == "second"
+    assert "charge_id" not in second_log
+
+
+def test_inject_process_booking_sfn_context_in_threads(root_logger, stdout, lambda_context):
+    # GIVEN a lambda function decorated with process booking logger logging from worker threads
+    # WHEN it is called with two different bookings
+    # THEN thread log statements should carry the invocation context of their own invocation
+    logger = logger_setup()
+
+    @logger_inject_process_booking_sfn
+    def handler(event, context):
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            executor.submit(logger.info, "Hello from thread").result()
+
+    handler({"bookingId": "first"}, lambda_context)
+    handler({"bookingId": "second"}, lambda_context)
+
+    stdout.seek(0)
+    first_log, second_log = [json.loads(line.strip()) for line in stdout.readlines()]
+
+    assert first_log["message"] == "Hello from thread"
+    assert first_log["booking_id"] == "first"
+    assert first_log["function_request_id"] == lambda_context.aws_request_id
+    assert second_log["booking_id"] == "second"
+
+
+def test_lazy_message_not_built_when_level_disabled(mocker, root_logger, stdout):
+    # GIVEN logger level is INFO
+    # WHEN a lazy debug message is logged
+    # THEN message should never be built nor logged
+    logger = logger_setup(level="INFO")
+    factory = mocker.MagicMock(return_value={"operation": "test"})
+
+    logger.debug(LazyMessage(factory))
+
+    assert factory.call_count == 0
+    assert stdout.getvalue() == ""
+
+
+def test_lazy_message_structured_when_level_enabled(root_logger, stdout):
+    # GIVEN logger level is DEBUG
+    # WHEN a lazy debug message is logged
+    # THEN message should be built and logged as structured data
+    logger = logger_setup(level="DEBUG")
+
+    logger.debug(LazyMessage(lambda: {"operation": "test", "details": {"booking_id": "123"}}))
+
+    log = json.loads(stdout.getvalue())
+
+    assert log["message"] == {"operation": "test", "details": {"booking_id": "123"}}
+
+
+def test_setup_json_serializer(root_logger, stdout):
+    # GIVEN a custom JSON serializer is provided
+    # WHEN logger is setup
+    # THEN log records should be serialized with it
+    def json_serializer(log):
+        return json.dumps({"custom": log["message"]})
+
+    logger = logger_setup(json_serializer=json_serializer)
+    logger.info("Hello")
+    log = json.loads(stdout.getvalue())
+
+    assert log == {"custom": "Hello"}
+
+
+def test_setup_default_serializer_known_types(root_logger, stdout):
+    # GIVEN logger is setup with default serializer
+    # WHEN DynamoDB values are logged
+    # THEN they should be serialized with dedicated encoders
+    logger = logger_setup()
+    logger.info({"operation": "reserve_booking", "details": {"seatCapacity": Decimal("10")}})
+    log = json.loads(stdout.getvalue())
+
+    assert log["message"]["details"]["seatCapacity"] == 10
+
+
+def test_setup_sample_rate_debug_sampled(root_logger, stdout, lambda_context):
+    # GIVEN logger is setup with INFO level and every invocation sampled
+    # WHEN a decorated lambda handler logs at DEBUG level
+    # THEN debug statements should be logged along with sampling rate
+    logger = logger_setup(level="INFO", sample_rate=1)
+
+    @logger_inject_lambda_context
+    def handler(event, context):
+        logger.debug("Hello")
+
+    handler({}, lambda_context)
+
+    log = json.loads(stdout.getvalue())
+
+    assert log["message"] == "Hello"
+    assert log["sampling_rate"] == 1
+
+
+def test_setup_sample_rate_debug_not_sampled(mocker, root_logger, stdout, lambda_context):
+    # GIVEN logger is setup with INFO level and a sample rate
+    # WHEN an invocation is sampled and the next one isn't
+    # THEN debug statements should only be logged in the sampled invocation
+    logger = logger_setup(level="INFO", sample_rate=0.5)
+    mocker.patch("random.random", side_effect=[0.1, 0.9])
+
+    @logger_inject_lambda_context
+    def handler(event, context):
+        logger.debug(event["invocation"])
+
+    handler({"invocation": "sampled"}, lambda_context)
+    handler({"invocation": "not sampled"}, lambda_context)
+
+    stdout.seek(0)
+    logs = [json.loads(line.strip()) for line in stdout.readlines()]
+
+    assert [log["message"] for log in logs] == ["sampled"]
+    assert logger.level == logging.INFO
+
+
+def test_setup_sample_rate_env_var(monkeypatch, root_logger, stdout, lambda_context):
+    # GIVEN sample rate is defined via POWERTOOLS_LOGGER_SAMPLE_RATE env
+    # WHEN a decorated lambda handler logs at DEBUG level
+    # THEN debug statements should be logged
+    monkeypatch.setenv("POWERTOOLS_LOGGER_SAMPLE_RATE", "1")
+    logger = logger_setup(level="INFO")
+
+    @logger_inject_process_booking_sfn
+    def handler(event, context):
+        logger.debug("Hello")
+
+    handler({}, lambda_context)
+
+    log = json.loads(stdout.getvalue())
+
+    assert log["message"] == "Hello"
+
+
+@pytest.mark.parametrize("sample_rate", [-0.1, 1.1])
+def test_setup_sample_rate_invalid(sample_rate):
+    # GIVEN an invalid sample rate is provided
+    # WHEN logger is setup
+    # THEN ValueError should be raised
+    with pytest.raises(ValueError):
+        logger_setup(sample_rate=sample_rate)
+
+
+def test_setup_max_record_bytes(root_logger, stdout):
+    # GIVEN logger is setup with a max record size and fields to keep
+    # WHEN a large structured message is logged
+    # THEN message should be truncated while keeping fields
+    # AND truncation should be counted
+    logger = logger_setup(
+        max_record_bytes=1024, keep_fields=("operation", "details.response_status_code")
+    )
+
+    logger.info(
+        {
+            "operation": "collect_payment",
+            "details": {
+                "response_headers": {f"header_{i}": "x" * 100 for i in range(100)},
+                "response_payload": "x" * 10000,
+                "response_status_code": 200,
+            },
+        }
+    )
+
+    output = stdout.getvalue()
+    log = json.loads(output)
+    limiter = next(f for f in logger.filters if isinstance(f, LogSizeLimiter))
+
+    assert len(output) < 1024 * 1.2
+    assert log["message"]["operation"] == "collect_payment"
+    assert log["message"]["details"]["response_status_code"] == 200
+    assert limiter.truncated_records == 1
+    assert limiter.truncated_fields > 0
+
+
+def test_setup_max_record_bytes_small_records_untouched(root_logger, stdout):
+    # GIVEN logger is setup with a max record size
+    # WHEN small messages are logged, including % args
+    # THEN they should be logged as usual without counting truncations
+    logger = logger_setup(max_record_bytes=1024)
+
+    logger.info("Reserving booking for customer %s", "d749f277")
+
+    log = json.loads(stdout.getvalue())
+    limiter = next(f for f in logger.filters if isinstance(f, LogSizeLimiter))
+
+    assert log["message"] == "Reserving booking for customer d749f277"
+    assert limiter.truncated_records == 0
+
+
+def test_setup_max_record_bytes_env_var(monkeypatch, root_logger, stdout):
+    # GIVEN max record size is defined via POWERTOOLS_LOGGER_MAX_RECORD_BYTES env
+    # WHEN a long string message is logged
+    # THEN message should be truncated
+    monkeypatch.setenv("POWERTOOLS_LOGGER_MAX_RECORD_BYTES", "512")
+    logger = logger_setup()
+
+    logger.info("x" * 10000)
+
+    log = json.loads(stdout.getvalue())
+
+    assert len(log["message"]) < 512
+    assert log["message"].endswith("chars]")
+
+
+def test_setup_max_record_bytes_replaces_limiter():
+    # GIVEN logger was setup with a max record size
+    # WHEN logger is setup again without it
+    # THEN size limiter should be removed
+    logger = logger_setup(service="limiter", max_record_bytes=1024)
+    assert any(isinstance(f, LogSizeLimiter) for f in logger.filters)
+
+    logger = logger_setup(service="limiter")
+    assert not any(isinstance(f, LogSizeLimiter) for f in logger.filters)
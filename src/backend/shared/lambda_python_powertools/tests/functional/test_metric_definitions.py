@@ -0,0 +1,141 @@
+import json
+
+import pytest
+
+from lambda_python_powertools.metrics import MetricRegistry, Metrics, MetricUnit
+
+
+def test_define_emit_monitoring_line(capsys):
+    # GIVEN a metric is declared with a dimension
+    # WHEN values are emitted with and without dimension values
+    # THEN MONITORING lines should be written in log_metric format
+    registry = MetricRegistry(service="payment")
+    metric = registry.define("InvalidPaymentRequest", MetricUnit.Count, dimensions=("operation",))
+
+    metric.emit(1, operation="collect_payment")
+    metric.emit(2)
+
+    output = capsys.readouterr().out.splitlines()
+
+    assert output == [
+        "MONITORING|1|Count|InvalidPaymentRequest|ServerlessAirline|service=payment,operation=collect_payment",
+        "MONITORING|2|Count|InvalidPaymentRequest|ServerlessAirline|service=payment",
+    ]
+
+
+def test_define_emit_dimension_declaration_order(capsys):
+    # GIVEN a metric is declared with many dimensions
+    # WHEN dimensions are given in a different order, some empty
+    # THEN dimensions should be written in declaration order without empty values
+    registry = MetricRegistry(service="booking", namespace="Airline")
+    metric = registry.define("Bookings", "count", dimensions=("campaign", "customer", "outbound"))
+
+    metric.emit(1, outbound="", customer="d749f277", campaign="summer")
+
+    output = capsys.readouterr().out.strip()
+
+    assert (
+        output
+        == "MONITORING|1|Count|Bookings|Airline|service=booking,campaign=summer,customer=d749f277"
+    )
+
+
+def test_define_emit_metrics_collector(capsys):
+    # GIVEN a registry bound to a Metrics collector
+    # WHEN declared metrics are emitted during an invocation
+    # THEN values should be buffered and written as EMF with collector service and namespace
+    metrics = Metrics(service="payment", namespace="Airline")
+    registry = MetricRegistry(metrics=metrics)
+    successful_payment = registry.define("SuccessfulPayment", MetricUnit.Count)
+    invalid_request = registry.define("InvalidPaymentRequest", "Count", dimensions=("operation",))
+
+    @metrics.log_metrics
+    def handler(event, context):
+        successful_payment.emit(1)
+        successful_payment.emit(1)
+        invalid_request.emit(1, operation="collect_payment")
+
+    handler({}, {})
+
+    (document,) = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    dimensions = [directive["Dimensions"] for directive in document["_aws"]["CloudWatchMetrics"]]
+
+    assert document["SuccessfulPayment"] == [1, 1]
+    assert document["InvalidPaymentRequest"] == 1
+    assert document["operation"] == "collect_payment"
+    assert dimensions == [[["service"]], [["service", "operation"]]]
+    assert registry.namespace == "Airline"
+
+
+def test_define_returns_existing_definition():
+    # GIVEN a metric was declared
+    # WHEN it's declared again with same unit and dimensions
+    # THEN the existing definition should be returned
+    registry = MetricRegistry(service="payment")
+    metric = registry.define("SuccessfulPayment", MetricUnit.Count)
+
+    assert registry.define("SuccessfulPayment", "Count") is metric
+    assert registry["SuccessfulPayment"] is metric
+
+
+@pytest.mark.parametrize(
+    "definition",
+    [
+        {"name": "SuccessfulPayment", "unit": "Count", "dimensions": ("operation",)},
+        {"name": "SuccessfulPayment", "unit": "Seconds"},
+    ],
+)
+def test_define_conflicting_definition(definition):
+    # GIVEN a metric was declared
+    # WHEN it's declared again with different unit or dimensions
+    # THEN ValueError should be raised
+    registry = MetricRegistry(service="payment")
+    registry.define("SuccessfulPayment", MetricUnit.Count)
+
+    with pytest.raises(ValueError):
+        registry.define(**definition)
+
+
+@pytest.mark.parametrize(
+    "definition",
+    [
+        {"name": "SuccessfulPayment", "unit": "Fake"},
+        {"name": "", "unit": "Count"},
+        {"name": "SuccessfulPayment", "unit": "Count", "dimensions": [f"d{i}" for i in range(10)]},
+    ],
+)
+def test_define_invalid_definition(definition):
+    # GIVEN an invalid unit, name or too many dimensions
+    # WHEN metric is declared
+    # THEN ValueError should be raised at declaration
+    registry = MetricRegistry(service="payment")
+
+    with pytest.raises(ValueError):
+        registry.define(**definition)
+
+
+def test_emit_undeclared_dimension():
+    # GIVEN a metric declared without dimensions
+    # WHEN emitted with a dimension
+    # THEN ValueError should be raised
+    registry = MetricRegistry(service="payment")
+    metric = registry.define("SuccessfulPayment", MetricUnit.Count)
+
+    with pytest.raises(ValueError, match="customer"):
+        metric.emit(1, customer="d749f277")
+
+
+def test_registry_env_vars(monkeypatch, capsys):
+    # GIVEN service and namespace are defined via env vars
+    # WHEN a metric is emitted
+    # THEN they should be used in MONITORING line
+    monkeypatch.setenv("POWERTOOLS_SERVICE_NAME", "booking")
+    monkeypatch.setenv("POWERTOOLS_METRICS_NAMESPACE", "Airline")
+    registry = MetricRegistry()
+
+    registry.define("SuccessfulBooking", MetricUnit.Count).emit(1)
+
+    assert (
+        capsys.readouterr().out.strip()
+        == "MONITORING|1|Count|SuccessfulBooking|Airline|service=booking"
+    )
@@ -0,0 +1,281 @@
+import json
+
+import pytest
+
+from lambda_python_powertools.helper.cold_start import cold_start
+from lambda_python_powertools.metrics import Histogram, Metrics, MetricUnit
+
+
+def capture_documents(capsys):
+    captured = capsys.readouterr()
+    return [json.loads(line) for line in captured.out.splitlines()]
+
+
+def test_log_metrics_single_document(capsys):
+    # GIVEN many metrics are added during an invocation
+    # WHEN lambda handler finishes
+    # THEN a single EMF document should be written with service as a dimension
+    metrics = Metrics(service="payment")
+
+    @metrics.log_metrics
+    def handler(event, context):
+        metrics.add_metric(name="SuccessfulPayment", unit=MetricUnit.Count, value=1)
+        metrics.add_metric(name="PaymentLatency", unit=MetricUnit.Milliseconds, value=120)
+
+    handler({}, {})
+
+    (document,) = capture_documents(capsys)
+    (directive,) = document["_aws"]["CloudWatchMetrics"]
+
+    assert document["service"] == "payment"
+    assert document["SuccessfulPayment"] == 1
+    assert document["PaymentLatency"] == 120
+    assert directive["Namespace"] == "ServerlessAirline"
+    assert directive["Dimensions"] == [["service"]]
+    assert directive["Metrics"] == [
+        {"Name": "SuccessfulPayment", "Unit": "Count"},
+        {"Name": "PaymentLatency", "Unit": "Milliseconds"},
+    ]
+
+
+def test_log_metrics_merges_same_metric(capsys):
+    # GIVEN the same metric is added many times with the same dimensions
+    # WHEN lambda handler finishes
+    # THEN values should be merged into a single metric
+    metrics = Metrics(service="payment")
+
+    @metrics.log_metrics
+    def handler(event, context):
+        for latency in (10, 20, 30):
+            metrics.add_metric(name="PaymentLatency", unit=MetricUnit.Milliseconds, value=latency)
+
+    handler({}, {})
+
+    (document,) = capture_documents(capsys)
+
+    assert document["PaymentLatency"] == [10, 20, 30]
+    assert len(document["_aws"]["CloudWatchMetrics"]) == 1
+
+
+def test_log_metrics_merges_dimension_sets(capsys):
+    # GIVEN metrics are added with different but compatible dimension sets
+    # WHEN lambda handler finishes
+    # THEN a single EMF document should have one directive per dimension set
+    metrics = Metrics(service="booking")
+
+    @metrics.log_metrics
+    def handler(event, context):
+        metrics.add_metric(name="ColdStart", unit=MetricUnit.Count, value=1, function_name="test")
+        metrics.add_metric(name="SuccessfulBooking", unit=MetricUnit.Count, value=1)
+
+    handler({}, {})
+
+    (document,) = capture_documents(capsys)
+    dimensions = [directive["Dimensions"] for directive in document["_aws"]["CloudWatchMetrics"]]
+
+    assert dimensions == [[["service", "function_name"]], [["service"]]]
+    assert document["function_name"] == "test"
+
+
+def test_log_metrics_conflicting_dimension_values(capsys):
+    # GIVEN metrics are added with the same dimension but different values
+    # WHEN lambda handler finishes
+    # THEN each dimension value should be written in a separate EMF document
+    metrics = Metrics(service="booking")
+
+    @metrics.log_metrics
+    def handler(event, context):
+        metrics.add_metric(name="InvalidBookingRequest", unit="Count", value=1, operation="a")
+        metrics.add_metric(name="InvalidBookingRequest", unit="Count", value=1, operation="b")
+
+    handler({}, {})
+
+    first, second = capture_documents(capsys)
+
+    assert first["operation"] == "a"
+    assert second["operation"] == "b"
+
+
+def test_log_metrics_values_limit(capsys):
+    # GIVEN a metric has more values than EMF accepts per metric
+    # WHEN lambda handler finishes
+    # THEN values should be split across EMF documents
+    metrics = Metrics(service="payment")
+
+    @metrics.log_metrics
+    def handler(event, context):
+        for value in range(150):
+            metrics.add_metric(name="PaymentLatency", unit=MetricUnit.Milliseconds, value=value)
+
+    handler({}, {})
+
+    first, second = capture_documents(capsys)
+
+    assert first["PaymentLatency"] == list(range(100))
+    assert second["PaymentLatency"] == list(range(100, 150))
+
+
+def test_log_metrics_flush_on_exception(capsys):
+    # GIVEN a lambda handler raises an exception
+    # WHEN metrics have been added before it
+    # THEN metrics should still be written and buffer cleared
+    metrics = Metrics(service="payment")
+
+    @metrics.log_metrics
+    def handler(event, context):
+        metrics.add_metric(name="FailedPayment", unit=MetricUnit.Count, value=1)
+        raise ValueError("test")
+
+    with pytest.raises(ValueError):
+        handler({}, {})
+
+    (document,) = capture_documents(capsys)
+
+    assert document["FailedPayment"] == 1
+    assert metrics.metric_sets == {}
+
+
+def test_log_metrics_no_metrics(capsys):
+    # GIVEN no metrics are added during an invocation
+    # WHEN lambda handler finishes
+    # THEN nothing should be written
+    metrics = Metrics()
+
+    @metrics.log_metrics
+    def handler(event, context):
+        pass
+
+    handler({}, {})
+
+    assert capture_documents(capsys) == []
+
+
+def test_metrics_env_vars(monkeypatch):
+    # GIVEN service and namespace are defined via env vars
+    # WHEN Metrics is initialized without parameters
+    # THEN env var values should be used
+    monkeypatch.setenv("POWERTOOLS_SERVICE_NAME", "booking")
+    monkeypatch.setenv("POWERTOOLS_METRICS_NAMESPACE", "Airline")
+
+    metrics = Metrics()
+
+    assert metrics.service == "booking"
+    assert metrics.namespace == "Airline"
+
+
+def test_add_metric_conflicting_unit():
+    # GIVEN a metric has been added
+    # WHEN the same metric is added with a different unit
+    # THEN ValueError should be raised
+    metrics = Metrics()
+    metrics.add_metric(name="PaymentLatency", unit=MetricUnit.Milliseconds, value=1)
+
+    with pytest.raises(ValueError):
+        metrics.add_metric(name="PaymentLatency", unit=MetricUnit.Seconds, value=1)
+
+
+def test_add_histogram(capsys):
+    # GIVEN latencies observed in a histogram across a batch
+    # WHEN histogram is added and lambda handler finishes
+    # THEN a single metric should carry bucket values repeated by count
+    # AND histogram should be cleared
+    metrics = Metrics(service="payment")
+    histogram = Histogram(name="CollectPaymentLatency", unit=MetricUnit.Milliseconds)
+
+    @metrics.log_metrics
+    def handler(event, context):
+        for latency in (10, 10, 100):
+            histogram.observe(latency)
+        metrics.add_histogram(histogram, operation="collect_payment")
+
+    handler({}, {})
+
+    (document,) = capture_documents(capsys)
+    (directive,) = document["_aws"]["CloudWatchMetrics"]
+
+    assert document["CollectPaymentLatency"] == [
+        pytest.approx(10, rel=0.01),
+        pytest.approx(10, rel=0.01),
+        pytest.approx(100, rel=0.01),
+    ]
+    assert directive["Metrics"] == [{"Name": "CollectPaymentLatency", "Unit": "Milliseconds"}]
+    assert directive["Dimensions"] == [["service", "operation"]]
+    assert histogram.count == 0
+
+
+def test_add_histogram_many_observations(capsys):
+    # GIVEN a histogram with far more observations than values a metric can carry
+    # WHEN histogram is added and metrics flushed
+    # THEN a single document should carry values sampled across observations
+    metrics = Metrics(service="payment")
+    histogram = Histogram(name="CollectPaymentLatency", unit=MetricUnit.Milliseconds)
+    for latency in range(10000):
+        histogram.observe(latency)
+    metrics.add_histogram(histogram)
+    metrics.flush()
+
+    (document,) = capture_documents(capsys)
+
+    values = document["CollectPaymentLatency"]
+    assert len(values) == 100
+    assert values[0] == pytest.approx(50, rel=0.01)
+    assert values[-1] == pytest.approx(9950, rel=0.01)
+
+
+def test_add_histogram_empty(capsys):
+    # GIVEN an empty histogram
+    # WHEN histogram is added
+    # THEN no metric should be written
+    metrics = Metrics(service="payment")
+    metrics.add_histogram(Histogram(name="CollectPaymentLatency"))
+    metrics.flush()
+
+    assert capsys.readouterr().out == ""
+
+
+def test_add_metric_rate_unit(capsys):
+    # GIVEN a rate metric
+    # WHEN metrics are flushed
+    # THEN CloudWatch rate unit should be used
+    metrics = Metrics(service="payment")
+    metrics.add_metric(name="PaymentThroughput", unit="CountPerSecond", value=10)
+    metrics.flush()
+
+    (document,) = capture_documents(capsys)
+    (directive,) = document["_aws"]["CloudWatchMetrics"]
+
+    assert directive["Metrics"] == [{"Name": "PaymentThroughput", "Unit": "Count/Second"}]
+
+
+def test_log_metrics_capture_cold_start(mocker, capsys):
+    # GIVEN metrics capture cold start and an init step was timed
+    # WHEN lambda handler is invoked twice
+    # THEN cold start and init metrics should only be added on the first invocation
+    cold_start.reset()
+    with cold_start.timed("boto3_session"):
+        pass
+
+    metrics = Metrics(service="payment", capture_cold_start=True)
+
+    @metrics.log_metrics
+    def handler(event, context):
+        metrics.add_metric(name="SuccessfulPayment", unit=MetricUnit.Count, value=1)
+
+    context = mocker.MagicMock(function_name="collect")
+    handler({}, context)
+    first_invocation = capture_documents(capsys)
+    handler({}, context)
+    second_invocation = capture_documents(capsys)
+
+    (document,) = first_invocation
+    metric_names = [
+        metric["Name"]
+        for directive in document["_aws"]["CloudWatchMetrics"]
+        for metric in directive["Metrics"]
+    ]
+
+    assert metric_names == ["ColdStart", "InitDuration", "InitStepDuration", "SuccessfulPayment"]
+    assert document["ColdStart"] == 1
+    assert document["function_name"] == "collect"
+    assert document["step"] == "boto3_session"
+    assert "ColdStart" not in second_invocation[0]
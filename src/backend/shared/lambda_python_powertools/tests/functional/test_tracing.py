@@ -1,8 +1,16 @@
+import asyncio
+import json
 from dataclasses import dataclass
 
 import pytest
+from aws_xray_sdk.core.models.segment import Segment
 
-from lambda_python_powertools.tracing import Tracer
+from lambda_python_powertools.helper.cold_start import cold_start
+from lambda_python_powertools.helper.models import InvocationContext
+from lambda_python_powertools.helper.truncation import TRUNCATED_KEY
+from lambda_python_powertools.logging import logger_inject_process_booking_sfn, logger_setup
+from lambda_python_powertools.metrics import Metrics
+from lambda_python_powertools.tracing import MetadataCapture, Profiler, SamplingRule, Tracer
 
 
 @pytest.fixture
@@ -18,6 +26,7 @@ def xray_stub(mocker):
         put_annotation_mock: mocker.MagicMock = mocker.MagicMock()
         begin_subsegment_mock: mocker.MagicMock = mocker.MagicMock()
         end_subsegment_mock: mocker.MagicMock = mocker.MagicMock()
+        get_trace_entity_mock: mocker.MagicMock = mocker.MagicMock()
 
         def put_metadata(self, *args, **kwargs):
             return self.put_metadata_mock(*args, **kwargs)
@@ -31,9 +40,25 @@ def xray_stub(mocker):
         def end_subsegment(self, *args, **kwargs):
             return self.end_subsegment_mock(*args, **kwargs)
 
+        def get_trace_entity(self, *args, **kwargs):
+            return self.get_trace_entity_mock(*args, **kwargs)
+
     return XRayStub
 
 
+@pytest.fixture
+def segment_provider(mocker):
+    class SegmentProvider:
+        def __init__(self):
+            self.segment = Segment("booking")
+            self.stream_subsegments = mocker.MagicMock()
+
+        def get_trace_entity(self):
+            return self.segment
+
+    return SegmentProvider()
+
+
 def test_tracer_lambda_handler(mocker, dummy_response, xray_stub):
     put_metadata_mock = mocker.MagicMock()
     begin_subsegment_mock = mocker.MagicMock()
@@ -101,11 +126,18 @@ def test_tracer_lambda_handler_state_machine(mocker, dummy_response, xray_stub):
     def handler(event, context):
         return dummy_response
 
-    handler({}, mocker.MagicMock())
+    handler({"bookingId": "5347fc8d", "outboundFlightId": "f3b1c7a2"}, mocker.MagicMock())
 
     assert begin_subsegment_mock.call_count == 1
     assert begin_subsegment_mock.call_args == mocker.call(name="## handler")
-    assert put_annotation_mock.call_count == 5
+    assert begin_subsegment_mock.return_value.put_annotation.call_args_list == [
+        mocker.call("Payment", "UNDEFINED"),
+        mocker.call("Booking", "5347fc8d"),
+        mocker.call("Customer", "UNDEFINED"),
+        mocker.call("Flight", "f3b1c7a2"),
+        mocker.call("StateMachineExecution", "UNDEFINED"),
+    ]
+    assert put_annotation_mock.call_count == 0
     assert end_subsegment_mock.call_count == 1
 
 
@@ -129,6 +161,34 @@ def test_tracer_custom_annotation(mocker, dummy_response, xray_stub):
     assert put_annotation_mock.call_args == mocker.call(key=annotation_key, value=annotation_value)
 
 
+def test_tracer_custom_annotations(mocker, dummy_response, xray_stub):
+    # GIVEN tracer is used to add many annotations at once
+    # WHEN lambda handler is invoked
+    # THEN annotations should be added to the current entity looked up once
+    entity = mocker.MagicMock()
+    get_trace_entity_mock = mocker.MagicMock(return_value=entity)
+    put_annotation_mock = mocker.MagicMock()
+
+    xray_provider = xray_stub(
+        put_annotation_mock=put_annotation_mock, get_trace_entity_mock=get_trace_entity_mock
+    )
+    tracer = Tracer(provider=xray_provider, service="booking")
+
+    @tracer.capture_lambda_handler
+    def handler(event, context):
+        tracer.put_annotations({"Booking": "5347fc8d", "BookingStatus": "RESERVED"})
+        return dummy_response
+
+    handler({}, mocker.MagicMock())
+
+    assert get_trace_entity_mock.call_count == 1
+    assert entity.put_annotation.call_args_list == [
+        mocker.call("Booking", "5347fc8d"),
+        mocker.call("BookingStatus", "RESERVED"),
+    ]
+    assert put_annotation_mock.call_count == 0
+
+
 def test_tracer_custom_metadata(mocker, dummy_response, xray_stub):
     put_metadata_mock = mocker.MagicMock()
 
@@ -149,3 +209,490 @@ def test_tracer_custom_metadata(mocker, dummy_response, xray_stub):
     assert put_metadata_mock.call_args_list[0] == mocker.call(
         key=annotation_key, value=annotation_value, namespace="booking"
     )
+
+
+def test_tracer_lambda_handler_cold_start(mocker, dummy_response, xray_stub):
+    # GIVEN tracer decorates a lambda handler in a fresh container
+    # WHEN lambda handler is invoked twice
+    # THEN cold start, init duration and init steps should only be captured once
+    cold_start.reset()
+    subsegment = mocker.MagicMock()
+    begin_subsegment_mock = mocker.MagicMock(return_value=subsegment)
+
+    xray_provider = xray_stub(begin_subsegment_mock=begin_subsegment_mock)
+    tracer = Tracer(provider=xray_provider, service="booking")
+
+    @tracer.capture_lambda_handler
+    def handler(event, context):
+        return dummy_response
+
+    handler({}, mocker.MagicMock())
+    handler({}, mocker.MagicMock())
+
+    assert subsegment.put_annotation.call_args_list == [
+        mocker.call("ColdStart", True),
+        mocker.call("InitDuration", cold_start.init_duration),
+    ]
+    assert subsegment.put_metadata.call_args == mocker.call(
+        "init_steps", cold_start.init_steps, "booking"
+    )
+
+
+def test_tracer_metadata_capture_on_error(mocker, dummy_response, xray_stub):
+    # GIVEN method decorator only captures metadata on error
+    # WHEN decorated functions succeed and raise
+    # THEN only the exception should be captured as metadata
+    class CustomException(Exception):
+        pass
+
+    put_metadata_mock = mocker.MagicMock()
+    xray_provider = xray_stub(put_metadata_mock=put_metadata_mock)
+    tracer = Tracer(provider=xray_provider, service="booking")
+
+    @tracer.capture_method(metadata_capture="on_error")
+    def greeting(name, message):
+        return dummy_response
+
+    @tracer.capture_method(metadata_capture=MetadataCapture.OnError)
+    def failing(name, message):
+        raise CustomException("test")
+
+    greeting(name="Foo", message="Bar")
+    with pytest.raises(CustomException):
+        failing(name="Foo", message="Bar")
+
+    assert put_metadata_mock.call_args_list == [
+        mocker.call(key="failing error", value="test", namespace="booking")
+    ]
+
+
+def test_tracer_metadata_capture_sampled(mocker, dummy_response, xray_stub):
+    # GIVEN tracer samples responses captured as metadata
+    # WHEN decorated functions are sampled in and out
+    # THEN only sampled in responses should be captured as metadata
+    put_metadata_mock = mocker.MagicMock()
+    xray_provider = xray_stub(put_metadata_mock=put_metadata_mock)
+    tracer = Tracer(provider=xray_provider, service="booking", metadata_capture="sampled")
+
+    @tracer.capture_method(metadata_sample_rate=1)
+    def sampled_in(name, message):
+        return dummy_response
+
+    @tracer.capture_lambda_handler(metadata_sample_rate=0)
+    def sampled_out(event, context):
+        return dummy_response
+
+    sampled_in(name="Foo", message="Bar")
+    sampled_out({}, mocker.MagicMock())
+
+    assert put_metadata_mock.call_args_list == [
+        mocker.call(key="sampled_in response", value=dummy_response, namespace="booking")
+    ]
+
+
+def test_tracer_metadata_capture_env_var(monkeypatch):
+    # GIVEN metadata capture and sample rate are set via env vars
+    # WHEN tracer is initialized
+    # THEN tracer should use them over its parameters
+    monkeypatch.setenv("POWERTOOLS_TRACE_METADATA_CAPTURE", "ON_ERROR")
+    monkeypatch.setenv("POWERTOOLS_TRACE_METADATA_SAMPLE_RATE", "0.5")
+    tracer = Tracer(disabled=True, metadata_capture="always")
+
+    assert tracer.metadata_capture is MetadataCapture.OnError
+    assert tracer.metadata_sample_rate == 0.5
+
+
+def test_tracer_metadata_capture_invalid():
+    # GIVEN an unsupported metadata capture or sample rate
+    # WHEN tracer, or decorator, is initialized
+    # THEN it should raise ValueError
+    with pytest.raises(ValueError):
+        Tracer(disabled=True, metadata_capture="never")
+
+    with pytest.raises(ValueError):
+        Tracer(disabled=True, metadata_sample_rate=2)
+
+    tracer = Tracer(service="booking")
+    with pytest.raises(ValueError):
+        tracer.capture_method(metadata_capture="never")(lambda: None)
+
+
+def test_tracer_metadata_max_bytes(mocker, xray_stub):
+    # GIVEN tracer caps metadata values to a budget
+    # WHEN a decorated function returns a response larger than the budget
+    # THEN metadata captured should be truncated to fit the budget
+    put_metadata_mock = mocker.MagicMock()
+    xray_provider = xray_stub(put_metadata_mock=put_metadata_mock)
+    tracer = Tracer(provider=xray_provider, service="booking", metadata_max_bytes=1024)
+    response = {f"key_{i}": "value" * 10 for i in range(1000)}
+
+    @tracer.capture_method
+    def large():
+        return response
+
+    large()
+
+    metadata = put_metadata_mock.call_args[1]["value"]
+    assert TRUNCATED_KEY in metadata
+    assert len(metadata) < len(response)
+    assert len(json.dumps(metadata, separators=(",", ":"))) <= 1024
+
+
+def test_tracer_method_coroutine(segment_provider):
+    # GIVEN method decorator is used on a coroutine
+    # WHEN coroutine is awaited
+    # THEN its subsegment should be open until coroutine completes, with its response as metadata
+    tracer = Tracer(provider=segment_provider, service="booking")
+    subsegments_in_progress = []
+
+    @tracer.capture_method
+    async def collect_payment(charge_id):
+        await asyncio.sleep(0)
+        subsegments_in_progress.extend(
+            entity for entity in segment_provider.segment.subsegments if entity.in_progress
+        )
+        return {"chargeId": charge_id}
+
+    response = asyncio.run(collect_payment("ch_1"))
+
+    (subsegment,) = segment_provider.segment.subsegments
+    assert response == {"chargeId": "ch_1"}
+    assert subsegments_in_progress == [subsegment]
+    assert subsegment.name == "## collect_payment"
+    assert subsegment.in_progress is False
+    assert subsegment.metadata == {"booking": {"collect_payment response": response}}
+    assert segment_provider.stream_subsegments.call_count == 1
+
+
+def test_tracer_method_concurrent_coroutines(segment_provider):
+    # GIVEN method decorator is used on coroutines awaited concurrently
+    # WHEN their execution interleaves
+    # THEN each should have its own subsegment with its own metadata, nested under its caller
+    tracer = Tracer(provider=segment_provider, service="booking")
+
+    @tracer.capture_method
+    async def collect_payment(charge_id, delay):
+        await asyncio.sleep(delay)
+        return charge_id
+
+    @tracer.capture_method
+    async def collect_payments():
+        return await asyncio.gather(collect_payment("ch_1", 0.02), collect_payment("ch_2", 0))
+
+    asyncio.run(collect_payments())
+
+    (parent,) = segment_provider.segment.subsegments
+    first, second = parent.subsegments
+    assert [first.name, second.name] == ["## collect_payment", "## collect_payment"]
+    assert first.metadata == {"booking": {"collect_payment response": "ch_1"}}
+    assert second.metadata == {"booking": {"collect_payment response": "ch_2"}}
+    assert first.end_time > second.end_time
+    assert not any(entity.in_progress for entity in (parent, first, second))
+    assert segment_provider.segment.ref_counter.get_current() == 0
+
+
+def test_tracer_method_coroutine_exception(segment_provider):
+    # GIVEN method decorator is used on a coroutine
+    # WHEN coroutine raises
+    # THEN exception should be captured as metadata and subsegment closed
+    class CustomException(Exception):
+        pass
+
+    tracer = Tracer(provider=segment_provider, service="booking")
+
+    @tracer.capture_method
+    async def collect_payment():
+        raise CustomException("test")
+
+    with pytest.raises(CustomException):
+        asyncio.run(collect_payment())
+
+    (subsegment,) = segment_provider.segment.subsegments
+    assert subsegment.in_progress is False
+    assert subsegment.metadata == {"booking": {"collect_payment error": "test"}}
+
+
+def test_tracer_method_generators(segment_provider):
+    # GIVEN method decorator is used on generators
+    # WHEN generators are consumed interleaved, and one is abandoned
+    # THEN each subsegment should be open from first item until generator is exhausted or closed
+    tracer = Tracer(provider=segment_provider, service="booking")
+
+    @tracer.capture_method
+    def bookings(count):
+        yield from range(count)
+        return count
+
+    first, second = bookings(2), bookings(3)
+    assert segment_provider.segment.subsegments == []
+
+    assert list(zip(first, second)) == [(0, 0), (1, 1)]
+    second.close()
+
+    first_subsegment, second_subsegment = segment_provider.segment.subsegments
+    assert first_subsegment.in_progress is False
+    assert first_subsegment.metadata == {"booking": {"bookings response": 2}}
+    assert second_subsegment.in_progress is False
+    assert second_subsegment.metadata == {}
+
+
+def test_tracer_method_async_generator(segment_provider):
+    # GIVEN method decorator is used on an async generator
+    # WHEN async generator is consumed
+    # THEN items should be passed through and subsegment closed once exhausted
+    tracer = Tracer(provider=segment_provider, service="booking")
+
+    @tracer.capture_method
+    async def bookings(count):
+        for booking in range(count):
+            await asyncio.sleep(0)
+            yield booking
+
+    async def consume():
+        return [booking async for booking in bookings(3)]
+
+    assert asyncio.run(consume()) == [0, 1, 2]
+
+    (subsegment,) = segment_provider.segment.subsegments
+    assert subsegment.name == "## bookings"
+    assert subsegment.in_progress is False
+
+
+def test_tracer_method_async_generator_forwards_throw(segment_provider):
+    # GIVEN method decorator is used on an async generator handling exceptions thrown in
+    # WHEN an exception is thrown into it
+    # THEN async generator should handle it, rather than the decorator
+    tracer = Tracer(provider=segment_provider, service="booking")
+
+    @tracer.capture_method
+    async def bookings():
+        try:
+            yield "booking"
+        except ValueError:
+            yield "recovered"
+
+    async def consume():
+        generator = bookings()
+        first = await generator.asend(None)
+        recovered = await generator.athrow(ValueError("retry"))
+        await generator.aclose()
+        return first, recovered
+
+    assert asyncio.run(consume()) == ("booking", "recovered")
+
+    (subsegment,) = segment_provider.segment.subsegments
+    assert subsegment.in_progress is False
+    assert subsegment.metadata == {}
+
+
+def test_tracer_method_async_generator_nests_coroutines(segment_provider):
+    # GIVEN method decorator is used on an async generator awaiting a traced coroutine
+    # WHEN async generator is consumed, its consumer awaiting a traced coroutine too
+    # THEN only the coroutine awaited by the generator should be nested under its subsegment
+    tracer = Tracer(provider=segment_provider, service="booking")
+
+    @tracer.capture_method
+    async def fetch(booking):
+        return booking
+
+    @tracer.capture_method
+    async def bookings(count):
+        for booking in range(count):
+            yield await fetch(booking)
+
+    async def consume():
+        return [await fetch(booking) async for booking in bookings(1)]
+
+    assert asyncio.run(consume()) == [0]
+
+    generator_subsegment, consumer_fetch = segment_provider.segment.subsegments
+    assert generator_subsegment.name == "## bookings"
+    assert [entity.name for entity in generator_subsegment.subsegments] == ["## fetch"]
+    assert consumer_fetch.name == "## fetch"
+
+
+def test_tracer_method_without_segment(segment_provider, mocker):
+    # GIVEN method decorator is used on coroutines and generators
+    # WHEN there is no segment, e.g. called outside of a traced invocation
+    # THEN they should run untraced, as methods do
+    mocker.patch.object(segment_provider, "get_trace_entity", return_value=None)
+    tracer = Tracer(provider=segment_provider, service="booking")
+
+    @tracer.capture_method
+    async def collect_payment(charge_id):
+        return charge_id
+
+    @tracer.capture_method
+    def bookings(count):
+        return (yield from range(count))
+
+    @tracer.capture_method
+    async def async_bookings(count):
+        for booking in range(count):
+            yield booking
+
+    async def consume():
+        return [booking async for booking in async_bookings(2)]
+
+    assert asyncio.run(collect_payment("ch_1")) == "ch_1"
+    assert list(bookings(2)) == [0, 1]
+    assert asyncio.run(consume()) == [0, 1]
+    assert segment_provider.stream_subsegments.call_count == 0
+
+
+def test_tracer_unsampled_invocation(mocker, dummy_response, xray_stub):
+    # GIVEN tracer sampling rules never sample a flight
+    # WHEN a lambda handler calling a decorated method is invoked for that flight
+    # THEN no subsegment, annotation or metadata should be created
+    put_metadata_mock = mocker.MagicMock()
+    put_annotation_mock = mocker.MagicMock()
+    begin_subsegment_mock = mocker.MagicMock()
+    end_subsegment_mock = mocker.MagicMock()
+
+    xray_provider = xray_stub(
+        put_metadata_mock, put_annotation_mock, begin_subsegment_mock, end_subsegment_mock
+    )
+    tracer = Tracer(
+        provider=xray_provider,
+        service="booking",
+        sampling_rules=[SamplingRule(fields={"outboundFlightId": "f3b1*"}, fixed_target=0, rate=0)],
+    )
+
+    @tracer.capture_method
+    def greeting(name, message):
+        tracer.put_annotation("Greeting", name)
+        return dummy_response
+
+    @tracer.capture_lambda_handler(process_booking_sfn=True)
+    def handler(event, context):
+        return greeting(name="Foo", message="Bar")
+
+    context = mocker.MagicMock(function_name="ServerlessAirline-ConfirmBooking")
+    response = handler({"outboundFlightId": "f3b1c7a2"}, context)
+
+    assert response == dummy_response
+    assert begin_subsegment_mock.call_count == 0
+    assert put_annotation_mock.call_count == 0
+    assert put_metadata_mock.call_count == 0
+    assert end_subsegment_mock.call_count == 0
+
+    handler({"outboundFlightId": "a1b2c3d4"}, context)
+
+    assert begin_subsegment_mock.call_count == 2
+    assert begin_subsegment_mock.return_value.put_annotation.call_count == 5
+    assert put_annotation_mock.call_count == 1
+
+
+def test_tracer_unsampled_invocation_exception(mocker, xray_stub):
+    # GIVEN tracer sampling rules never sample any invocation
+    # WHEN lambda handler raises
+    # THEN invocation should be traced with exception and state machine annotations
+    class CustomException(Exception):
+        pass
+
+    put_metadata_mock = mocker.MagicMock()
+    put_annotation_mock = mocker.MagicMock()
+    begin_subsegment_mock = mocker.MagicMock()
+    end_subsegment_mock = mocker.MagicMock()
+
+    xray_provider = xray_stub(
+        put_metadata_mock, put_annotation_mock, begin_subsegment_mock, end_subsegment_mock
+    )
+    tracer = Tracer(
+        provider=xray_provider,
+        service="booking",
+        sampling_rules=[{"fixed_target": 0, "rate": 0}],
+    )
+
+    @tracer.capture_method
+    def greeting(name, message):
+        raise CustomException("test")
+
+    @tracer.capture_lambda_handler(process_booking_sfn=True)
+    def handler(event, context):
+        return greeting(name="Foo", message="Bar")
+
+    with pytest.raises(CustomException):
+        handler({}, mocker.MagicMock(function_name="ServerlessAirline-ConfirmBooking"))
+
+    assert begin_subsegment_mock.call_args_list == [mocker.call(name="## handler")]
+    assert begin_subsegment_mock.return_value.put_annotation.call_count == 5
+    assert put_metadata_mock.call_args == mocker.call(
+        key="booking_error", value="test", namespace="booking"
+    )
+    assert end_subsegment_mock.call_count == 1
+
+
+def test_tracer_sampling_rules_env_var(monkeypatch, mocker, xray_stub):
+    # GIVEN sampling rules are set via env var
+    # WHEN a lambda handler is invoked for a function not sampled
+    # THEN no subsegment should be created
+    monkeypatch.setenv(
+        "POWERTOOLS_TRACE_SAMPLING_RULES",
+        '[{"handler": "*CollectPayment*", "fixed_target": 0, "rate": 0}]',
+    )
+    begin_subsegment_mock = mocker.MagicMock()
+    tracer = Tracer(provider=xray_stub(begin_subsegment_mock=begin_subsegment_mock))
+
+    @tracer.capture_lambda_handler
+    def handler(event, context):
+        pass
+
+    handler({}, mocker.MagicMock(function_name="ServerlessAirline-CollectPayment"))
+    handler({}, mocker.MagicMock(function_name="ServerlessAirline-RefundPayment"))
+
+    assert begin_subsegment_mock.call_count == 1
+
+
+@pytest.mark.parametrize("disabled", [True, False])
+def test_tracer_profiler(capsys, mocker, xray_stub, disabled):
+    # GIVEN tracer has a profiler, and tracing is either disabled or enabled
+    # WHEN a lambda handler calling a decorated method is invoked
+    # THEN method duration should be emitted as a metric at the end of the invocation
+    metrics = Metrics(service="booking")
+    tracer = Tracer(
+        provider=xray_stub(), service="booking", disabled=disabled, profiler=Profiler(metrics)
+    )
+
+    @tracer.capture_method
+    def reserve_booking(booking_id):
+        return booking_id
+
+    @metrics.log_metrics
+    @tracer.capture_lambda_handler
+    def handler(event, context):
+        reserve_booking("1")
+        reserve_booking("2")
+
+    handler({}, mocker.MagicMock())
+
+    document = json.loads(capsys.readouterr().out)
+    (directive,) = document["_aws"]["CloudWatchMetrics"]
+
+    assert document["method"] == "reserve_booking"
+    assert len(document["MethodDuration"]) == 2
+    assert directive["Metrics"] == [{"Name": "MethodDuration", "Unit": "Milliseconds"}]
+    assert directive["Dimensions"] == [["service", "method"]]
+
+
+def test_tracer_shares_invocation_context_with_logger(mocker, xray_stub):
+    # GIVEN tracer and logger decorators both capture process booking state machine input
+    # WHEN lambda handler is invoked
+    # THEN state machine input should be extracted from the event once per invocation
+    build_mock = mocker.patch(
+        "lambda_python_powertools.helper.models.InvocationContext", wraps=InvocationContext
+    )
+    tracer = Tracer(provider=xray_stub(), service="booking")
+    logger_setup(service="booking")
+
+    @tracer.capture_lambda_handler(process_booking_sfn=True)
+    @logger_inject_process_booking_sfn
+    def handler(event, context):
+        pass
+
+    event = {"bookingId": "5347fc8d"}
+    context = mocker.MagicMock()
+    handler(event, context)
+    handler(event, context)
+
+    assert build_mock.call_count == 2
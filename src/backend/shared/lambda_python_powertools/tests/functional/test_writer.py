@@ -0,0 +1,126 @@
+import io
+import json
+import logging
+from dataclasses import dataclass
+
+import pytest
+
+from lambda_python_powertools.logging import (
+    BatchingStreamHandler,
+    logger_inject_lambda_context,
+    logger_setup,
+)
+from lambda_python_powertools.logging.writer import install_log_writer
+from lambda_python_powertools.metrics import Metrics, MetricUnit
+
+
+class CountingStream(io.StringIO):
+    def __init__(self):
+        super().__init__()
+        self.writes = 0
+
+    def write(self, text):
+        self.writes += 1
+        return super().write(text)
+
+
+@pytest.fixture
+def stream():
+    return CountingStream()
+
+
+@pytest.fixture
+def batching_logger(stream):
+    handler = BatchingStreamHandler(stream=stream, max_batch_size=1000)
+    logger = logging.getLogger("test_writer")
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    logger.addHandler(handler)
+    yield logger
+    logger.removeHandler(handler)
+    handler.close()
+
+
+@pytest.fixture
+def root_handlers():
+    handlers = logging.root.handlers[:]
+    yield
+    for handler in logging.root.handlers[:]:
+        logging.root.removeHandler(handler)
+        handler.close()
+
+    for handler in handlers:
+        logging.root.addHandler(handler)
+
+    install_log_writer(None)
+
+
+@pytest.fixture
+def lambda_context():
+    @dataclass
+    class Context:
+        function_name: str = "test"
+        memory_limit_in_mb: int = 128
+        invoked_function_arn: str = "arn:aws:lambda:eu-west-1:809313241:function:test"
+        aws_request_id: str = "52fdfc07-2182-154f-163f-5f0f9a621d72"
+
+    return Context()
+
+
+def test_batching_handler_flush(batching_logger, stream):
+    # GIVEN a logger using batching handler
+    # WHEN many records are logged and handler is flushed
+    # THEN all records should be written in order
+    for number in range(100):
+        batching_logger.info("Hello %d", number)
+
+    batching_logger.handlers[0].flush()
+
+    assert stream.getvalue().splitlines() == [f"Hello {number}" for number in range(100)]
+    assert stream.writes < 100
+
+
+def test_batching_handler_close(batching_logger, stream):
+    # GIVEN a logger using batching handler
+    # WHEN handler is closed
+    # THEN pending records should be written and background thread stopped
+    handler = batching_logger.handlers[0]
+    batching_logger.info("Hello")
+
+    handler.close()
+
+    assert stream.getvalue() == "Hello\n"
+    assert handler.thread is None
+
+
+def test_batching_handler_flush_without_records(stream):
+    # GIVEN a batching handler that never received records
+    # WHEN it is flushed
+    # THEN it should not block nor start a background thread
+    handler = BatchingStreamHandler(stream=stream)
+    handler.flush()
+
+    assert handler.thread is None
+
+
+def test_setup_batch_writes_flushed_by_decorator(root_handlers, capsys, lambda_context):
+    # GIVEN logger is setup with batch writes and metrics are added
+    # WHEN a decorated lambda handler returns
+    # THEN log records and metrics should have been written to stdout
+    logger = logger_setup(batch_writes=True)
+    metrics = Metrics(service="booking")
+
+    @metrics.log_metrics
+    @logger_inject_lambda_context
+    def handler(event, context):
+        metrics.add_metric(name="SuccessfulBooking", unit=MetricUnit.Count, value=1)
+        logger.info("Hello")
+
+    handler({}, lambda_context)
+
+    log, metric = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+
+    assert log["message"] == "Hello"
+    assert log["function_name"] == "test"
+    assert metric["SuccessfulBooking"] == 1
+    assert len(logging.root.handlers) == 1
@@ -0,0 +1,58 @@
+import io
+import logging
+import timeit
+from dataclasses import dataclass
+
+import pytest
+
+from lambda_python_powertools.helper.models import build_invocation_context
+from lambda_python_powertools.logging import logger_inject_lambda_context, logger_setup
+
+INVOCATIONS = 2000
+
+
+@pytest.fixture
+def root_logger():
+    handler = logging.StreamHandler(io.StringIO())
+    logging.root.addHandler(handler)
+    yield logging.root
+    logging.root.removeHandler(handler)
+
+
+@pytest.fixture
+def lambda_context():
+    @dataclass
+    class Context:
+        function_name: str = "test"
+        memory_limit_in_mb: int = 128
+        invoked_function_arn: str = "arn:aws:lambda:eu-west-1:809313241:function:test"
+        aws_request_id: str = "52fdfc07-2182-154f-163f-5f0f9a621d72"
+
+    return Context()
+
+
+@pytest.mark.perf
+def test_inject_lambda_context_setup_cost(root_logger, lambda_context):
+    # GIVEN logger has been setup once at import
+    # WHEN a decorated lambda handler is invoked many times
+    # THEN per-invocation context injection should be cheaper than setting up logger again
+    logger_setup()
+
+    @logger_inject_lambda_context
+    def handler(event, context):
+        pass
+
+    def setup_per_invocation():
+        """Logger setup cost paid per invocation prior to invocation context"""
+        invocation = build_invocation_context(event={}, context=lambda_context)
+        logger_setup(cold_start="false", **invocation.lambda_context_fields())
+
+    before = min(timeit.repeat(setup_per_invocation, number=INVOCATIONS, repeat=5))
+    after = min(timeit.repeat(lambda: handler({}, lambda_context), number=INVOCATIONS, repeat=5))
+
+    print(
+        f"\nPer invocation logging setup: before {before / INVOCATIONS * 1e6:.2f}us, "
+        f"after {after / INVOCATIONS * 1e6:.2f}us"
+    )
+
+    assert after < before
@@ -0,0 +1,52 @@
+import timeit
+
+import pytest
+
+from lambda_python_powertools.logging import log_metric
+from lambda_python_powertools.metrics import MetricRegistry, MetricUnit
+
+EMITS = 5000
+
+
+@pytest.fixture
+def lines(monkeypatch):
+    """Captures MONITORING lines in memory so stdout writes don't dominate timings"""
+    captured = []
+    monkeypatch.setattr("lambda_python_powertools.logging.logger.write_line", captured.append)
+    monkeypatch.setattr("lambda_python_powertools.metrics.definitions.write_line", captured.append)
+    return captured
+
+
+@pytest.mark.perf
+def test_metric_definition_emit_cost(lines):
+    # GIVEN a metric declared once at import
+    # WHEN emitted many times
+    # THEN emitting should be cheaper than log_metric while writing the same line
+    registry = MetricRegistry(service="payment")
+    metric = registry.define("InvalidPaymentRequest", MetricUnit.Count, dimensions=("operation",))
+
+    def emit_log_metric():
+        log_metric(
+            name="InvalidPaymentRequest",
+            unit=MetricUnit.Count,
+            value=1,
+            service="payment",
+            operation="collect_payment",
+        )
+
+    def emit_definition():
+        metric.emit(1, operation="collect_payment")
+
+    emit_log_metric()
+    emit_definition()
+    assert lines[0] == lines[1]
+
+    before = min(timeit.repeat(emit_log_metric, number=EMITS, repeat=5))
+    after = min(timeit.repeat(emit_definition, number=EMITS, repeat=5))
+
+    print(
+        f"\nPer metric line: log_metric {before / EMITS * 1e6:.2f}us, "
+        f"MetricDefinition.emit {after / EMITS * 1e6:.2f}us"
+    )
+
+    assert after < before
@@ -0,0 +1,233 @@
+import json
+import timeit
+import tracemalloc
+
+import pytest
+
+from lambda_python_powertools.tracing import Tracer
+from lambda_python_powertools.tracing.testing import (
+    DAEMON_MAX_PACKET_BYTES,
+    InMemoryEmitter,
+    UDPDaemonStub,
+    build_recorder,
+)
+
+CALLS = 2000
+
+
+class SubsegmentStub:
+    def put_annotation(self, key, value):
+        pass
+
+
+class ProviderStub:
+    def begin_subsegment(self, name):
+        return SubsegmentStub()
+
+    def end_subsegment(self):
+        pass
+
+    def put_annotation(self, key, value):
+        pass
+
+    def put_metadata(self, key, value, namespace):
+        pass
+
+
+def allocated_bytes(function) -> int:
+    """Peak memory allocated while calling function once"""
+    tracemalloc.start()
+    try:
+        function()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return peak
+
+
+def booking_handler(tracer: Tracer, methods: int = 5):
+    """Lambda handler traced as Airline functions are, calling a number of traced methods"""
+
+    @tracer.capture_method
+    def reserve_booking(booking_id):
+        return {"bookingId": booking_id, "status": "RESERVED"}
+
+    @tracer.capture_lambda_handler(process_booking_sfn=True)
+    def handler(event, context):
+        for _ in range(methods):
+            ret = reserve_booking(event["bookingId"])
+        tracer.put_annotations({"Booking": ret["bookingId"], "BookingStatus": "RESERVED"})
+        return ret
+
+    return handler
+
+
+def invoke(recorder, handler):
+    """Invokes handler within a segment, as Lambda does, emitting it once handler returns"""
+    recorder.begin_segment("booking")
+    handler({"bookingId": "5347fc8d", "outboundFlightId": "f3b1c7a2"}, None)
+    recorder.end_segment()
+
+
+@pytest.mark.perf
+def test_capture_method_debug_off_cost_independent_of_response_size():
+    # GIVEN DEBUG is off and method decorator is used without capturing responses
+    # WHEN decorated functions return small and large responses
+    # THEN tracer overhead should not grow with response size as debug messages are never built
+    tracer = Tracer(provider=ProviderStub(), service="booking", metadata_capture="on_error")
+    small_response = {"bookingId": "123"}
+    large_response = {f"key_{i}": "value" * 10 for i in range(5000)}
+
+    @tracer.capture_method
+    def small():
+        return small_response
+
+    @tracer.capture_method
+    def large():
+        return large_response
+
+    small_cost = min(timeit.repeat(small, number=CALLS, repeat=5))
+    large_cost = min(timeit.repeat(large, number=CALLS, repeat=5))
+
+    print(
+        f"\ncapture_method with DEBUG off: small response {small_cost / CALLS * 1e6:.2f}us, "
+        f"large response {large_cost / CALLS * 1e6:.2f}us"
+    )
+
+    assert large_cost < small_cost * 2
+
+
+@pytest.mark.perf
+def test_capture_method_metadata_cost_bounded_by_budget():
+    # GIVEN method decorator captures responses as metadata within a budget
+    # WHEN decorated functions return responses larger than the budget
+    # THEN tracer overhead should not grow with response size as only the budget is walked
+    tracer = Tracer(provider=ProviderStub(), service="booking", metadata_max_bytes=4096)
+    large_response = {f"key_{i}": "value" * 10 for i in range(5000)}
+    huge_response = {f"key_{i}": "value" * 10 for i in range(50000)}
+
+    @tracer.capture_method
+    def large():
+        return large_response
+
+    @tracer.capture_method
+    def huge():
+        return huge_response
+
+    large_cost = min(timeit.repeat(large, number=CALLS // 10, repeat=5))
+    huge_cost = min(timeit.repeat(huge, number=CALLS // 10, repeat=5))
+
+    print(
+        f"\ncapture_method with 4KB metadata budget: large response {large_cost / CALLS * 1e7:.2f}us, "
+        f"huge response {huge_cost / CALLS * 1e7:.2f}us"
+    )
+
+    assert huge_cost < large_cost * 2
+
+
+@pytest.mark.perf
+def test_capture_method_disabled_costs_same_as_undecorated():
+    # GIVEN tracer is disabled and method decorator is used
+    # WHEN decorated and undecorated functions are called
+    # THEN decorated function should cost the same as the undecorated one
+    tracer = Tracer(provider=ProviderStub(), service="booking", disabled=True)
+
+    def undecorated():
+        return {"bookingId": "123"}
+
+    decorated = tracer.capture_method(undecorated)
+
+    undecorated_cost = min(timeit.repeat(undecorated, number=CALLS, repeat=5))
+    decorated_cost = min(timeit.repeat(decorated, number=CALLS, repeat=5))
+
+    print(
+        f"\ncapture_method with tracing disabled: undecorated {undecorated_cost / CALLS * 1e6:.2f}us, "
+        f"decorated {decorated_cost / CALLS * 1e6:.2f}us"
+    )
+
+    assert decorated_cost < undecorated_cost * 1.5
+
+
+@pytest.mark.perf
+def test_capture_lambda_handler_in_memory_recorder_cost():
+    # GIVEN tracer uses a real X-Ray recorder keeping segments in memory
+    # WHEN a lambda handler calling traced methods is invoked within a segment
+    # THEN every invocation should emit one segment within X-Ray daemon limit
+    emitter = InMemoryEmitter()
+    recorder = build_recorder(emitter=emitter)
+    handler = booking_handler(Tracer(provider=recorder, service="booking", patch_modules=[]))
+    invocations = CALLS // 10
+
+    cost = min(timeit.repeat(lambda: invoke(recorder, handler), number=invocations, repeat=5))
+    emitter.clear()
+    allocated = allocated_bytes(lambda: invoke(recorder, handler))
+    segment = json.loads(emitter.documents[0])
+
+    print(
+        f"\ncapture_lambda_handler with in-memory recorder: {cost / invocations * 1e6:.2f}us, "
+        f"segment {emitter.sizes[0]} bytes, {allocated} bytes allocated per invocation"
+    )
+
+    assert len(emitter.documents) == 1
+    assert emitter.sizes[0] < DAEMON_MAX_PACKET_BYTES
+    assert segment["subsegments"][0]["name"] == "## handler"
+    assert segment["subsegments"][0]["annotations"]["BookingStatus"] == "RESERVED"
+    assert len(segment["subsegments"][0]["subsegments"]) == 5
+
+
+@pytest.mark.perf
+def test_capture_method_in_memory_recorder_cost():
+    # GIVEN tracer uses a real X-Ray recorder keeping segments in memory
+    # WHEN a traced method is called many times within a segment
+    # THEN closed subsegments should be streamed rather than growing the segment unbounded
+    emitter = InMemoryEmitter()
+    recorder = build_recorder(emitter=emitter)
+    tracer = Tracer(provider=recorder, service="booking", patch_modules=[])
+
+    @tracer.capture_method
+    def reserve_booking():
+        return {"bookingId": "5347fc8d", "status": "RESERVED"}
+
+    recorder.begin_segment("booking")
+    cost = min(timeit.repeat(reserve_booking, number=CALLS, repeat=5))
+    allocated = allocated_bytes(reserve_booking)
+    recorder.end_segment()
+
+    emitted_bytes = sum(emitter.sizes)
+    print(
+        f"\ncapture_method with in-memory recorder: {cost / CALLS * 1e6:.2f}us, "
+        f"{emitted_bytes / (CALLS * 5 + 1):.0f} bytes emitted and "
+        f"{allocated} bytes allocated per call"
+    )
+
+    assert len(emitter.documents) > 1
+    assert max(emitter.sizes) < DAEMON_MAX_PACKET_BYTES
+
+
+@pytest.mark.perf
+def test_capture_lambda_handler_udp_daemon_cost():
+    # GIVEN tracer uses a real X-Ray recorder sending segments to a local UDP daemon stand-in
+    # WHEN a lambda handler calling traced methods is invoked within a segment
+    # THEN daemon should receive one segment per invocation
+    invocations = CALLS // 10
+
+    with UDPDaemonStub() as daemon:
+        recorder = build_recorder(daemon_address=daemon.address)
+        handler = booking_handler(Tracer(provider=recorder, service="booking", patch_modules=[]))
+
+        cost = min(timeit.repeat(lambda: invoke(recorder, handler), number=invocations, repeat=5))
+
+        # UDP may drop datagrams under load, only segments sent once timing is done are checked
+        daemon.wait_for(count=invocations * 5, timeout=1)
+        daemon.clear()
+        invoke(recorder, handler)
+        received = daemon.wait_for(count=1)
+
+        print(
+            f"\ncapture_lambda_handler with UDP daemon: {cost / invocations * 1e6:.2f}us, "
+            f"segment {daemon.sizes[0]} bytes per invocation"
+        )
+
+    assert received
+    assert json.loads(daemon.documents[0])["name"] == "booking"
@@ -0,0 +1,98 @@
+import timeit
+
+import pytest
+
+from lambda_python_powertools.helper.validation import EventField, EventSchema
+
+CALLS = 20000
+REPEATS = 30
+
+
+def min_timings(*functions):
+    """Returns the fastest of REPEATS timings of each function, taken in turn so noise hits all"""
+    timings = [[] for _ in functions]
+    for _ in range(REPEATS):
+        for function, function_timings in zip(functions, timings):
+            function_timings.append(timeit.timeit(function, number=CALLS))
+
+    return [min(function_timings) for function_timings in timings]
+
+
+@pytest.fixture
+def event():
+    return {
+        "outboundFlightId": "f3b1c7a2",
+        "customerId": "d749f277",
+        "chargeId": "ch_1EeqlbF4aIiftV70qXHYewmn",
+        "name": "5347fc8d-execution",
+        "payment": {"receiptUrl": "https://receipt", "price": 100},
+    }
+
+
+@pytest.mark.perf
+def test_reserve_booking_schema_cost(event):
+    # GIVEN reserve booking fields are checked by a schema or by hand
+    # WHEN a valid event is validated and its fields extracted
+    # THEN schema should cost no more than hand written checks
+    schema = EventSchema(
+        "ReserveBookingEvent",
+        outbound_flight_id=EventField("outboundFlightId"),
+        customer_id=EventField("customerId"),
+        charge_id=EventField("chargeId"),
+        state_machine_execution_id=EventField("name"),
+    )
+
+    def hand_written(booking):
+        """Checks previously in reserve booking handler"""
+        if not all(x in booking for x in ["outboundFlightId", "customerId", "chargeId"]):
+            raise ValueError("Invalid booking request")
+
+        return (
+            booking["name"],
+            booking["outboundFlightId"],
+            booking["customerId"],
+            booking["chargeId"],
+        )
+
+    before, after = min_timings(lambda: hand_written(event), lambda: schema.validate(event))
+
+    print(
+        f"\nReserve booking validation: hand written {before / CALLS * 1e6:.2f}us, "
+        f"schema {after / CALLS * 1e6:.2f}us"
+    )
+
+    assert after < before * 1.1
+
+
+@pytest.mark.perf
+def test_notify_booking_schema_cost(event):
+    # GIVEN notify booking optional and nested fields are checked by a schema or by hand
+    # WHEN a valid event missing an optional field is validated and its fields extracted
+    # THEN schema should cost no more than hand written checks building the same typed model
+    schema = EventSchema(
+        "NotifyBookingEvent",
+        customer_id=EventField("customerId", required=False, default=False),
+        price=EventField("payment.price", types=(int, float, str), required=False, default=False),
+        booking_reference=EventField("bookingReference", required=False, default=False),
+    )
+
+    def hand_written(booking):
+        """Checks previously in notify booking handler, returning fields with typed accessors"""
+        customer_id = booking.get("customerId", False)
+        payment = booking.get("payment", {})
+        price = payment.get("price", False)
+        booking_reference = booking.get("bookingReference", False)
+
+        if not customer_id and not price:
+            raise ValueError("Invalid customer and price")
+
+        return schema.model(customer_id, price, booking_reference)
+
+    before, after = min_timings(lambda: hand_written(event), lambda: schema.validate(event))
+
+    print(
+        f"\nNotify booking validation: hand written {before / CALLS * 1e6:.2f}us, "
+        f"schema {after / CALLS * 1e6:.2f}us"
+    )
+
+    assert after < before * 1.1
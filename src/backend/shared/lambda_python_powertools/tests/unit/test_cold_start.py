@@ -0,0 +1,75 @@
+from lambda_python_powertools.helper.cold_start import ColdStartTracker
+
+
+def test_cold_start_first_invocation_only():
+    # GIVEN a freshly initialized container
+    # WHEN invocations begin and end
+    # THEN only the first one should be a cold start
+    # AND init duration should be recorded once
+    tracker = ColdStartTracker()
+
+    assert tracker.init_duration is None
+    assert tracker.invocation_begin() is True
+    tracker.invocation_end()
+    init_duration = tracker.init_duration
+
+    assert tracker.invocation_begin() is False
+    tracker.invocation_end()
+
+    assert tracker.invocations == 2
+    assert tracker.init_duration == init_duration >= 0
+
+
+def test_cold_start_stacked_decorators():
+    # GIVEN many decorators wrapping the same handler
+    # WHEN each of them begins the same invocation
+    # THEN they should all agree it's a cold start
+    tracker = ColdStartTracker()
+
+    assert [tracker.invocation_begin() for _ in range(3)] == [True, True, True]
+    for _ in range(3):
+        tracker.invocation_end()
+
+    assert tracker.invocations == 1
+    assert tracker.invocation_begin() is False
+
+
+def test_cold_start_timed_steps(mocker):
+    # GIVEN init steps timed during init phase
+    # WHEN a step runs again later
+    # THEN only its first duration should be kept, in milliseconds
+    mocker.patch("time.perf_counter", side_effect=[1.0, 1.5, 2.0, 4.0])
+    tracker = ColdStartTracker(init_started_at=0.5)
+
+    with tracker.timed("boto3_session"):
+        pass
+
+    with tracker.timed("boto3_session"):
+        pass
+
+    assert tracker.init_steps == {"boto3_session": 500}
+
+
+def test_cold_start_import_module():
+    # GIVEN a module imported via tracker
+    # WHEN import finishes
+    # THEN module should be returned and its import timed
+    tracker = ColdStartTracker()
+
+    json = tracker.import_module("json")
+
+    assert json.dumps({}) == "{}"
+    assert "json" in tracker.init_steps
+
+
+def test_cold_start_reset():
+    # GIVEN a tracker that handled invocations
+    # WHEN it's reset
+    # THEN next invocation should be a cold start
+    tracker = ColdStartTracker()
+    tracker.invocation_begin()
+    tracker.invocation_end()
+
+    tracker.reset()
+
+    assert tracker.invocation_begin() is True
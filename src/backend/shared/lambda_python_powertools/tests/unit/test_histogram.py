@@ -0,0 +1,144 @@
+import random
+
+import pytest
+
+from lambda_python_powertools.helper.models import MetricUnit, build_metric_unit_from_str
+from lambda_python_powertools.metrics import Histogram
+
+
+def test_histogram_values_and_counts():
+    # GIVEN many observations of a few distinct values
+    # WHEN histogram is aggregated
+    # THEN each value should be counted in a bucket within relative accuracy
+    histogram = Histogram(name="PaymentLatency")
+    for value in (10, 10, 10, 100, 0):
+        histogram.observe(value)
+
+    values, counts = histogram.values_and_counts()
+
+    assert counts == [1, 3, 1]
+    assert values[0] == 0
+    assert values[1] == pytest.approx(10, rel=0.01)
+    assert values[2] == pytest.approx(100, rel=0.01)
+    assert (histogram.count, histogram.sum, histogram.min, histogram.max) == (5, 130, 0, 100)
+
+
+def test_histogram_percentile_accuracy():
+    # GIVEN thousands of latency observations
+    # WHEN percentiles are computed from the sketch
+    # THEN they should be within relative accuracy using a bounded number of buckets
+    rng = random.Random(42)
+    observations = [rng.lognormvariate(4, 1) for _ in range(10000)]
+    histogram = Histogram(name="PaymentLatency", relative_accuracy=0.01)
+    for value in observations:
+        histogram.observe(value)
+
+    observations.sort()
+    for percentile in (50, 90, 99):
+        expected = observations[int(percentile / 100 * (len(observations) - 1))]
+        assert histogram.percentile(percentile) == pytest.approx(expected, rel=0.02)
+
+    assert len(histogram.buckets) < 1000
+
+
+def test_histogram_sample_values():
+    # GIVEN thousands of latency observations
+    # WHEN a bounded number of values is sampled
+    # THEN samples should be ordered and keep percentiles within a sample of their rank
+    rng = random.Random(42)
+    observations = [rng.lognormvariate(4, 1) for _ in range(10000)]
+    histogram = Histogram(name="PaymentLatency")
+    for value in observations:
+        histogram.observe(value)
+
+    samples = histogram.sample_values(100)
+
+    observations.sort()
+    assert len(samples) == 100
+    assert samples == sorted(samples)
+    assert samples[50] == pytest.approx(observations[5050], rel=0.02)
+    assert samples[90] == pytest.approx(observations[9050], rel=0.02)
+    assert observations[0] <= samples[0] and samples[-1] <= observations[-1]
+
+
+def test_histogram_sample_values_few_observations():
+    # GIVEN fewer observations than values sampled
+    # WHEN values are sampled
+    # THEN each observation should be returned as its bucket value
+    histogram = Histogram(name="PaymentLatency")
+    for value in (10, 0, 10):
+        histogram.observe(value)
+
+    assert histogram.sample_values(100) == [0] + [pytest.approx(10, rel=0.01)] * 2
+
+
+def test_histogram_time(mocker):
+    # GIVEN a histogram in milliseconds
+    # WHEN a block is timed, even if it raises
+    # THEN elapsed time should be observed in milliseconds
+    mocker.patch("time.perf_counter", side_effect=[1.0, 1.25])
+    histogram = Histogram(name="PaymentLatency", unit=MetricUnit.Milliseconds)
+
+    with pytest.raises(RuntimeError):
+        with histogram.time():
+            raise RuntimeError("failed")
+
+    assert histogram.count == 1
+    assert histogram.sum == 250
+
+
+def test_histogram_time_invalid_unit():
+    # GIVEN a histogram whose unit isn't a time unit
+    # WHEN a block is timed
+    # THEN ValueError should be raised
+    histogram = Histogram(name="PaymentSize", unit=MetricUnit.Bytes)
+
+    with pytest.raises(ValueError):
+        with histogram.time():
+            pass
+
+
+def test_histogram_clear_and_empty_percentile():
+    # GIVEN a histogram with observations
+    # WHEN it's cleared
+    # THEN no observations or percentiles should be left
+    histogram = Histogram(name="PaymentLatency")
+    histogram.observe(10)
+    histogram.clear()
+
+    assert histogram.values_and_counts() == ([], [])
+    assert histogram.percentile(99) is None
+
+
+@pytest.mark.parametrize("relative_accuracy", [0, 1, 1.5])
+def test_histogram_invalid_relative_accuracy(relative_accuracy):
+    with pytest.raises(ValueError):
+        Histogram(name="PaymentLatency", relative_accuracy=relative_accuracy)
+
+
+@pytest.mark.parametrize(
+    "unit, expected",
+    [
+        ("BytesPerSecond", MetricUnit.BytesPerSecond),
+        ("countpersecond", MetricUnit.CountPerSecond),
+        ("Megabits/Second", MetricUnit.MegabitsPerSecond),
+        ("MILLISECONDS", MetricUnit.Milliseconds),
+    ],
+)
+def test_build_metric_unit_rate_units(unit, expected):
+    # GIVEN rate units by name or CloudWatch value
+    # WHEN metric unit is built
+    # THEN each rate unit should be a distinct member with its CloudWatch value
+    assert build_metric_unit_from_str(unit) is expected
+
+
+def test_metric_unit_rate_units_distinct():
+    # GIVEN rate units
+    # WHEN compared
+    # THEN they should not be aliases of a single member
+    rate_units = [
+        unit for name, unit in MetricUnit.__members__.items() if name.endswith("PerSecond")
+    ]
+
+    assert len(set(rate_units)) == 11
+    assert MetricUnit.CountPerSecond.value == "Count/Second"
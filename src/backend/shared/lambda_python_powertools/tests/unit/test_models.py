@@ -0,0 +1,89 @@
+from dataclasses import dataclass
+
+import pytest
+
+from lambda_python_powertools.helper.cold_start import cold_start
+from lambda_python_powertools.helper.models import (
+    InvocationContext,
+    build_invocation_context,
+    current_invocation_context,
+)
+
+
+@dataclass
+class LambdaContext:
+    function_name: str = "test"
+    memory_limit_in_mb: int = 128
+    invoked_function_arn: str = "arn:aws:lambda:eu-west-1:809313241:function:test"
+    aws_request_id: str = "52fdfc07-2182-154f-163f-5f0f9a621d72"
+
+
+@pytest.fixture
+def invocation():
+    cold_start.invocation_begin()
+    yield
+    cold_start.invocation_end()
+
+
+def test_build_invocation_context(invocation):
+    # GIVEN a Process Booking State Machine event and Lambda context
+    # WHEN invocation context is built
+    # THEN it should hold Lambda context and state machine fields, missing ones as None
+    event = {"bookingId": "5347fc8d", "customerId": "d749f277", "name": "execution"}
+
+    invocation_context = build_invocation_context(event=event, context=LambdaContext())
+
+    assert invocation_context.lambda_context_fields() == {
+        "function_name": "test",
+        "function_memory_size": "128",
+        "function_arn": "arn:aws:lambda:eu-west-1:809313241:function:test",
+        "function_request_id": "52fdfc07-2182-154f-163f-5f0f9a621d72",
+    }
+    assert invocation_context.process_booking_fields() == {
+        "customer_id": "d749f277",
+        "booking_id": "5347fc8d",
+        "charge_id": None,
+        "outbound_flight_id": None,
+        "state_machine_execution_id": "execution",
+    }
+    assert not hasattr(invocation_context, "__dict__")
+
+
+def test_build_invocation_context_once_per_invocation():
+    # GIVEN stacked decorators building the invocation context from the same event and context
+    # WHEN invocation context is built again within and after an invocation
+    # THEN it should be the same object within an invocation only
+    event, context = {"bookingId": "5347fc8d"}, LambdaContext()
+
+    cold_start.invocation_begin()
+    first = build_invocation_context(event=event, context=context)
+    assert build_invocation_context(event=event, context=context) is first
+    assert current_invocation_context() is first
+    cold_start.invocation_end()
+
+    cold_start.invocation_begin()
+    assert current_invocation_context() == InvocationContext()
+    assert build_invocation_context(event=event, context=context) is not first
+    cold_start.invocation_end()
+
+
+def test_build_invocation_context_request_fields_per_invocation(invocation):
+    # GIVEN a container handling invocations of the same function
+    # WHEN invocation contexts are built for different requests
+    # THEN request id should change while function fields stay the same
+    first = build_invocation_context(event={}, context=LambdaContext(aws_request_id="first"))
+    second = build_invocation_context(event={}, context=LambdaContext(aws_request_id="second"))
+
+    assert first.function_request_id == "first"
+    assert second.function_request_id == "second"
+    assert first.lambda_context_fields().keys() == second.lambda_context_fields().keys()
+    assert first[:3] == second[:3]
+
+
+def test_build_invocation_context_non_dict_event(invocation):
+    # GIVEN a lambda handler invoked with an event other than a dict and no context
+    # WHEN invocation context is built
+    # THEN it should have default values
+    invocation_context = build_invocation_context(event=["bookingId"], context=None)
+
+    assert invocation_context == InvocationContext()
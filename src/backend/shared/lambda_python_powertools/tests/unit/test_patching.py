@@ -0,0 +1,94 @@
+import importlib
+import sys
+
+import pytest
+
+from lambda_python_powertools.tracing import patching
+from lambda_python_powertools.tracing.patching import LazyPatchFinder, patch_modules
+
+
+@pytest.fixture
+def lazy_patch_finder(monkeypatch):
+    finder = LazyPatchFinder()
+    monkeypatch.setattr(patching, "lazy_patch_finder", finder)
+    yield finder
+    if finder in sys.meta_path:
+        sys.meta_path.remove(finder)
+
+
+@pytest.fixture
+def airline_module(tmp_path, monkeypatch):
+    """Creates an importable module that hasn't been imported yet"""
+    (tmp_path / "airline_inventory.py").write_text("SEATS = 10\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    importlib.invalidate_caches()
+    yield "airline_inventory"
+    sys.modules.pop("airline_inventory", None)
+
+
+def test_patch_modules_eager(mocker):
+    # GIVEN modules to patch
+    # WHEN patched eagerly
+    # THEN they should be patched at once
+    patcher = mocker.MagicMock()
+
+    patch_modules(["boto3", "requests"], patcher=patcher)
+
+    patcher.assert_called_once_with(("boto3", "requests"))
+
+
+def test_patch_modules_lazy(mocker, lazy_patch_finder, airline_module):
+    # GIVEN a module to patch that hasn't been imported
+    # WHEN patched lazily
+    # THEN it should only be patched once it's imported, after being executed
+    patched = []
+    patcher = mocker.MagicMock(
+        side_effect=lambda modules: patched.append((modules, sys.modules[airline_module].SEATS))
+    )
+
+    patch_modules([airline_module], lazy=True, patcher=patcher)
+    assert patcher.call_count == 0
+
+    module = importlib.import_module(airline_module)
+
+    assert patched == [((airline_module,), 10)]
+    assert module.__loader__.__class__.__name__ == "SourceFileLoader"
+    assert lazy_patch_finder.pending == {}
+
+
+def test_patch_modules_lazy_already_imported(mocker, lazy_patch_finder):
+    # GIVEN a module to patch that's already been imported
+    # WHEN patched lazily
+    # THEN it should be patched right away
+    patcher = mocker.MagicMock()
+
+    patch_modules(["json"], lazy=True, patcher=patcher)
+
+    patcher.assert_called_once_with(("json",))
+    assert lazy_patch_finder.pending == {}
+
+
+def test_patch_modules_lazy_trigger(mocker, lazy_patch_finder):
+    # GIVEN boto3 is patched lazily
+    # WHEN registered
+    # THEN it should be patched once botocore is imported
+    patcher = mocker.MagicMock()
+    mocker.patch.dict(sys.modules)
+    sys.modules.pop("botocore", None)
+
+    patch_modules(["boto3"], lazy=True, patcher=patcher)
+
+    assert list(lazy_patch_finder.pending) == ["botocore"]
+
+
+def test_patch_modules_lazy_patch_failure(mocker, lazy_patch_finder, airline_module):
+    # GIVEN patching a module fails
+    # WHEN module is imported
+    # THEN import should still succeed
+    patcher = mocker.MagicMock(side_effect=Exception("unsupported"))
+
+    patch_modules([airline_module], lazy=True, patcher=patcher)
+    module = importlib.import_module(airline_module)
+
+    assert module.SEATS == 10
+    assert patcher.call_count == 1
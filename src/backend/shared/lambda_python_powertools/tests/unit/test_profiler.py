@@ -0,0 +1,98 @@
+import asyncio
+import json
+
+from lambda_python_powertools.metrics import Metrics
+from lambda_python_powertools.tracing import Profiler
+
+
+def test_profiler_times_functions(mocker):
+    # GIVEN a profiler
+    # WHEN functions, coroutines and generators are profiled and called
+    # THEN each call should be observed in a histogram per function
+    profiler = Profiler(metrics=mocker.MagicMock())
+
+    @profiler.profile
+    def reserve_booking(booking_id):
+        return booking_id
+
+    @profiler.profile
+    async def collect_payment(charge_id):
+        await asyncio.sleep(0.01)
+        return charge_id
+
+    @profiler.profile
+    def bookings(count):
+        yield from range(count)
+
+    assert reserve_booking("1") == "1"
+    assert reserve_booking("2") == "2"
+    assert asyncio.run(collect_payment("ch_1")) == "ch_1"
+    assert list(bookings(3)) == [0, 1, 2]
+
+    histograms = profiler.histograms
+    assert reserve_booking.__name__ == "reserve_booking"
+    assert histograms["reserve_booking"].count == 2
+    assert histograms["collect_payment"].count == 1
+    assert histograms["collect_payment"].min >= 10
+    assert histograms["bookings"].count == 1
+
+
+def test_profiler_flush_interval(mocker):
+    # GIVEN a profiler flushing at most once a minute
+    # WHEN it's flushed before and after the interval has elapsed
+    # THEN histograms with observations should only be added once the interval has elapsed
+    monotonic_mock = mocker.patch("lambda_python_powertools.tracing.profiler.time.monotonic")
+    monotonic_mock.return_value = 1000
+    metrics = mocker.MagicMock(spec=Metrics)
+    profiler = Profiler(metrics=metrics, flush_interval=60)
+
+    @profiler.profile
+    def reserve_booking():
+        pass
+
+    @profiler.profile
+    def cancel_booking():
+        pass
+
+    reserve_booking()
+
+    monotonic_mock.return_value = 1030
+    profiler.flush()
+    assert metrics.add_histogram.call_count == 0
+
+    monotonic_mock.return_value = 1060
+    profiler.flush()
+    assert metrics.add_histogram.call_args_list == [
+        mocker.call(profiler.histograms["reserve_booking"], method="reserve_booking")
+    ]
+
+    profiler.flush(force=True)
+    assert metrics.add_histogram.call_count == 2
+
+
+def test_profiler_flush_bounded_across_invocations(mocker, capsys):
+    # GIVEN a profiler flushing at most once a minute, and thousands of calls meanwhile
+    # WHEN it's flushed once the interval has elapsed
+    # THEN a single bounded metric should be emitted, and observations cleared for the next one
+    monotonic_mock = mocker.patch("lambda_python_powertools.tracing.profiler.time.monotonic")
+    monotonic_mock.return_value = 1000
+    metrics = Metrics(service="booking")
+    profiler = Profiler(metrics=metrics, flush_interval=60)
+
+    @profiler.profile
+    def reserve_booking():
+        pass
+
+    for _invocation in range(100):
+        for _ in range(100):
+            reserve_booking()
+        profiler.flush()
+        metrics.flush()
+
+    monotonic_mock.return_value = 1060
+    profiler.flush()
+    metrics.flush()
+
+    (line,) = capsys.readouterr().out.splitlines()
+    assert len(json.loads(line)["MethodDuration"]) == 100
+    assert profiler.histograms["reserve_booking"].count == 0
@@ -0,0 +1,70 @@
+import pytest
+
+from lambda_python_powertools.tracing import LocalSampler, SamplingRule
+
+
+@pytest.fixture
+def booking_event():
+    return {"bookingId": "5347fc8d", "outboundFlightId": "f3b1c7a2"}
+
+
+def test_sampling_rule_reservoir(mocker):
+    # GIVEN a rule with a fixed target and no rate
+    # WHEN invocations happen within and across seconds
+    # THEN only fixed target invocations should be sampled each second
+    time_mock = mocker.patch("lambda_python_powertools.tracing.sampling.time.time")
+    rule = SamplingRule(fixed_target=2, rate=0)
+
+    time_mock.return_value = 100.1
+    first_second = [rule.sample() for _ in range(4)]
+    time_mock.return_value = 101.5
+    second_second = [rule.sample() for _ in range(4)]
+
+    assert first_second == [True, True, False, False]
+    assert second_second == [True, True, False, False]
+
+
+def test_sampling_rule_rate(mocker):
+    # GIVEN a rule without fixed target
+    # WHEN invocations are sampled
+    # THEN rate should decide whether they're sampled
+    mocker.patch("lambda_python_powertools.tracing.sampling.random.random", return_value=0.3)
+
+    assert SamplingRule(fixed_target=0, rate=0.5).sample() is True
+    assert SamplingRule(fixed_target=0, rate=0.2).sample() is False
+    assert SamplingRule(fixed_target=0, rate=0).sample() is False
+
+
+def test_sampling_rule_matches(booking_event):
+    # GIVEN rules matching function names and event fields
+    # WHEN invocations are matched
+    # THEN rules should match only if handler and every field pattern match
+    flight_rule = SamplingRule(handler="*CollectPayment*", fields={"outboundFlightId": "f3b1*"})
+
+    assert SamplingRule().matches(handler="ServerlessAirline-CollectPayment", event=None)
+    assert flight_rule.matches(handler="ServerlessAirline-CollectPayment", event=booking_event)
+    assert not flight_rule.matches(handler="ServerlessAirline-RefundPayment", event=booking_event)
+    assert not flight_rule.matches(handler="ServerlessAirline-CollectPayment", event={})
+    assert not flight_rule.matches(handler="ServerlessAirline-CollectPayment", event="event")
+
+
+def test_local_sampler_first_matching_rule(booking_event):
+    # GIVEN a sampler with a rule for a flight and a default rule never sampling
+    # WHEN invocations for that flight and others are sampled
+    # THEN first matching rule, or default rule, should decide
+    sampler = LocalSampler(
+        rules=[{"fields": {"outboundFlightId": "f3b1*"}, "fixed_target": 0, "rate": 1}],
+        default=SamplingRule(fixed_target=0, rate=0),
+    )
+
+    assert sampler.should_sample(handler="collect", event=booking_event) is True
+    assert sampler.should_sample(handler="collect", event={"outboundFlightId": "a1"}) is False
+
+
+@pytest.mark.parametrize("fixed_target,rate", [(-1, 0.5), (1, 1.5), (1, -0.1)])
+def test_sampling_rule_invalid(fixed_target, rate):
+    # GIVEN an invalid fixed target or rate
+    # WHEN a rule is created
+    # THEN it should raise ValueError
+    with pytest.raises(ValueError):
+        SamplingRule(fixed_target=fixed_target, rate=rate)
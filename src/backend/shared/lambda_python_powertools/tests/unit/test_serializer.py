@@ -0,0 +1,152 @@
+import datetime
+import json
+from decimal import Decimal
+
+import pytest
+
+from lambda_python_powertools.helper import serializer
+from lambda_python_powertools.helper.serializer import json_default, json_dumps, register_encoder
+
+
+@pytest.fixture(autouse=True)
+def encoders(monkeypatch):
+    # Encoders registered by a test shouldn't leak into others
+    monkeypatch.setattr(serializer, "ENCODERS", dict(serializer.ENCODERS))
+    monkeypatch.setattr(serializer, "_CACHED_ENCODERS", {})
+
+
+@pytest.fixture(params=["orjson", "json"])
+def backend(request, monkeypatch):
+    if request.param == "json":
+        monkeypatch.setattr(serializer, "orjson", None)
+
+    return request.param
+
+
+def test_json_dumps_known_types(backend):
+    # GIVEN values commonly logged by Airline functions
+    # WHEN serialized with either backend
+    # THEN they should be encoded with dedicated encoders
+    value = {
+        "seatCapacity": Decimal("10"),
+        "ticketPrice": Decimal("100.5"),
+        "createdAt": datetime.datetime(2019, 8, 8, 8, 50, 6),
+        "departureDate": datetime.date(2019, 8, 8),
+        "flights": {"a"},
+    }
+
+    assert json.loads(json_dumps(value)) == {
+        "seatCapacity": 10,
+        "ticketPrice": 100.5,
+        "createdAt": "2019-08-08T08:50:06",
+        "departureDate": "2019-08-08",
+        "flights": ["a"],
+    }
+
+
+def test_json_dumps_client_error(backend):
+    # GIVEN a botocore ClientError
+    # WHEN serialized
+    # THEN error code, message and operation should be kept
+    exceptions = pytest.importorskip("botocore.exceptions")
+    err = exceptions.ClientError(
+        {
+            "Error": {"Code": "ConditionalCheckFailedException", "Message": "failed"},
+            "ResponseMetadata": {"HTTPStatusCode": 400, "RequestId": "123"},
+        },
+        "UpdateItem",
+    )
+
+    assert json.loads(json_dumps({"details": err})) == {
+        "details": {
+            "operation": "UpdateItem",
+            "code": "ConditionalCheckFailedException",
+            "message": "failed",
+            "http_status_code": 400,
+            "request_id": "123",
+        }
+    }
+
+
+def test_json_dumps_case_insensitive_dict(backend):
+    # GIVEN requests response headers
+    # WHEN serialized
+    # THEN they should be encoded as a dict
+    structures = pytest.importorskip("requests.structures")
+    headers = structures.CaseInsensitiveDict({"Content-Type": "application/json"})
+
+    assert json.loads(json_dumps({"headers": headers})) == {
+        "headers": {"Content-Type": "application/json"}
+    }
+
+
+def test_json_dumps_unknown_type(backend):
+    # GIVEN a value without a registered encoder
+    # WHEN serialized
+    # THEN its string representation should be used instead of failing
+    class Booking:
+        def __str__(self):
+            return "booking"
+
+    assert json.loads(json_dumps({"booking": Booking()})) == {"booking": "booking"}
+
+
+def test_json_dumps_orjson_rejected_value():
+    # GIVEN a value orjson can't serialize
+    # WHEN serialized
+    # THEN standard library should be used as a fallback
+    assert json_dumps({"big": 2**70}) == '{"big": 1180591620717411303424}'
+
+
+def test_register_encoder_subclass():
+    # GIVEN an encoder previously resolved for a subclass
+    # WHEN an encoder is registered for its base class
+    # THEN subclass should use the newly registered encoder
+    class Base:
+        pass
+
+    class Child(Base):
+        pass
+
+    child = Child()
+    assert json_default(child) == str(child)
+
+    register_encoder(Base, lambda _: "base")
+
+    assert json_default(Child()) == "base"
+
+
+def test_register_encoder_keeps_registered_subclass():
+    # GIVEN an encoder registered for a subclass
+    # WHEN an encoder is registered for its base class afterwards
+    # THEN subclass should keep its own encoder
+    class Base:
+        pass
+
+    class Child(Base):
+        pass
+
+    register_encoder(Child, lambda _: "child")
+    register_encoder(Base, lambda _: "base")
+
+    assert json_default(Child()) == "child"
+    assert json_default(Base()) == "base"
+
+
+def test_json_dumps_non_finite_decimal(backend):
+    # GIVEN DynamoDB numbers that aren't finite
+    # WHEN serialized
+    # THEN they should be encoded as strings rather than fail
+    value = {"inf": Decimal("Infinity"), "ninf": Decimal("-Infinity"), "nan": Decimal("NaN")}
+
+    assert json.loads(json_dumps(value)) == {"inf": "Infinity", "ninf": "-Infinity", "nan": "NaN"}
+
+
+def test_register_encoder_datetime(backend):
+    # GIVEN an encoder registered for datetime
+    # WHEN serialized with either backend
+    # THEN registered encoder should be used rather than the backend's own
+    register_encoder(datetime.datetime, lambda value: value.timestamp())
+    value = datetime.datetime(2019, 8, 8, 8, 50, 6, tzinfo=datetime.timezone.utc)
+
+    assert json.loads(json_dumps({"createdAt": value})) == {"createdAt": value.timestamp()}
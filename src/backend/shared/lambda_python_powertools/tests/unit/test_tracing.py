@@ -104,3 +104,48 @@ def test_tracer_env_vars(monkeypatch):
     tracer = Tracer()
 
     assert bool(tracer.disabled) is True
+
+
+def test_tracer_patch_modules(monkeypatch, mocker):
+    # GIVEN tracer runs in Lambda with modules to patch via env vars
+    # WHEN tracer is initialized
+    # THEN only those modules should be patched, lazily
+    monkeypatch.setenv("LAMBDA_TASK_ROOT", "/var/task")
+    monkeypatch.setenv("POWERTOOLS_TRACE_PATCH_MODULES", "boto3, requests")
+    monkeypatch.setenv("POWERTOOLS_TRACE_LAZY_PATCH", "true")
+    patch_modules = mocker.patch("lambda_python_powertools.tracing.tracer.patch_modules")
+    patch_all = mocker.patch("lambda_python_powertools.tracing.tracer.patch_all")
+
+    Tracer()
+
+    patch_modules.assert_called_once_with(["boto3", "requests"], lazy=True)
+    assert patch_all.call_count == 0
+
+
+def test_tracer_patch_all_by_default(monkeypatch, mocker):
+    # GIVEN tracer runs in Lambda without modules to patch
+    # WHEN tracer is initialized
+    # THEN all supported modules should be patched
+    monkeypatch.setenv("LAMBDA_TASK_ROOT", "/var/task")
+    patch_all = mocker.patch("lambda_python_powertools.tracing.tracer.patch_all")
+
+    Tracer()
+
+    patch_all.assert_called_once_with()
+
+
+def test_tracer_disabled_returns_functions_undecorated():
+    # GIVEN tracer is disabled
+    # WHEN lambda handler and method decorators are used
+    # THEN decorated functions should be the original functions
+    tracer = Tracer(disabled=True)
+
+    def handler(event, context):
+        pass
+
+    def greeting(name, message):
+        pass
+
+    assert tracer.capture_lambda_handler(handler) is handler
+    assert tracer.capture_lambda_handler(process_booking_sfn=True)(handler) is handler
+    assert tracer.capture_method(greeting) is greeting
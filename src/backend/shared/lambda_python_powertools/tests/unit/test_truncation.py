@@ -0,0 +1,93 @@
+import json
+from decimal import Decimal
+
+from lambda_python_powertools.helper.truncation import TRUNCATED_KEY, bound_size
+
+
+def test_bound_size_within_budget():
+    # GIVEN a value smaller than budget
+    # WHEN projected
+    # THEN it should be kept as-is
+    value = {"operation": "reserve_booking", "details": {"seats": [1, 2, 3], "paid": True}}
+
+    bounded = bound_size(value, max_bytes=1024)
+
+    assert bounded.value == value
+    assert bounded.truncations == 0
+    assert bounded.size >= len(json.dumps(value, separators=(",", ":")))
+
+
+def test_bound_size_truncates_long_string():
+    # GIVEN a string larger than budget
+    # WHEN projected
+    # THEN it should be cut with a marker of how many chars were dropped
+    bounded = bound_size("a" * 1000, max_bytes=100)
+
+    assert bounded.value.startswith("a" * 60)
+    assert bounded.value.endswith("...[truncated 932 chars]")
+    assert bounded.truncations == 1
+
+
+def test_bound_size_summarises_containers():
+    # GIVEN dicts and lists larger than budget
+    # WHEN projected
+    # THEN remaining keys and items should be summarised
+    # AND projected value should roughly fit in budget
+    value = {f"header_{i}": "x" * 50 for i in range(100)}
+    value["items"] = list(range(1000))
+
+    bounded = bound_size(value, max_bytes=512)
+
+    assert TRUNCATED_KEY in bounded.value
+    assert bounded.value[TRUNCATED_KEY].endswith("more keys")
+    assert len(json.dumps(bounded.value)) < 512 * 1.2
+
+    bounded = bound_size(list(range(1000)), max_bytes=100)
+
+    assert bounded.value[-1].startswith(f"{TRUNCATED_KEY} ")
+    assert bounded.value[-1].endswith("more items")
+
+
+def test_bound_size_keep_fields():
+    # GIVEN fields to keep, some nested after large fields
+    # WHEN projected with a tight budget
+    # THEN kept fields should be kept in full, even if nested
+    value = {
+        "details": {
+            "response_payload": "x" * 5000,
+            "response_status_code": 200,
+        },
+        "operation": "collect_payment",
+    }
+
+    bounded = bound_size(
+        value, max_bytes=64, keep_fields=("operation", "details.response_status_code")
+    )
+
+    assert bounded.value["operation"] == "collect_payment"
+    assert bounded.value["details"]["response_status_code"] == 200
+    assert "response_payload" not in bounded.value["details"]
+    assert bounded.truncations > 0
+
+
+def test_bound_size_unknown_types():
+    # GIVEN values unsupported by JSON
+    # WHEN projected
+    # THEN they should be converted with serializer encoders
+    bounded = bound_size({"seatCapacity": Decimal("10"), "flights": {"a"}}, max_bytes=1024)
+
+    assert bounded.value == {"seatCapacity": 10, "flights": ["a"]}
+
+
+def test_bound_size_max_depth():
+    # GIVEN a deeply nested value
+    # WHEN projected
+    # THEN nesting beyond max depth should be summarised
+    value = {}
+    for _ in range(20):
+        value = {"nested": value}
+
+    bounded = bound_size(value, max_bytes=10000)
+
+    assert TRUNCATED_KEY in json.dumps(bounded.value)
+    assert bounded.truncations == 1
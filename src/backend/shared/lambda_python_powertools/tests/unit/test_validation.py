@@ -0,0 +1,106 @@
+import copy
+import pickle
+
+import pytest
+
+from lambda_python_powertools.helper.validation import EventField, EventSchema, EventValidationError
+
+
+@pytest.fixture
+def booking_schema():
+    return EventSchema(
+        "BookingEvent",
+        booking_id=EventField("bookingId"),
+        customer_id=EventField("customerId", required=False, default="anonymous"),
+        price=EventField("payment.price", types=(int, float), required=False),
+    )
+
+
+def test_validate_extracts_typed_fields(booking_schema):
+    # GIVEN a schema with required, optional and nested fields
+    # WHEN a valid event is validated
+    # THEN fields should be extracted into a model with typed accessors
+    booking = booking_schema.validate(
+        {"bookingId": "5347fc8d", "customerId": "d749f277", "payment": {"price": 100}}
+    )
+
+    assert booking.booking_id == "5347fc8d"
+    assert booking.customer_id == "d749f277"
+    assert booking.price == 100
+    assert booking._fields == ("booking_id", "customer_id", "price")
+
+
+@pytest.mark.parametrize(
+    "event", [{"bookingId": "5347fc8d"}, {"bookingId": "5347fc8d", "customerId": ""}]
+)
+def test_validate_optional_fields_default(booking_schema, event):
+    # GIVEN a schema with optional fields
+    # WHEN an event misses them, or they're empty
+    # THEN their defaults should be used
+    booking = booking_schema.validate(event)
+
+    assert booking == ("5347fc8d", "anonymous", None)
+
+
+def test_validate_optional_nested_field_not_a_dict(booking_schema):
+    # GIVEN a schema with an optional nested field
+    # WHEN its parent isn't a dict
+    # THEN its default should be used
+    booking = booking_schema.validate({"bookingId": "5347fc8d", "payment": "pending"})
+
+    assert booking.price is None
+
+
+def test_validate_structured_errors(booking_schema):
+    # GIVEN a schema with required and typed fields
+    # WHEN an event has many invalid fields
+    # THEN every invalid field should be reported at once
+    with pytest.raises(EventValidationError) as excinfo:
+        booking_schema.validate({"customerId": 123, "payment": {"price": "100"}})
+
+    assert isinstance(excinfo.value, ValueError)
+    assert excinfo.value.schema == "BookingEvent"
+    assert excinfo.value.errors == [
+        {"field": "bookingId", "error": "missing"},
+        {"field": "customerId", "error": "unexpected type int"},
+        {"field": "payment.price", "error": "unexpected type str"},
+    ]
+
+
+@pytest.mark.parametrize("event", [None, [], "bookingId"])
+def test_validate_non_dict_event(booking_schema, event):
+    # GIVEN a schema
+    # WHEN event isn't a dict
+    # THEN it should be reported as invalid
+    with pytest.raises(EventValidationError) as excinfo:
+        booking_schema.validate(event)
+
+    assert excinfo.value.errors[0]["field"] == ""
+
+
+def test_validate_single_field():
+    # GIVEN a schema with a single field
+    # WHEN events are validated
+    # THEN a single field model should be returned, or an error
+    schema = EventSchema("ConfirmBookingEvent", booking_id=EventField("bookingId"))
+
+    assert schema.validate({"bookingId": "5347fc8d"}).booking_id == "5347fc8d"
+    with pytest.raises(EventValidationError):
+        schema.validate({"bookingId": None})
+
+
+def test_validation_error_pickle_and_copy():
+    # GIVEN a validation error
+    # WHEN pickled or copied, e.g. when raised across processes
+    # THEN schema, errors and message should be kept
+    err = EventValidationError("BookingEvent", [{"field": "bookingId", "error": "missing"}])
+
+    for restored in (pickle.loads(pickle.dumps(err)), copy.copy(err)):
+        assert restored.schema == err.schema
+        assert restored.errors == err.errors
+        assert str(restored) == str(err)
+
+    assert str(err) == (
+        "Invalid BookingEvent event - Received invalid fields "
+        "[{'field': 'bookingId', 'error': 'missing'}]"
+    )